@@ -3,7 +3,7 @@
 
 import src.Logger as logger
 from src.WurzelBot import WurzelBot
-import time, i18n, argparse
+import i18n, argparse, asyncio
 
 
 parser = argparse.ArgumentParser()
@@ -12,6 +12,13 @@ parser.add_argument('user', type=str, help='username for login')
 parser.add_argument('password', type=str, help='password for login', default=False)
 parser.add_argument('-p', '--portal', help="If -p or --portal Argument is passed, Portal Account Login will be used.", action='store_true', default=False, required=False, dest="portalacc")
 parser.add_argument('-l', '--log', help="If -l or --log Argument is passed, logging will be enabled.", action='store_true', default=False, required=False, dest="log")
+parser.add_argument('-w', '--workers', help="Number of gardens that are read in parallel.", type=int, default=1, required=False, dest="workers")
+parser.add_argument('-a', '--async', help="If -a or --async Argument is passed, independent startup requests are sent concurrently.", action='store_true', default=False, required=False, dest="useAsync")
+parser.add_argument('-o', '--objective', help="Planting objective: fill as many fields as possible or maximize the harvest value per hour.", choices=['fields', 'value'], default='fields', required=False, dest="objective")
+parser.add_argument('-r', '--refresh-products', help="If -r or --refresh-products Argument is passed, the cached product catalogue is downloaded again.", action='store_true', default=False, required=False, dest="refreshProducts")
+parser.add_argument('-u', '--base-url', help="Send all requests to this address instead of the game servers, e.g. a local replay server.", type=str, default=None, required=False, dest="baseURL")
+parser.add_argument('-m', '--metrics', help="Write request metrics in Prometheus text format to this file.", type=str, default=None, required=False, dest="metricsFile")
+parser.add_argument('-k', '--keep-session', help="If -k or --keep-session Argument is passed, the session stays open and is reused by the next run within its lifetime.", action='store_true', default=False, required=False, dest="keepSession")
 parser.add_argument('lang', help="Set Language and Region for the Game and Bot", type=str, nargs='?', default=None, const='en')
 args = parser.parse_args()
 
@@ -23,43 +30,19 @@ if args.log:
     logger.logger()
 
 # Init connection
-wurzelBot = WurzelBot()
-succ = wurzelBot.launchBot(args.server, args.user, args.password, args.lang, args.portalacc)
+wurzelBot = WurzelBot(maxWorkers=args.workers, baseURL=args.baseURL, collectMetrics=args.metricsFile is not None,
+                      persistSession=args.keepSession)
+if args.useAsync:
+    succ = asyncio.run(wurzelBot.launchBotAsync(args.server, args.user, args.password, args.lang, args.portalacc, args.refreshProducts))
+else:
+    succ = wurzelBot.launchBot(args.server, args.user, args.password, args.lang, args.portalacc, args.refreshProducts)
 if succ != True:
     exit(-1)
 
-# Remove weed
-print(i18n.t('wimpb.remove_weed_from_all_gardens'))
-wurzelBot.removeWeedInAllGardens()
-
-# Harvest
-wurzelBot.harvestAllGarden()
-
-# Plant plants
-planted = -1
-plantedSingle = -1
-while wurzelBot.hasEmptyFields() and planted != 0 and plantedSingle != 0:
-    lowest = wurzelBot.getLowestPlantStockEntry()
-    if lowest == 'Your stock is empty': break
-    print(i18n.t('wimpb.grow_plant_X', plant=lowest))
-    planted = wurzelBot.growPlantsInGardens(lowest)
-    # If no more "lowest plants" can be grown, try to grow single field plants
-    if planted == 0:
-        lowestSingle = wurzelBot.getLowestSinglePlantStockEntry()
-        if lowestSingle == 'Your stock is empty': break
-        print(i18n.t('wimpb.grow_plant_X', plant=lowestSingle))
-        plantedSingle = wurzelBot.growPlantsInGardens(lowestSingle)
-
-# Water plants
-time.sleep(3)
-print(i18n.t('wimpb.watering_all_plants'))
-wurzelBot.waterPlantsInAllGardens()
-# Claim Daily
-print(i18n.t('wimpb.claim_bonus'))
-wurzelBot.getDailyLoginBonus()
-# Process Wimp Customers in Gardens
-print(i18n.t('wimpb.process_wimps'))
-wurzelBot.sellWimpsProducts(0,0)
+# Remove weed, harvest, plant, water, claim daily bonus and process wimp customers
+wurzelBot.runCycle(args.objective)
 
 # Close connection
-wurzelBot.exitBot()
\ No newline at end of file
+wurzelBot.exitBot()
+if args.metricsFile is not None:
+    wurzelBot.writeMetrics(args.metricsFile)
\ No newline at end of file
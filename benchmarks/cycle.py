@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Misst einen kompletten Durchlauf von automated_script.py (Login, Unkraut, Ernte, Anpflanzen,
+Gießen, Tagesbonus, Wimps, Logout) gegen den ReplayServer für verschiedene Accounts.
+
+Je Account werden erfasst:
+- Laufzeit des Durchlaufs
+- Anzahl der Anfragen je Endpunkt und übertragene Bytes (serverseitig gezählt)
+- CPU-Zeit für das Parsen der Antworten (JSON, YAML, HTML und die Auswertungen in HTTPConnection)
+- maximaler Speicherverbrauch des Bots
+
+Der Server läuft in einem eigenen Prozess, damit seine Rechenzeit und sein Speicher nicht
+mitgemessen werden. Die Ergebnisse werden in benchmarks/results/ gespeichert und mit einem
+früheren Ergebnis (standardmäßig baseline.json) verglichen.
+
+Aufruf aus dem Hauptverzeichnis:
+    python -m benchmarks.cycle [--latency 0.02] [--workers 1] [--shapes 1g 4g-all] [--save]
+"""
+
+import argparse, contextlib, cProfile, datetime, io, json, multiprocessing, os, platform, pstats
+import subprocess, sys, time, tracemalloc
+from src.ReplayServer import ReplayServer
+from src.WurzelBot import WurzelBot
+
+RESULTS_DIR = os.path.join('benchmarks', 'results')
+BASELINE_FILE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+SHAPES = {
+    '1g':        {'gardens': 1},
+    '2g':        {'gardens': 2},
+    '3g':        {'gardens': 3},
+    '4g':        {'gardens': 4},
+    '4g-aqua':   {'gardens': 4, 'aquaGarden': True},
+    '4g-all':    {'gardens': 4, 'aquaGarden': True, 'honeyFarm': True, 'bonsaiFarm': True},
+}
+
+# Funktionen, deren Laufzeit als Parsen gezählt wird. Bei den Decodern zählt die gesamte
+# Laufzeit, bei den Auswertungen in HTTPConnection nur die eigene, da sie selbst Decoder aufrufen.
+_DECODERS = {('json/__init__.py', 'loads'), ('yaml/__init__.py', 'load'),
+             ('lxml/html/__init__.py', 'parse'), ('lxml/html/__init__.py', 'fromstring'),
+             ('~', "<built-in method lxml.etree.fromstring>"), ('src/StatsParser.py', 'parseStats')}
+_PARSER_PREFIXES = ('_HTTPConnection__find', '_HTTPConnection__parseNPCPricesFromHtml', '_HTTPConnection__isFieldWatered')
+
+def _serve(connection, latency, seed, shape):
+    """Startet den ReplayServer im Kindprozess und gibt nach dem Durchlauf die Zählerstände zurück."""
+    server = ReplayServer(latency=latency, seed=seed, **shape)
+    connection.send(server.start())
+    connection.recv()
+    connection.send(server.getRequestStats())
+    server.stop()
+
+def _runCycle(baseURL, workers):
+    bot = WurzelBot(maxWorkers=workers, baseURL=baseURL)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not bot.launchBot(1, 'benchmark', 'benchmark', 'de', False, refreshProducts=True):
+            raise RuntimeError('Login am ReplayServer fehlgeschlagen')
+        bot.runCycle(delay=0)
+        bot.exitBot()
+
+def _getParseTime(profile):
+    seconds = 0.0
+    for (fileName, line, name), (cc, nc, tt, ct, callers) in pstats.Stats(profile).stats.items():
+        if any(fileName.endswith(suffix) and name == function for suffix, function in _DECODERS):
+            seconds += ct
+        elif name.startswith(_PARSER_PREFIXES):
+            seconds += tt
+    return seconds
+
+def _measure(shape, latency, workers, seed, mode):
+    """Führt einen Durchlauf aus und misst je nach mode Laufzeit, Parse-Zeit oder Speicher."""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child, latency, seed, shape), daemon=True)
+    process.start()
+    baseURL = parent.recv()
+    result = {}
+    try:
+        if mode == 'time':
+            start = time.perf_counter()
+            _runCycle(baseURL, workers)
+            result['wallTime'] = time.perf_counter() - start
+        elif mode == 'profile':
+            # thread_time misst nur die CPU-Zeit des Bot-Threads
+            profile = cProfile.Profile(time.thread_time)
+            profile.runcall(_runCycle, baseURL, workers)
+            result['parseCPUTime'] = _getParseTime(profile)
+        elif mode == 'memory':
+            tracemalloc.start()
+            try:
+                _runCycle(baseURL, workers)
+                result['peakMemory'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    finally:
+        parent.send('stop')
+        stats = parent.recv()
+        process.join()
+    result['requests'] = stats
+    return result
+
+def runShape(name, latency=0.0, workers=1, seed=0):
+    shape = SHAPES[name]
+    timing = _measure(shape, latency, workers, seed, 'time')
+    profile = _measure(shape, latency, workers, seed, 'profile')
+    memory = _measure(shape, latency, workers, seed, 'memory')
+    requests = timing['requests']
+    return {'shape': shape,
+            'wallTime': round(timing['wallTime'], 4),
+            'parseCPUTime': round(profile['parseCPUTime'], 4),
+            'peakMemory': memory['peakMemory'],
+            'requestCount': sum(stats['requests'] for stats in requests.values()),
+            'bytesSent': sum(stats['bytesReceived'] for stats in requests.values()),
+            'bytesReceived': sum(stats['bytesSent'] for stats in requests.values()),
+            'requests': {endpoint: stats['requests'] for endpoint, stats in requests.items()}}
+
+def _getRevision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _printResults(results, baseline=None):
+    print(f"{'shape'.ljust(10)} {'wall s':>8} {'parse s':>8} {'peak KiB':>9} {'requests':>9} {'KiB in':>8}")
+    for name, result in results['shapes'].items():
+        line = (f"{name.ljust(10)} {result['wallTime']:8.3f} {result['parseCPUTime']:8.3f} "
+                f"{result['peakMemory'] / 1024:9.0f} {result['requestCount']:9d} {result['bytesReceived'] / 1024:8.0f}")
+        previous = (baseline or {}).get('shapes', {}).get(name)
+        if previous is not None:
+            line += (f"   vs. baseline: requests {result['requestCount'] - previous['requestCount']:+d}, "
+                     f"KiB in {(result['bytesReceived'] - previous['bytesReceived']) / 1024:+.0f}, "
+                     f"peak KiB {(result['peakMemory'] - previous['peakMemory']) / 1024:+.0f}")
+        print(line)
+
+    for name, result in results['shapes'].items():
+        print(f'\n{name}: requests per endpoint')
+        for endpoint, count in result['requests'].items():
+            print(f'  {endpoint.ljust(50)} {count:5d}')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=list(SHAPES), help='account shapes to run')
+    parser.add_argument('--latency', type=float, default=0.0, help='delay of every server response in seconds')
+    parser.add_argument('--workers', type=int, default=1, help='number of gardens that are read in parallel')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the generated gardens')
+    parser.add_argument('--compare', type=str, default=BASELINE_FILE, help='results file to compare with')
+    parser.add_argument('--save', help="If --save Argument is passed, the results are stored in benchmarks/results/.", action='store_true', default=False)
+    parser.add_argument('--save-baseline', help="If --save-baseline Argument is passed, the results replace the baseline.", action='store_true', default=False, dest='saveBaseline')
+    args = parser.parse_args()
+
+    results = {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+               'revision': _getRevision(),
+               'python': platform.python_version(),
+               'latency': args.latency,
+               'workers': args.workers,
+               'seed': args.seed,
+               'shapes': {}}
+    for name in args.shapes:
+        results['shapes'][name] = runShape(name, args.latency, args.workers, args.seed)
+
+    baseline = None
+    if os.path.exists(args.compare):
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+    _printResults(results, baseline)
+
+    targets = []
+    if args.save:
+        targets.append(os.path.join(RESULTS_DIR, f"cycle_{results['date'].replace(':', '-')}.json"))
+    if args.saveBaseline:
+        targets.append(BASELINE_FILE)
+    for target in targets:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=1)
+        print(f'\nResults saved to {target}')
+
+if __name__ == '__main__':
+    main()
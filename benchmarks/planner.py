@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Vergleicht den GardenPlanner mit der bisherigen Anbauschleife aus automated_script.py
+(jeweils die Pflanze mit dem geringsten Bestand, danach Einfeld-Pflanzen) auf zufälligen
+Gärten und Lagerbeständen.
+
+Aufruf aus dem Hauptverzeichnis: python -m benchmarks.planner [Durchläufe] [Gärten]
+"""
+
+import json, random, sys, time
+from src.FieldBitmap import FieldBitmap, MAX_FIELDS
+from src.GardenPlanner import GardenPlanner, OBJECTIVE_FIELDS, OBJECTIVE_VALUE
+from src.Produktdaten import ProductData
+
+class _CatalogueConnection(object):
+    """Liefert einen zufälligen Produktkatalog anstelle des Servers."""
+
+    def __init__(self, rnd):
+        self.__products = {'0': {'name': 'Coins', 'category': '', 'sx': 1, 'sy': 1, 'level': 0,
+                                 'crop': 0, 'plantable': 0, 'time': 0}}
+        self.__prices = {}
+        sizes = [(1, 1)] * 6 + [(2, 1), (1, 2), (2, 2), (2, 2)]
+        for productID in range(1, 41):
+            sx, sy = rnd.choice(sizes)
+            name = f'Pflanze {productID}'
+            self.__products[str(productID)] = {'name': name, 'category': 'v', 'sx': sx, 'sy': sy,
+                                               'level': 1, 'crop': rnd.randint(1, 5) * sx * sy,
+                                               'plantable': 1, 'time': rnd.randint(1, 48) * 900}
+            self.__prices[name] = round(rnd.uniform(0.5, 50.0), 2)
+
+    def getAllProductInformations(self):
+        return json.dumps(self.__products)
+
+    def getNPCPrices(self):
+        return self.__prices
+
+def _randomGardens(rnd, numberOfGardens):
+    gardens = {}
+    for gardenID in range(1, numberOfGardens + 1):
+        free = [fieldID for fieldID in range(1, MAX_FIELDS + 1) if rnd.random() < 0.7]
+        gardens[gardenID] = FieldBitmap.fromFieldIDs(free)
+    return gardens
+
+def _randomStock(rnd):
+    return {str(productID): rnd.choice([0, 0, 5, 20, 60, 200]) for productID in range(1, 41)}
+
+def _greedy(productData, gardens, stock):
+    """Bisherige Schleife aus automated_script.py, ohne Serveranfragen nachgebildet."""
+    gardens = {gardenID: bitmap.copy() for gardenID, bitmap in gardens.items()}
+    stock = {int(productID): amount for productID, amount in stock.items()}
+    singleFieldPlants = [productData.getProductByName(name).getID() for name in productData.getListOfSingleFieldPlants()]
+    filled = 0
+
+    def grow(productID):
+        product = productData.getProductByID(productID)
+        sx, sy = product.getSX(), product.getSY()
+        planted = 0
+        for bitmap in gardens.values():
+            for fieldID in range(1, MAX_FIELDS + 1):
+                if planted == stock[productID]: break
+                if bitmap.canPlace(fieldID, sx, sy):
+                    bitmap.occupy(fieldID, sx, sy)
+                    planted += 1
+        stock[productID] -= planted
+        return planted * sx * sy, planted
+
+    def lowest(productIDs):
+        available = [productID for productID in productIDs if stock.get(productID, 0) > 0]
+        return min(available, key=lambda productID: stock[productID]) if available else None
+
+    planted = plantedSingle = -1
+    while any(gardens.values()) and planted != 0 and plantedSingle != 0:
+        productID = lowest(stock.keys())
+        if productID is None: break
+        fields, planted = grow(productID)
+        filled += fields
+        if planted == 0:
+            productID = lowest(singleFieldPlants)
+            if productID is None: break
+            fields, plantedSingle = grow(productID)
+            filled += fields
+    return filled
+
+def main(runs=200, numberOfGardens=3):
+    rnd = random.Random(4711)
+    productData = ProductData(_CatalogueConnection(rnd))
+    productData.initAllProducts()
+
+    results = {'greedy': [0, 0.0], OBJECTIVE_FIELDS: [0, 0.0], OBJECTIVE_VALUE: [0, 0.0]}
+    free = 0
+    for _ in range(runs):
+        gardens = _randomGardens(rnd, numberOfGardens)
+        stock = _randomStock(rnd)
+        free += sum(len(bitmap) for bitmap in gardens.values())
+
+        start = time.perf_counter()
+        results['greedy'][0] += _greedy(productData, gardens, stock)
+        results['greedy'][1] += time.perf_counter() - start
+
+        for objective in (OBJECTIVE_FIELDS, OBJECTIVE_VALUE):
+            planner = GardenPlanner(productData, objective)
+            start = time.perf_counter()
+            placements = planner.plan(gardens, stock)
+            results[objective][1] += time.perf_counter() - start
+            results[objective][0] += planner.getFilledFields(placements)
+
+    print(f'{runs} runs, {numberOfGardens} gardens, {free} free fields in total')
+    for name, (filled, seconds) in results.items():
+        print(f'{name.ljust(8)} filled: {filled:7d} ({filled / free * 100:5.1f} %)   '
+              f'time per run: {seconds / runs * 1000:7.3f} ms')
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Vergleicht StatsParser mit dem bisherigen Auslesen der Statistik (ein re.findall über die Zeile
+an fester Position je abgefragtem Wert) auf den Fixtures der Server de, en und ru. Die Fixtures
+sind synthetisch; die Messung sagt daher nichts darüber, ob die Bezeichnungen auf den
+Spielservern gefunden werden.
+
+Aufruf aus dem Hauptverzeichnis: python -m benchmarks.stats [Durchläufe]
+"""
+
+import json, re, sys, time
+from src.ReplayServer import FIXTURE_DIR
+from src.StatsParser import parseStats, STATS_INFO
+
+FIXTURES = {'de': 'statsGetStats.json', 'en': 'statsGetStats_en.json', 'ru': 'statsGetStats_ru.json'}
+
+# Bisherige Positionen der Werte, die der Bot abfragt
+_LEGACY_ROWS = {'Username': 0, 'CompletedQuests': 5, 'CactusQuest': 7, 'EchinoQuest': 8, 'BigheadQuest': 9,
+                'OpuntiaQuest': 10, 'SaguaroQuest': 11, 'Gardens': 16}
+
+def _loadTable(fileName):
+    with open(f'{FIXTURE_DIR}/{fileName}', encoding='utf-8') as file:
+        table = json.load(file)['table']
+    return [row.replace('{userName}', 'Benchmark').replace('{gardens}', '3') for row in table]
+
+def _legacy(table):
+    """Bisheriges Vorgehen aus HTTPConnection.__getInfoFromJSONContent für alle abgefragten Werte."""
+    result = {}
+    for info, index in _LEGACY_ROWS.items():
+        parsed_string_list = re.findall(r"<td>(.+?)</td>", str(table[index]).replace(r'&nbsp;', ''))
+        result[info] = parsed_string_list[1] if info == 'Username' else int(parsed_string_list[1])
+    return result
+
+def _parser(table):
+    record = parseStats(table)
+    return {info: getattr(record, STATS_INFO[info]) for info in _LEGACY_ROWS}
+
+def main(runs=20000):
+    for lang, fileName in FIXTURES.items():
+        table = _loadTable(fileName)
+        expected = _legacy(table)
+        if _parser(table) != expected:
+            raise RuntimeError(f'{lang}: StatsParser liefert {_parser(table)}, erwartet {expected}')
+
+        for name, function in (('legacy', _legacy), ('parser', _parser)):
+            start = time.perf_counter()
+            for _ in range(runs):
+                function(table)
+            seconds = time.perf_counter() - start
+            print(f'{lang} {name.ljust(6)} time per table: {seconds / runs * 1e6:7.2f} µs')
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -28,6 +28,7 @@ def main():
         print('')
         userInput = input('▶ ').strip()
         inputLower = userInput.lower()
+        wurzelBot.startCycle()
 
         if inputLower == 'exit': closeConnection()
         elif inputLower == 'bee': bee()
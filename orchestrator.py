@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Führt die Durchläufe aller Accounts aus einer YAML-Datei gleichzeitig in einem Prozess aus, z.B.:
+    python orchestrator.py accounts.yaml --concurrency 4 --rate 5
+Mit --daemon bleiben alle Accounts angemeldet und jede Aufgabe (Gärten, Bienen, Bonsai, Tagesbonus)
+wird genau dann ausgeführt, wenn sie fällig ist, bis das Programm mit Strg+C oder SIGTERM beendet wird.
+Aufbau der Datei siehe accounts.example.yaml.
+"""
+
+import src.Logger as logger
+from src.Orchestrator import Orchestrator, loadAccounts
+import i18n, argparse, signal
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument('accounts', type=str, help='YAML file with the accounts')
+parser.add_argument('-c', '--concurrency', help="Number of accounts that are processed at the same time.", type=int, default=4, required=False, dest="concurrency")
+parser.add_argument('-r', '--rate', help="Maximum number of requests per second of all accounts together.", type=float, default=5.0, required=False, dest="rate")
+parser.add_argument('-b', '--burst', help="Number of requests that may be sent at once before the rate applies.", type=int, default=None, required=False, dest="burst")
+parser.add_argument('-n', '--connections', help="Maximum number of connections per game server.", type=int, default=4, required=False, dest="connections")
+parser.add_argument('-l', '--log', help="If -l or --log Argument is passed, logging will be enabled.", action='store_true', default=False, required=False, dest="log")
+parser.add_argument('--refresh-products', help="If --refresh-products Argument is passed, the cached product catalogues are downloaded again.", action='store_true', default=False, required=False, dest="refreshProducts")
+parser.add_argument('-d', '--daemon', help="If -d or --daemon Argument is passed, the accounts stay logged in and every task runs when it is due.", action='store_true', default=False, required=False, dest="daemon")
+parser.add_argument('-k', '--keep-session', help="If -k or --keep-session Argument is passed, the sessions stay open and are reused by the next run within their lifetime.", action='store_true', default=False, required=False, dest="keepSession")
+parser.add_argument('-u', '--base-url', help="Send all requests to this address instead of the game servers, e.g. a local replay server.", type=str, default=None, required=False, dest="baseURL")
+parser.add_argument('lang', help="Language of the bot messages", type=str, nargs='?', default='en')
+args = parser.parse_args()
+
+i18n.load_path.append('lang')
+i18n.set('locale', args.lang)
+i18n.set('fallback', 'en')
+
+if args.log:
+    logger.logger()
+
+orchestrator = Orchestrator(loadAccounts(args.accounts), args.concurrency, args.rate, args.burst,
+                            args.connections, args.baseURL, args.refreshProducts, persistSessions=args.keepSession)
+
+if args.daemon:
+    signal.signal(signal.SIGINT, lambda signum, frame: orchestrator.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: orchestrator.stop())
+    try:
+        failed = orchestrator.runDaemon()
+    finally:
+        orchestrator.close()
+    for account in failed:
+        print(f'{account.user.ljust(20)} server {account.server:3d}  login failed')
+    exit(-1 if failed else 0)
+
+try:
+    results = orchestrator.run()
+finally:
+    orchestrator.close()
+
+print()
+for result in results:
+    state = 'ok' if result.success else f'failed ({result.error})'
+    print(f'{result.account.user.ljust(20)} server {result.account.server:3d} {result.duration:8.1f} s  {state}')
+
+statistics = orchestrator.getStatistics()
+print(f"Connections: {statistics['pool']['hits']} reused, {statistics['pool']['misses']} opened, "
+      f"{statistics['pool']['waits']} waits")
+print(f"Requests: {statistics['rateLimiter']['requests']}, {statistics['rateLimiter']['waits']} delayed "
+      f"by {statistics['rateLimiter']['waitTime']:.1f} s in total")
+
+if not all(result.success for result in results):
+    exit(-1)
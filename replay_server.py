@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Startet einen lokalen ReplayServer, gegen den der Bot ohne Spielkonto laufen kann, z.B.:
+    python replay_server.py --gardens 3 --aqua --latency 0.05
+    python automated_script.py 1 user pass de --base-url http://127.0.0.1:8080/
+"""
+
+from src.ReplayServer import ReplayServer
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--host', type=str, default='127.0.0.1', help='address to listen on')
+parser.add_argument('--port', type=int, default=8080, help='port to listen on')
+parser.add_argument('--latency', type=float, default=0.0, help='delay of every response in seconds')
+parser.add_argument('--gardens', type=int, default=1, help='number of gardens of the account')
+parser.add_argument('--aqua', help="If --aqua Argument is passed, the account has a water garden.", action='store_true', default=False, dest="aquaGarden")
+parser.add_argument('--honey', help="If --honey Argument is passed, the account has a honey farm.", action='store_true', default=False, dest="honeyFarm")
+parser.add_argument('--bonsai', help="If --bonsai Argument is passed, the account has a bonsai farm.", action='store_true', default=False, dest="bonsaiFarm")
+parser.add_argument('--seed', type=int, default=0, help='seed for the generated gardens')
+parser.add_argument('--fixtures', type=str, default='fixtures', help='directory of the recorded responses')
+parser.add_argument('-v', '--verbose', help="If -v or --verbose Argument is passed, every request is logged.", action='store_true', default=False, dest="verbose")
+args = parser.parse_args()
+
+server = ReplayServer(args.host, args.port, args.latency, args.fixtures, args.verbose,
+                      gardens=args.gardens, aquaGarden=args.aquaGarden, honeyFarm=args.honeyFarm,
+                      bonsaiFarm=args.bonsaiFarm, seed=args.seed)
+print(f'Replay server listening on {server.getBaseURL()}')
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    server.server_close()
+    for endpoint, stats in server.getRequestStats().items():
+        print(f"{endpoint.ljust(50)} {stats['requests']:6d} requests {stats['bytesSent']:10d} bytes")
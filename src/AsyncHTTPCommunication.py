@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio, functools
+from concurrent.futures import ThreadPoolExecutor
+from src.HTTPCommunication import HTTPConnection
+
+# Methoden, die den serverseitig ausgewählten Garten lesen oder verändern.
+# Sie dürfen sich nicht überlappen, da sonst eine Anfrage im falschen Garten landet.
+# Dazu zählen auch Aktionen, die den Zwischenspeicher der Gärten neu laden oder verwerfen.
+GARDEN_STATE_METHODS = frozenset([
+    '_changeGarden',
+    'prefetchGardens',
+    'invalidateGardenCache',
+    'getEmptyFieldsOfGarden',
+    'getWeedFieldsOfGarden',
+    'getGrowingPlantsOfGarden',
+    'getPlantsToWaterInGarden',
+    'getNextWaterHarvestOfGarden',
+    'getEmptyFieldsAqua',
+    'getPlantsToWaterInAquaGarden',
+    'harvestGarden',
+    'harvestAquaGarden',
+    'waterPlantInGarden',
+    'waterPlantsInGarden',
+    'waterPlantInAquaGarden',
+    'waterPlantsInAquaGarden',
+    'growPlant',
+    'growPlants',
+    'growAquaPlant',
+    'growAquaPlants',
+    'getWimpsData',
+    'sellWimpProducts',
+    'declineWimp',
+    'removeWeedOnFieldInGarden',
+    'removeWeedOnFieldInAquaGarden',
+    'logIn',
+    'logInPortal',
+    'logOut',
+])
+
+class AsyncHTTPConnection(object):
+    """
+    Async-Variante von HTTPConnection mit denselben Methoden, die hier jedoch awaitable sind.
+    Die Anfragen laufen in einem Thread-Pool, wodurch sich unabhängige Anfragen
+    (z.B. Statistik, Lager, Bienen- und Bonsaifarm) zeitlich überlappen.
+    """
+
+    def __init__(self, httpConnection: HTTPConnection = None, maxWorkers=8):
+        self.__httpConn = httpConnection if httpConnection is not None else HTTPConnection()
+        self.__executor = ThreadPoolExecutor(max_workers=maxWorkers)
+        self.__gardenLock = None
+
+    def __getattr__(self, name):
+        if name.startswith('_AsyncHTTPConnection__'):
+            raise AttributeError(name)
+
+        method = getattr(self.__httpConn, name)
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def awaitable(*args, **kwargs):
+            if name in GARDEN_STATE_METHODS:
+                async with self.__getGardenLock():
+                    return await self.__run(method, *args, **kwargs)
+            return await self.__run(method, *args, **kwargs)
+
+        return awaitable
+
+    def __getGardenLock(self):
+        # Das Lock wird erst innerhalb einer laufenden Event-Loop angelegt
+        if self.__gardenLock is None:
+            self.__gardenLock = asyncio.Lock()
+        return self.__gardenLock
+
+    async def __run(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, functools.partial(method, *args, **kwargs))
+
+    async def run(self, function, *args, **kwargs):
+        """Führt eine beliebige blockierende Funktion im Thread-Pool der Verbindung aus."""
+        return await self.__run(function, *args, **kwargs)
+
+    def getHTTPConnection(self):
+        """Gibt die zugrunde liegende synchrone HTTPConnection zurück."""
+        return self.__httpConn
+
+    def close(self):
+        """Beendet den Thread-Pool."""
+        self.__executor.shutdown(wait=True)
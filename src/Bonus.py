@@ -5,10 +5,10 @@ class Bonus:
         self.__httpConn = httpConnection
         self.__spieler = spieler
 
-    def getDailyLoginBonus(self):
+    def getDailyLoginBonus(self, delay=3):
         bonus_data = self.__httpConn.readUserDataFromServer(data_type="dailyloginbonus")['dailyloginbonus']
         for day, bonus in bonus_data['data']['rewards'].items():
             if 'done' not in bonus:
                 if any(_ in bonus for _ in ('money', 'products')):
                     self.__httpConn.getDailyLoginBonus(day)
-                    time.sleep(3)
\ No newline at end of file
+                    time.sleep(delay)
\ No newline at end of file
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import httplib2, threading, time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+class ConnectionPool(object):
+    """
+    Gemeinsamer Pool von Webclients je Host, den mehrere HTTPConnection-Instanzen
+    (z.B. mehrere Accounts auf demselben Server) gleichzeitig nutzen können.
+
+    Jeder Webclient hält seine Keep-Alive-Verbindung zum Host offen und wird nach einer
+    Anfrage an den Pool zurückgegeben, sodass die nächste Anfrage, egal von welchem Account,
+    keinen neuen TCP- bzw. TLS-Aufbau benötigt. Ein Webclient wird immer nur von einem
+    Thread gleichzeitig verwendet. Session-Cookie und Token gibt jede HTTPConnection bei
+    jeder Anfrage selbst mit; die Webclients speichern weder Cookies noch Zugangsdaten.
+
+    Je Host sind höchstens maxPerHost Webclients gleichzeitig vorhanden. Sind alle in
+    Verwendung, wartet eine Anfrage bis zu timeout Sekunden auf einen freien.
+    """
+
+    def __init__(self, maxPerHost=4, timeout=30.0):
+        self.__maxPerHost = maxPerHost
+        self.__timeout = timeout
+        self.__condition = threading.Condition()
+        self.__idle = {}    # host -> Liste freier Webclients
+        self.__inUse = {}   # host -> Anzahl verwendeter Webclients
+        self.__hits = 0
+        self.__misses = 0
+        self.__waits = 0
+        self.__discarded = 0
+
+    def __createWebclient(self):
+        webclient = httplib2.Http(disable_ssl_certificate_validation=True)
+        webclient.follow_redirects = False
+        return webclient
+
+    def __closeWebclient(self, webclient):
+        for connection in list(webclient.connections.values()):
+            try:
+                connection.close()
+            except OSError:
+                pass
+        webclient.connections.clear()
+
+    def __getHost(self, uri):
+        url = urlsplit(uri)
+        return f'{url.scheme}://{url.netloc}'
+
+    def acquire(self, uri):
+        """
+        Gibt einen freien Webclient für den Host von uri zurück (Treffer) oder legt einen
+        neuen an (Fehlschlag), solange maxPerHost nicht erreicht ist.
+        """
+        host = self.__getHost(uri)
+        with self.__condition:
+            deadline = None if self.__timeout is None else time.monotonic() + self.__timeout
+            waited = False
+            while True:
+                idle = self.__idle.get(host)
+                if idle:
+                    self.__inUse[host] = self.__inUse.get(host, 0) + 1
+                    self.__hits += 1
+                    return idle.pop()
+                if self.__inUse.get(host, 0) < self.__maxPerHost:
+                    self.__inUse[host] = self.__inUse.get(host, 0) + 1
+                    self.__misses += 1
+                    break
+                if not waited:
+                    self.__waits += 1
+                    waited = True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise ConnectionPoolError(f'Kein freier Webclient für {host} innerhalb von {self.__timeout} s')
+                self.__condition.wait(remaining)
+        return self.__createWebclient()
+
+    def release(self, uri, webclient, discard=False):
+        """
+        Gibt einen Webclient an den Pool zurück. Mit discard (z.B. nach einem Verbindungsfehler)
+        wird er geschlossen und verworfen.
+        """
+        host = self.__getHost(uri)
+        with self.__condition:
+            self.__inUse[host] -= 1
+            if discard:
+                self.__discarded += 1
+            else:
+                self.__idle.setdefault(host, []).append(webclient)
+            self.__condition.notify()
+        if discard:
+            self.__closeWebclient(webclient)
+
+    @contextmanager
+    def webclient(self, uri):
+        """Stellt für die Dauer des with-Blocks einen Webclient für den Host von uri bereit."""
+        webclient = self.acquire(uri)
+        try:
+            yield webclient
+        except:
+            self.release(uri, webclient, discard=True)
+            raise
+        else:
+            self.release(uri, webclient)
+
+    def getStatistics(self):
+        """Gibt Treffer, Fehlschläge, Wartevorgänge, verworfene sowie freie und verwendete Webclients zurück."""
+        with self.__condition:
+            requests = self.__hits + self.__misses
+            return {'hits': self.__hits,
+                    'misses': self.__misses,
+                    'hitRate': self.__hits / requests if requests else 0.0,
+                    'waits': self.__waits,
+                    'discarded': self.__discarded,
+                    'idle': sum(len(idle) for idle in self.__idle.values()),
+                    'inUse': sum(self.__inUse.values())}
+
+    def close(self):
+        """Schließt alle freien Webclients."""
+        with self.__condition:
+            idle = [webclient for webclients in self.__idle.values() for webclient in webclients]
+            self.__idle = {}
+        for webclient in idle:
+            self.__closeWebclient(webclient)
+
+
+class ConnectionPoolError(Exception):
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return repr(self.value)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Belegung eines Gartens als Bitmaske. Bit (fieldID - 1) steht für das Feld fieldID.
+
+Die Felder eines Gartens sind zeilenweise von 1 bis 204 nummeriert (17 x 12).
+Eine Pflanze belegt ausgehend von ihrem Feld (x) weitere Felder (o):
++---+   +---+---+   +---+   +---+---+
+| x |   | x | o |   | x |   | x | o |
++---+   +---+---+   +---+   +---+---+
+                    | o |   | o | o |
+                    +---+   +---+---+
+"""
+
+LEN_X = 17
+LEN_Y = 12
+MAX_FIELDS = LEN_X * LEN_Y
+
+PLANT_SIZES = ((1, 1), (2, 1), (1, 2), (2, 2))
+
+def _buildFootprints():
+    """
+    Berechnet für jede Pflanzengröße und jedes Feld die belegten Felder und deren Bitmaske.
+    Ragt eine Pflanze über den Rand des Gartens hinaus, ist die Maske 0.
+    """
+    fields = {}
+    masks = {}
+    for sx, sy in PLANT_SIZES:
+        sizeFields = [()]
+        sizeMasks = [0]
+        for fieldID in range(1, MAX_FIELDS + 1):
+            x = (fieldID - 1) % LEN_X
+            y = (fieldID - 1) // LEN_X
+            footprint = tuple(fieldID + dx + dy * LEN_X for dy in range(sy) for dx in range(sx))
+            sizeFields.append(footprint)
+            if x + sx > LEN_X or y + sy > LEN_Y:
+                sizeMasks.append(0)
+            else:
+                mask = 0
+                for field in footprint:
+                    mask |= 1 << (field - 1)
+                sizeMasks.append(mask)
+        fields[(sx, sy)] = tuple(sizeFields)
+        masks[(sx, sy)] = tuple(sizeMasks)
+    return fields, masks
+
+FOOTPRINT_FIELDS, FOOTPRINT_MASKS = _buildFootprints()
+FOOTPRINT_STRINGS = {size: tuple(','.join(str(field) for field in fields) for fields in footprints)
+                     for size, footprints in FOOTPRINT_FIELDS.items()}
+
+def getFootprintMask(fieldID, sx, sy):
+    """Gibt die Bitmaske einer Pflanze der Größe (sx, sy) auf fieldID zurück (0, wenn sie nicht passt)."""
+    return FOOTPRINT_MASKS[(int(sx), int(sy))][fieldID]
+
+def getFootprintFields(fieldID, sx, sy):
+    """Gibt alle Felder einer Pflanze der Größe (sx, sy) auf fieldID als Tupel zurück."""
+    return FOOTPRINT_FIELDS[(int(sx), int(sy))][fieldID]
+
+def getFootprintFieldsAsString(fieldID, sx, sy):
+    """Gibt alle Felder einer Pflanze der Größe (sx, sy) auf fieldID kommagetrennt zurück."""
+    return FOOTPRINT_STRINGS[(int(sx), int(sy))][fieldID]
+
+
+class FieldBitmap(object):
+    """Freie Felder eines Gartens. Prüfen und Belegen einer Pflanze ist jeweils eine Bitoperation."""
+
+    __slots__ = ('_bits',)
+
+    def __init__(self, bits=0):
+        self._bits = bits
+
+    @classmethod
+    def fromFieldIDs(cls, fieldIDs):
+        """Erzeugt die Belegung aus einer Liste freier Felder."""
+        bits = 0
+        for fieldID in fieldIDs:
+            bits |= 1 << (int(fieldID) - 1)
+        return cls(bits)
+
+    def copy(self):
+        return FieldBitmap(self._bits)
+
+    def isFree(self, fieldID):
+        return self._bits >> (fieldID - 1) & 1 == 1
+
+    def canPlace(self, fieldID, sx, sy):
+        """Prüft, ob eine Pflanze der Größe (sx, sy) auf fieldID vollständig auf freien Feldern liegt."""
+        mask = FOOTPRINT_MASKS[(sx, sy)][fieldID]
+        return mask != 0 and self._bits & mask == mask
+
+    def occupy(self, fieldID, sx, sy):
+        """Markiert alle Felder einer Pflanze der Größe (sx, sy) auf fieldID als belegt."""
+        self._bits &= ~FOOTPRINT_MASKS[(sx, sy)][fieldID]
+
+    def release(self, fieldID, sx, sy):
+        """Markiert alle Felder einer Pflanze der Größe (sx, sy) auf fieldID als frei."""
+        self._bits |= FOOTPRINT_MASKS[(sx, sy)][fieldID]
+
+    def getFieldIDs(self):
+        """Gibt alle freien Felder aufsteigend sortiert zurück."""
+        fieldIDs = []
+        bits = self._bits
+        while bits:
+            lowest = bits & -bits
+            fieldIDs.append(lowest.bit_length())
+            bits ^= lowest
+        return fieldIDs
+
+    def __len__(self):
+        return self._bits.bit_count()
+
+    def __bool__(self):
+        return self._bits != 0
+
+    def __int__(self):
+        return self._bits
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import namedtuple
+from src.FieldBitmap import FieldBitmap, PLANT_SIZES
+from src.Produktdaten import ProductData
+
+OBJECTIVE_FIELDS = 'fields'
+OBJECTIVE_VALUE = 'value'
+
+Placement = namedtuple('Placement', 'gardenID productID fieldID sx sy')
+
+class GardenPlanner(object):
+    """
+    Erstellt einen Anbauplan für mehrere Produkte über alle Gärten hinweg.
+
+    Heuristik (first fit decreasing): Große Pflanzen werden zuerst von Feld 1 aufwärts
+    gesetzt, kleinere füllen danach die verbleibenden Lücken. Garantiert ist nur, dass der
+    Plan nicht erweiterbar ist: Bleibt von einer Pflanze Bestand übrig, passt sie auf kein
+    freies Feld mehr. Freie Felder, auf die keine der vorrätigen Pflanzen passt, können
+    bleiben, und eine andere Anordnung könnte mehr Felder belegen.
+    - OBJECTIVE_FIELDS: möglichst viele Felder belegen, bei gleicher Größe zuerst
+      das Produkt mit dem geringsten Lagerbestand
+    - OBJECTIVE_VALUE: möglichst hoher NPC-Wert der Ernte pro Stunde und Feld
+
+    Bevorzugte Gärten eines Produkts werden für dieses zuerst belegt, Gärten mit anderen
+    bevorzugten Pflanzen zuletzt; die Anzahl belegter Felder ändert sich dadurch nicht.
+    """
+
+    def __init__(self, productData: ProductData, objective=OBJECTIVE_FIELDS):
+        if objective not in (OBJECTIVE_FIELDS, OBJECTIVE_VALUE):
+            raise ValueError(f'Unknown objective: {objective}')
+        self.__productData = productData
+        self.__objective = objective
+
+    def __getValuePerHourAndField(self, product):
+        """Erwarteter NPC-Wert der Ernte pro Stunde und belegtem Feld."""
+        price = product.getPriceNPC() or 0.0
+        crop = product.getCrop() or 0
+        hours = (product.getTimeUntilHarvest() or 0) / 3600
+        if hours <= 0:
+            return 0.0
+        return crop * price / hours / (product.getSX() * product.getSY())
+
+    def __getCandidates(self, stock):
+        """Gibt alle anbaubaren Produkte mit Bestand in der Reihenfolge zurück, in der sie gesetzt werden."""
+        candidates = []
+        for productID, amount in stock.items():
+            if amount <= 0:
+                continue
+            if not self.__productData.isPlantableProduct(productID):
+                continue
+            product = self.__productData.getProductByID(productID)
+            if (product.getSX(), product.getSY()) not in PLANT_SIZES:
+                continue
+            candidates.append(product)
+
+        if self.__objective == OBJECTIVE_VALUE:
+            # Wert pro Feld zuerst; bei gleichem Wert die größere Pflanze, damit
+            # kleine Pflanzen die Lücken füllen
+            key = lambda p: (-self.__getValuePerHourAndField(p), -(p.getSX() * p.getSY()), stock[p.getID()])
+        else:
+            key = lambda p: (-(p.getSX() * p.getSY()), stock[p.getID()])
+        return sorted(candidates, key=key)
+
+    def __getGardenOrder(self, productID, gardenIDs, preferredGardens, reservedGardens):
+        """Gibt die Gärten in der Reihenfolge zurück, in der sie für ein Produkt belegt werden."""
+        preferred = preferredGardens.get(productID, ())
+        return sorted(gardenIDs, key=lambda gardenID: 0 if gardenID in preferred else 2 if gardenID in reservedGardens else 1)
+
+    def plan(self, freeFieldsByGarden, stock, preferredGardens=None):
+        """
+        Erstellt den Anbauplan.
+        @param freeFieldsByGarden: dict gardenID -> FieldBitmap der freien Felder; wird nicht verändert
+        @param stock: dict productID -> Lagerbestand
+        @param preferredGardens: optional dict productID -> gardenIDs, in denen das Produkt bevorzugt angebaut wird
+        @return: Liste von Placement
+        """
+        stock = {int(productID): int(amount) for productID, amount in stock.items()}
+        freeFields = {gardenID: bitmap.copy() for gardenID, bitmap in freeFieldsByGarden.items()}
+        preferredGardens = {int(productID): gardenIDs for productID, gardenIDs in (preferredGardens or {}).items()}
+        reservedGardens = {gardenID for gardenIDs in preferredGardens.values() for gardenID in gardenIDs}
+        placements = []
+
+        for product in self.__getCandidates(stock):
+            productID = product.getID()
+            sx, sy = product.getSX(), product.getSY()
+            remaining = stock[productID]
+
+            for gardenID in self.__getGardenOrder(productID, freeFields, preferredGardens, reservedGardens):
+                bitmap = freeFields[gardenID]
+                if remaining == 0:
+                    break
+                if len(bitmap) < sx * sy:
+                    continue
+
+                for fieldID in bitmap.getFieldIDs():
+                    if remaining == 0:
+                        break
+                    if not bitmap.canPlace(fieldID, sx, sy):
+                        continue
+                    bitmap.occupy(fieldID, sx, sy)
+                    placements.append(Placement(gardenID, productID, fieldID, sx, sy))
+                    remaining -= 1
+
+            stock[productID] = remaining
+
+        return placements
+
+    def getFilledFields(self, placements):
+        """Gibt die Anzahl der durch den Plan belegten Felder zurück."""
+        return sum(placement.sx * placement.sy for placement in placements)
+
+    def getValuePerHour(self, placements):
+        """Gibt den erwarteten NPC-Wert der Ernte pro Stunde für den Plan zurück."""
+        value = 0.0
+        for placement in placements:
+            product = self.__productData.getProductByID(placement.productID)
+            value += self.__getValuePerHourAndField(product) * placement.sx * placement.sy
+        return value
@@ -1,98 +1,111 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from collections import Counter, namedtuple
+from collections import Counter
+from src.HTTPCommunication import WATER_CHUNK_SIZE, GROW_CHUNK_SIZE
+from src.FieldBitmap import FieldBitmap, LEN_X, LEN_Y, MAX_FIELDS, getFootprintFields, getFootprintFieldsAsString
 import logging, i18n
 
 i18n.load_path.append('lang')
 
 class Garden():
-    _LEN_X = 17
-    _LEN_Y = 12
-    _MAX_FIELDS = _LEN_X * _LEN_Y
+    _LEN_X = LEN_X
+    _LEN_Y = LEN_Y
+    _MAX_FIELDS = MAX_FIELDS
     
     def __init__(self, httpConnection, gardenID):
         self._httpConn = httpConnection
         self._id = gardenID
         self._logGarden = logging.getLogger('bot.Garden_' + str(gardenID))
         self._logGarden.setLevel(logging.DEBUG)
+        # Lokal geführte Belegung der freien Felder (FieldBitmap).
+        # None bedeutet, dass die Belegung beim nächsten Zugriff vom Server geladen wird.
+        self._freeFields = None
 
     def _getAllFieldIDsFromFieldIDAndSizeAsString(self, fieldID, sx, sy):
         """
         Rechnet anhand der fieldID und Größe der Pflanze (sx, sy) alle IDs aus und gibt diese als String zurück.
+        Wichtig beim Gießen, dort müssen alle Felder der Pflanze angegeben werden.
         """
-        
-        # Field indices (x) returned for plants of size 1, 2, and 4 fields.
-        # Important when watering; all indices must be specified there.
-        # (Both those marked with x and those marked with o).
-        # x: fieldID
-        # o: added fields based on the size
-        # +---+   +---+---+   +---+---+
-        # | x |   | x | o |   | x | o |
-        # +---+   +---+---+   +---+---+
-        #                     | o | o |
-        #                     +---+---+
-        
-        if (sx == 1 and sy == 1): return str(fieldID)
-        if (sx == 2 and sy == 1): return str(fieldID) + ',' + str(fieldID + 1)
-        if (sx == 1 and sy == 2): return str(fieldID) + ',' + str(fieldID + 17)
-        if (sx == 2 and sy == 2): return str(fieldID) + ',' + str(fieldID + 1) + ',' + str(fieldID + 17) + ',' + str(fieldID + 18)
-        self._logGarden.debug(f'Error der plantSize --> sx: {sx} sy: {sy}')
+        try:
+            return getFootprintFieldsAsString(fieldID, sx, sy)
+        except (KeyError, ValueError):
+            self._logGarden.debug(f'Error der plantSize --> sx: {sx} sy: {sy}')
 
     def _getAllFieldIDsFromFieldIDAndSizeAsIntList(self, fieldID, sx, sy):
         """
         Calculates all IDs based on the fieldID and size of the plant (sx, sy) and returns them as an integer list.
         """
-        sFields = self._getAllFieldIDsFromFieldIDAndSizeAsString(fieldID, sx, sy)
-        listFields = sFields.split(',') #Stringarray
-                        
-        for i in range(0, len(listFields)):
-            listFields[i] = int(listFields[i])
-            
-        return listFields
+        return list(getFootprintFields(fieldID, sx, sy))
     
-    def _isPlantGrowableOnField(self, fieldID, emptyFields, fieldsToPlant, sx):
-        """Prüft anhand mehrerer Kriterien, ob ein Anpflanzen möglich ist."""
-        # Betrachtetes Feld darf nicht besetzt sein
-        if not (fieldID in emptyFields): return False
-        
-        # Anpflanzen darf nicht außerhalb des Gartens erfolgen
-        # Dabei reicht die Betrachtung in x-Richtung, da hier ein
-        # "Zeilenumbruch" stattfindet. Die y-Richtung ist durch die
-        # Abfrage abgedeckt, ob alle benötigten Felder frei sind.
-        # Felder außerhalb (in y-Richtung) des Gartens sind nicht leer,
-        # da sie nicht existieren.
-        if not ((self._MAX_FIELDS - fieldID)%self._LEN_X >= sx - 1): return False
-        fieldsToPlantSet = set(fieldsToPlant)
-        emptyFieldsSet = set(emptyFields)
-        
-        # Alle benötigten Felder der Pflanze müssen leer sein
-        if not (fieldsToPlantSet.issubset(emptyFieldsSet)): return False
-        return True
+    def _isPlantGrowableOnField(self, fieldID, freeFields: FieldBitmap, sx, sy):
+        """
+        Prüft, ob die Pflanze auf fieldID innerhalb des Gartens und vollständig auf freien Feldern liegt.
+        """
+        return freeFields.canPlace(fieldID, sx, sy)
+
+    def _getFreeFields(self) -> FieldBitmap:
+        """Gibt die lokal geführte Belegung zurück und lädt sie bei Bedarf vom Server."""
+        if self._freeFields is None:
+            self._freeFields = FieldBitmap.fromFieldIDs(self._loadEmptyFields())
+        return self._freeFields
+
+    def resetFreeFields(self):
+        """Verwirft die lokal geführte Belegung, z.B. nach Änderungen außerhalb des Bots."""
+        self._freeFields = None
+
+    def _loadEmptyFields(self):
+        return self._httpConn.getEmptyFieldsOfGarden(self._id)
+
+    def _growPlacements(self, plantID, sx, sy, placements, chunkSize):
+        fields = [self._getAllFieldIDsFromFieldIDAndSizeAsString(field, sx, sy) for field in placements]
+        return self._httpConn.growPlants(self._id, plantID, list(zip(placements, fields)), chunkSize)
+
+    def _planPlacements(self, freeFields: FieldBitmap, sx, sy, amount):
+        """
+        Ermittelt von Feld 1 aufwärts bis zu amount Felder, auf denen eine Pflanze der Größe
+        (sx, sy) Platz hat, und belegt diese in freeFields.
+        """
+        placements = []
+        for field in range(1, self._MAX_FIELDS + 1):
+            if len(placements) == amount: break
+            if not self._isPlantGrowableOnField(field, freeFields, sx, sy): continue
+            placements.append(field)
+            freeFields.occupy(field, sx, sy)
+        return placements
 
     def getID(self):
         """Returns the ID of garden."""
         return self._id
 
-    def waterPlants(self):
-        """Ein Garten mit der gardenID wird komplett bewässert."""
+    def waterPlants(self, chunkSize=WATER_CHUNK_SIZE):
+        """
+        Ein Garten mit der gardenID wird komplett bewässert.
+        Es werden bis zu chunkSize Pflanzen mit einer Anfrage gegossen.
+        """
         self._logGarden.info(f'Gieße alle Pflanzen im Garten {self._id}.')
         try:
             plants = self._httpConn.getPlantsToWaterInGarden(self._id)
             nPlants = len(plants['fieldID'])
+            plantsToWater = []
             for i in range(0, nPlants):
                 sFields = self._getAllFieldIDsFromFieldIDAndSizeAsString(plants['fieldID'][i], plants['sx'][i], plants['sy'][i])
-                self._httpConn.waterPlantInGarden(self._id, plants['fieldID'][i], sFields)
+                plantsToWater.append((plants['fieldID'][i], sFields))
+            watered = self._httpConn.waterPlantsInGarden(self._id, plantsToWater, chunkSize)
         except:
             self._logGarden.error(f'Garten {self._id} konnte nicht bewässert werden.')
         else:
-            self._logGarden.info(f'Im Garten {self._id} wurden {nPlants} Pflanzen gegossen.')
-            print(f'Im Garten {self._id} wurden {nPlants} Pflanzen gegossen.')
+            self._logGarden.info(f'Im Garten {self._id} wurden {len(watered)} Pflanzen gegossen.')
+            print(f'Im Garten {self._id} wurden {len(watered)} Pflanzen gegossen.')
+            notWatered = set(plants['fieldID']) - set(watered)
+            if notWatered:
+                self._logGarden.error(f'Im Garten {self._id} konnten die Felder {sorted(notWatered)} nicht gegossen werden.')
+            return watered
 
     def getEmptyFields(self):
         """Returns all empty fields in the garden."""
         try:
-            return self._httpConn.getEmptyFieldsOfGarden(self._id)
+            return self._getFreeFields().getFieldIDs()
         except:
             self._logGarden.error(f'Konnte leere Felder von Garten {self._id} nicht ermitteln.')
 
@@ -111,53 +124,60 @@ class Garden():
             self._logGarden.error('Could not determine growing plants of garden ' + str(self._id) + '.')
 
     def getNextWaterHarvest(self):
-        """Returns all growing plants in the garden."""
-        overall_time = []
-        Fields_data = namedtuple("Fields_data", "plant water harvest")
-        max_water_time = 86400
+        """Returns the next time a plant in the garden has to be watered or harvested."""
         try:
-            garden = self._httpConn._changeGarden(self._id).get('garden')
-            for field in garden.values():
-                if field[0] in [41, 42, 43, 45]:
-                    continue
-                fields_time = Fields_data(field[10], field[4], field[3])
-                if fields_time.harvest - fields_time.water > max_water_time:
-                    overall_time.append(fields_time.water + max_water_time)
-                overall_time.append(fields_time.harvest)
-            return min(overall_time)
+            return self._httpConn.getNextWaterHarvestOfGarden(self._id)
         except:
             self._logGarden.error('Could not determine growing plants of garden ' + str(self._id) + '.')
 
     def harvest(self):
         """Harvest everything"""
+        self._freeFields = None
         try:
             self._httpConn.harvestGarden(self._id)
         except:
             raise
 
-    def growPlant(self, plantID, sx, sy, amount):
-        """Grows a plant of any size."""
+    def getFreeFields(self) -> FieldBitmap:
+        """Returns a copy of the free fields of the garden as FieldBitmap."""
+        try:
+            return self._getFreeFields().copy()
+        except:
+            self._logGarden.error(f'Konnte leere Felder von Garten {self._id} nicht ermitteln.')
+
+    def growPlant(self, plantID, sx, sy, amount, chunkSize=GROW_CHUNK_SIZE, fieldIDs=None):
+        """
+        Grows a plant of any size.
+        All placements are planned first and then sent with as few requests as possible.
+        If fieldIDs is given, the plant is grown exactly on these fields (e.g. from GardenPlanner).
+        """
         planted = 0
-        emptyFields = self.getEmptyFields()
         
         try:
-            for field in range(1, self._MAX_FIELDS + 1):
-                if planted == amount: break
-
-                fieldsToPlant = self._getAllFieldIDsFromFieldIDAndSizeAsIntList(field, sx, sy)
-                
-                if (self._isPlantGrowableOnField(field, emptyFields, fieldsToPlant, sx)):
-                    fields = self._getAllFieldIDsFromFieldIDAndSizeAsString(field, sx, sy)
-                    self._httpConn.growPlant(field, plantID, self._id, fields)
+            sx, sy = int(sx), int(sy)
+            freeFields = self._getFreeFields().copy()
+            if fieldIDs is None:
+                placements = self._planPlacements(freeFields, sx, sy, amount)
+            else:
+                # Jede Platzierung wird sofort belegt, damit sich überlappende nicht beide gesendet werden
+                placements = []
+                for field in fieldIDs:
+                    if not self._isPlantGrowableOnField(field, freeFields, sx, sy):
+                        continue
+                    placements.append(field)
+                    freeFields.occupy(field, sx, sy)
+            results = self._growPlacements(plantID, sx, sy, placements, chunkSize)
+
+            for field, success in zip(placements, results):
+                if success:
                     planted += 1
-
-                    #Nach dem Anbau belegte Felder aus der Liste der leeren Felder loeschen
-                    fieldsToPlantSet = set(fieldsToPlant)
-                    emptyFieldsSet = set(emptyFields)
-                    tmpSet = emptyFieldsSet - fieldsToPlantSet
-                    emptyFields = list(tmpSet)
+                else:
+                    # Fehlgeschlagene Platzierungen wieder als frei markieren
+                    freeFields.release(field, sx, sy)
+            self._freeFields = freeFields
 
         except:
+            self._freeFields = None
             self._logGarden.error(f'Im Garten {self._id} konnte nicht gepflanzt werden.')
             return 0
         else:
@@ -165,7 +185,7 @@ class Garden():
             self._logGarden.info(msg)
             print(msg)
 
-            if emptyFields: 
+            if freeFields:
                 msg = f'Im Garten {self._id} sind noch leere Felder vorhanden.'
 
             return planted
@@ -176,6 +196,7 @@ class Garden():
         """
         weedFields = self.getWeedFields()
         freeFields = []
+        self._freeFields = None
         for fieldID in weedFields:
             try:
                 result = self._httpConn.removeWeedOnFieldInGarden(self._id, fieldID)
@@ -193,13 +214,15 @@ class Garden():
 
 class AquaGarden(Garden):
 
-    _lenX = 17
-    _lenY = 12
-    _nMaxFields = _lenX * _lenY
-
     def __init__(self, httpConnection):
         Garden.__init__(self, httpConnection, 101)
 
+    def _loadEmptyFields(self):
+        return self._httpConn.getEmptyFieldsAqua()
+
+    def _growPlacements(self, plantID, sx, sy, placements, chunkSize):
+        return self._httpConn.growAquaPlants(plantID, placements, chunkSize)
+
     def getEmptyAquaFields(self):
         """
         Gibt alle leeren Felder des Gartens zurück.
@@ -211,7 +234,7 @@ class AquaGarden(Garden):
         else:
             return tmpEmptyAquaFields
 
-    def waterPlants(self):
+    def waterPlants(self, chunkSize=WATER_CHUNK_SIZE):
         """
         Alle Pflanzen im Wassergarten werden bewässert.
         """
@@ -219,19 +242,22 @@ class AquaGarden(Garden):
             plants = self._httpConn.getPlantsToWaterInAquaGarden()
             nPlants = len(plants['fieldID'])
             print(f'nPlants:  {nPlants}')
+            listFieldsToWater = []
             for i in range(0, nPlants):
                 sFields = self._getAllFieldIDsFromFieldIDAndSizeAsString(plants['fieldID'][i], plants['sx'][i],
                                                                          plants['sy'][i])
-                self._httpConn.waterPlantInAquaGarden(sFields)
+                listFieldsToWater.append(sFields)
+            watered = self._httpConn.waterPlantsInAquaGarden(listFieldsToWater, chunkSize)
         except:
             self._logGarden.error('Wassergarten konnte nicht bewässert werden.')
         else:
-            self._logGarden.info(f'Im Wassergarten wurden {nPlants} Pflanzen gegossen.')
+            self._logGarden.info(f'Im Wassergarten wurden {watered} Pflanzen gegossen.')
 
     def harvest(self):
         """
         Erntet alles im Wassergarten.
         """
+        self._freeFields = None
         try:
             self._httpConn.harvestAquaGarden()
         except:
@@ -239,26 +265,24 @@ class AquaGarden(Garden):
         else:
             pass
 
-    def growPlant(self, plantID, sx, sy, amount):
+    def growPlant(self, plantID, sx, sy, amount, chunkSize=GROW_CHUNK_SIZE):
         planted = 0
-        emptyFields = self.getEmptyAquaFields()
         try:
-            for field in range(1, self._nMaxFields + 1):
-                if planted == amount: break
-
-                fieldsToPlant = self._getAllFieldIDsFromFieldIDAndSizeAsIntList(field, sx, sy)
+            sx, sy = int(sx), int(sy)
+            freeFields = self._getFreeFields().copy()
+            placements = self._planPlacements(freeFields, sx, sy, amount)
+            results = self._growPlacements(plantID, sx, sy, placements, chunkSize)
 
-                if (self._isPlantGrowableOnField(field, emptyFields, fieldsToPlant, sx)):
-                    self._httpConn.growAquaPlant(field, plantID)
+            for field, success in zip(placements, results):
+                if success:
                     planted += 1
-
-                    # Nach dem Anbau belegte Felder aus der Liste der leeren Felder loeschen
-                    fieldsToPlantSet = set(fieldsToPlant)
-                    emptyFieldsSet = set(emptyFields)
-                    tmpSet = emptyFieldsSet - fieldsToPlantSet
-                    emptyFields = list(tmpSet)
+                else:
+                    # Fehlgeschlagene Platzierungen wieder als frei markieren
+                    freeFields.release(field, sx, sy)
+            self._freeFields = freeFields
 
         except:
+            self._freeFields = None
             self._logGarden.error(f'Im Wassergarten konnte nicht gepflanzt werden.')
             return 0
         else:
@@ -266,7 +290,7 @@ class AquaGarden(Garden):
             self._logGarden.info(msg)
             print(msg)
 
-            if emptyFields:
+            if freeFields:
                 msg = f'Im Wassergarten sind noch leere Felder vorhanden.'
 
             return planted
@@ -277,6 +301,7 @@ class AquaGarden(Garden):
         """
         weedFieldsAqua = self.getWeedFields()
         freeFields = []
+        self._freeFields = None
         for fieldID in weedFieldsAqua:
             try:
                 result = self._httpConn.removeWeedOnFieldInAquaGarden(self._id, fieldID)
@@ -7,9 +7,14 @@ Created on 21.03.2017
 '''
 
 from urllib.parse import urlencode
-import json, re, httplib2, yaml, time, logging, math, io, i18n
+import json, re, httplib2, yaml, time, logging, math, i18n, threading, os
+from concurrent.futures import ThreadPoolExecutor
 from http.cookies import SimpleCookie
 from src.Session import Session
+from src.Instrumentation import Instrumentation, RequestEvent, getEndpoint
+from src.ConnectionPool import ConnectionPool
+from src.RateLimiter import RateLimiter
+from src.StatsParser import parseStats, STATS_INFO
 import xml.etree.ElementTree as eTree
 from lxml import html, etree
 
@@ -19,6 +24,23 @@ i18n.load_path.append('lang')
 HTTP_STATE_OK = 200
 HTTP_STATE_FOUND = 302 # moved temporarily
 
+# Schlüssel des Wassergartens im Zwischenspeicher der Gärten
+AQUA_GARDEN_KEY = 'aqua'
+
+# Gültigkeitsdauer der zwischengespeicherten Statistik in Sekunden, getrennt für Werte,
+# die sich während einer Session praktisch nicht ändern, und alle übrigen
+STATS_STATIC = frozenset({'Username', 'Gardens'})
+STATS_STATIC_TTL = 60 * 60
+STATS_TTL = 5 * 60
+
+# Ablage und Version des Formats gespeicherter Sessions (siehe saveSession)
+SESSION_CACHE_DIR = 'cache'
+SESSION_FILE_VERSION = 1
+
+# Anzahl der Pflanzen, die mit einer Anfrage gegossen bzw. angepflanzt werden
+WATER_CHUNK_SIZE = 40
+GROW_CHUNK_SIZE = 40
+
 SERVER_URLS = {
     'de': '.wurzelimperium.de/',
     'en': '.molehillempire.com/',
@@ -29,35 +51,187 @@ SERVER_URLS = {
 class HTTPConnection(object):
     """Mit der Klasse HTTPConnection werden alle anfallenden HTTP-Verbindungen verarbeitet."""
 
-    def __init__(self):
-        self.__webclient = httplib2.Http(disable_ssl_certificate_validation=True)
-        self.__webclient.follow_redirects = False
+    def __init__(self, baseURL=None, instrumentation: Instrumentation = None, pool: ConnectionPool = None,
+                 rateLimiter: RateLimiter = None):
+        """
+        Mit baseURL (z.B. 'http://127.0.0.1:8080/') werden Login und alle Spielanfragen
+        an diese Adresse statt an die Spielserver gesendet, etwa an den ReplayServer.
+        Über instrumentation werden alle Anfragen und das Dekodieren der Antworten gemessen.
+        Mit pool teilen sich mehrere Verbindungen (Accounts) die Keep-Alive-Verbindungen zum Server.
+        Mit rateLimiter wird vor jeder Anfrage gewartet, bis das (ggf. gemeinsame) Budget sie zulässt.
+        """
+        self.__baseURL = None if baseURL is None else baseURL.rstrip('/') + '/'
+        self.__instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.__pool = pool
+        self.__rateLimiter = rateLimiter
+        self.__threadLocal = threading.local()
+        self.__threadLocal.webclient = self.__createWebclient()
         self.__userAgent = 'Mozilla/5.0 (Windows NT 6.1; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/71.0.3578.98 Safari/537.36 Vivaldi/2.2.1388.37'
         self.__logHTTPConn = logging.getLogger('bot.HTTPConn')
         self.__logHTTPConn.setLevel(logging.DEBUG)
         self.__Session = Session()
         self.__token = None
+        # True, sobald der Token aus der Gartenseite (ajax.setToken) stammt und nicht aus der Login-URL
+        self.__ajaxToken = False
         self.__userID = None
         self.__cookie = None
         self.__unr = None
         self.__portunr = None
+        self.__gardenCache = {}
+        self.__currentGardenID = None
+        self.__stats = None
+        self.__statsTime = 0.0
+        self.__statsStale = False
+        self.__statsLock = threading.Lock()
+        self.__loginDaten = None
+        self.__portalLogin = False
+        self.__sessionFile = None
+        self.__previousTokens = set()
+        self.__sessionGeneration = 0
+        self.__renewLock = threading.Lock()
 
 
     def __del__(self):
+        self.__gardenCache = {}
+        self.__currentGardenID = None
+        self.__stats = None
         self.__Session = None
         self.__token = None
         self.__userID = None
         self.__unr = None
         self.__portunr = None
+        self.__loginDaten = None
+
+    def __createWebclient(self):
+        webclient = httplib2.Http(disable_ssl_certificate_validation=True)
+        webclient.follow_redirects = False
+        return webclient
+
+    def __getWebclient(self):
+        """
+        Gibt den Webclient des aktuellen Threads zurück. httplib2.Http ist nicht threadsicher,
+        daher erhält jeder Thread eines Worker-Pools einen eigenen.
+        """
+        webclient = getattr(self.__threadLocal, 'webclient', None)
+        if webclient is None:
+            webclient = self.__createWebclient()
+            self.__threadLocal.webclient = webclient
+        return webclient
+
+    def __sendRequest(self, address: str, method: str = 'GET', body = None, headers: dict = {}, renew=True):
+        """
+        Sendet eine Anfrage an den Spielserver. Mit renew wird die Session vorher erneuert, wenn sie
+        (abzüglich Reserve) abgelaufen ist, und die Anfrage nach einem erneuten Login einmal wiederholt,
+        wenn der Server sie wegen einer abgelaufenen Session umleitet.
+        """
+        renew = renew and self.__canRenewSession()
+        if renew and not self.__Session.isSessionValid():
+            self.__renewSession(self.__sessionGeneration)
 
-    def __sendRequest(self, address: str, method: str = 'GET', body = None, headers: dict = {}):
-        uri = self.__getServer() + address
-        headers = {**self.__getHeaders(), **headers}
+        generation = self.__sessionGeneration
+        address, body = self.__replacePreviousTokens(address), self.__replacePreviousTokens(body)
         try:
-            return self.__webclient.request(uri, method, body, headers)
+            response, content = self.__request(self.__getServer() + address, method, body,
+                                               {**self.__getHeaders(), **headers})
+            if not renew or response.status != HTTP_STATE_FOUND:
+                return response, content
+
+            # Der Server leitet bei einer ungültigen Session auf die Startseite um
+            self.__logHTTPConn.info(f'Session abgelaufen bei {getEndpoint(address)}, erneuter Login')
+            self.__renewSession(generation)
+            address, body = self.__replacePreviousTokens(address), self.__replacePreviousTokens(body)
+            # Nach dem Login ist serverseitig kein Garten ausgewählt
+            gardenID = re.search(r'[?&]garden=(\d+)', address)
+            if gardenID is not None and 'do=changeGarden' not in address:
+                self._changeGarden(int(gardenID.group(1)))
+            return self.__request(self.__getServer() + address, method, body, {**self.__getHeaders(), **headers})
         except:
             raise
 
+    def __canRenewSession(self):
+        return self.__loginDaten is not None and self.__Session is not None \
+               and not getattr(self.__threadLocal, 'noRenewal', False)
+
+    def __replacePreviousTokens(self, value):
+        """Ersetzt in einer vor der Erneuerung der Session erstellten Adresse den alten Token durch den aktuellen."""
+        if not isinstance(value, str) or not self.__previousTokens:
+            return value
+        for token in self.__previousTokens:
+            if token in value:
+                value = value.replace(token, self.__token)
+        return value
+
+    def __renewSession(self, generation):
+        """
+        Meldet den Account erneut an und lädt den Token neu. Haben andere Threads die Session
+        seit generation bereits erneuert, wird nur deren Ergebnis übernommen.
+        """
+        with self.__renewLock:
+            if self.__sessionGeneration != generation:
+                return
+            self.__threadLocal.noRenewal = True
+            try:
+                oldToken = self.__token
+                if self.__portalLogin:
+                    self.logInPortal(self.__loginDaten)
+                else:
+                    self.logIn(self.__loginDaten)
+                self.refreshToken()
+                if oldToken is not None and oldToken != self.__token:
+                    self.__previousTokens.add(oldToken)
+                self.__gardenCache.clear()
+                self.__currentGardenID = None
+                self.__sessionGeneration += 1
+                if self.__sessionFile is not None:
+                    self.saveSession(self.__sessionFile)
+            finally:
+                self.__threadLocal.noRenewal = False
+            self.__logHTTPConn.info('Session erneuert')
+
+    def renewSession(self):
+        """Erneuert die Session sofort, z.B. vor einer längeren Folge von Aktionen."""
+        self.__renewSession(self.__sessionGeneration)
+
+    def __request(self, uri, method='GET', body=None, headers=None):
+        """
+        Sendet eine Anfrage an uri. Alle Anfragen laufen hier durch und werden, sofern
+        Hooks registriert sind, mit Endpunkt, Status, Dauer und Größe an die Instrumentation gemeldet.
+        """
+        if self.__rateLimiter is not None:
+            self.__rateLimiter.acquire()
+
+        if not self.__instrumentation.isActive():
+            return self.__requestWithWebclient(uri, method, body, headers)
+
+        endpoint = getEndpoint(uri)
+        self.__threadLocal.endpoint = endpoint
+        status = 'error'
+        content = b''
+        start = time.perf_counter()
+        try:
+            response, content = self.__requestWithWebclient(uri, method, body, headers)
+            status = response.status
+            return response, content
+        finally:
+            duration = time.perf_counter() - start
+            self.__instrumentation.emitRequest(RequestEvent(endpoint, method, status, duration,
+                                                            len(uri) + len(body or ''), len(content)))
+
+    def __requestWithWebclient(self, uri, method, body, headers):
+        """Sendet die Anfrage mit einem Webclient aus dem Pool oder, ohne Pool, mit dem des Threads."""
+        if self.__pool is None:
+            return self.__getWebclient().request(uri, method, body, headers)
+        with self.__pool.webclient(uri) as webclient:
+            return webclient.request(uri, method, body, headers)
+
+    def __measureDecode(self, format):
+        """Misst das Dekodieren einer Antwort (format 'json', 'yaml' oder 'html') der letzten Anfrage."""
+        return self.__instrumentation.measureDecode(getattr(self.__threadLocal, 'endpoint', None), format)
+
+    def getInstrumentation(self) -> Instrumentation:
+        """Gibt die Instrumentation zurück, an der Hooks (z.B. MetricsCollector) registriert werden."""
+        return self.__instrumentation
+
     def __getUserDataFromJSONContent(self, content):
         """Ermittelt userdaten aus JSON Content."""
         return {'bar': str(content['bar']),
@@ -88,20 +262,22 @@ class HTTPConnection(object):
 
     def __generateJSONContentAndCheckForSuccess(self, content):
         """Aufbereitung und Prüfung der vom Server empfangenen JSON Daten."""
-        j_content = json.loads(content)
+        with self.__measureDecode('json'):
+            j_content = json.loads(content)
         if j_content['success'] == 1:
             return j_content
         else:
-            raise JSONError()
+            raise JSONError('success ist nicht 1')
 
 
     def __generateJSONContentAndCheckForOK(self, content: str):
         """Aufbereitung und Prüfung der vom Server empfangenen JSON Daten."""
-        j_content = json.loads(content)
+        with self.__measureDecode('json'):
+            j_content = json.loads(content)
         if j_content['status'] == 'ok':
             return j_content
         else:
-            raise JSONError()
+            raise JSONError('status ist nicht ok')
 
 
     def __isFieldWatered(self, jContent, fieldID):
@@ -123,7 +299,7 @@ class HTTPConnection(object):
 
     def __getTokenFromURL(self, url):
         """Ermittelt aus einer übergebenen URL den security token."""
-        split = re.search(r'https://.*/logw.php.*token=([a-f0-9]{32})', url)
+        split = re.search(r'https?://.*/logw.php.*token=([a-f0-9]{32})', url)
         iErr = 0
         if split:
             tmpToken = split.group(1)
@@ -137,6 +313,7 @@ class HTTPConnection(object):
             raise JSONError('Fehler bei der Ermittlung des tokens')
         else:
             self.__token = tmpToken
+            self.__ajaxToken = False
 
     def __getTokenFromURLPORT(self, url):
         """Ermittelt aus einer übergebenen URL den security token."""
@@ -154,6 +331,7 @@ class HTTPConnection(object):
             raise JSONError(f'Fehler bei der Ermittlung des tokens')
         else:
             self.__token = tmpToken
+            self.__ajaxToken = False
 
     def __getunrFromURLPORT(self, url):
         """Ermittelt aus einer übergebenen URL den security token."""
@@ -189,50 +367,6 @@ class HTTPConnection(object):
         else:
             self.__portunr = tmpportunr
 
-    def __getInfoFromJSONContent(self, jContent, info):
-        """Looks up certain info in the given JSON object and returns it."""
-        # ToDo: Dumb Style. Needs refactoring
-        success = False
-        result = None
-        if info == 'Username':
-            parsed_string_list = re.findall(r"<td>(.+?)</td>", str(jContent['table'][0]).replace(r'&nbsp;', ''))
-            result = parsed_string_list[1]
-            success = True
-        elif info == 'Gardens':
-            parsed_string_list = re.findall(r"<td>(.+?)</td>", str(jContent['table'][16]).replace(r'&nbsp;', ''))
-            result = int(parsed_string_list[1])
-            success = True
-        elif info == 'CompletedQuests':
-            parsed_string_list = re.findall(r"<td>(.+?)</td>", str(jContent['table'][5]).replace(r'&nbsp;', ''))
-            result = int(parsed_string_list[1])
-            success = True
-        elif info == 'CactusQuest':
-            parsed_string_list = re.findall(r"<td>(.+?)</td>", str(jContent['table'][7]).replace(r'&nbsp;', ''))
-            result = int(parsed_string_list[1])
-            success = True
-        elif info == 'EchinoQuest':
-            parsed_string_list = re.findall(r"<td>(.+?)</td>", str(jContent['table'][8]).replace(r'&nbsp;', ''))
-            result = int(parsed_string_list[1])
-            success = True
-        elif info == 'BigheadQuest':
-            parsed_string_list = re.findall(r"<td>(.+?)</td>", str(jContent['table'][9]).replace(r'&nbsp;', ''))
-            result = int(parsed_string_list[1])
-            success = True
-        elif info == 'OpuntiaQuest':
-            parsed_string_list = re.findall(r"<td>(.+?)</td>", str(jContent['table'][10]).replace(r'&nbsp;', ''))
-            result = int(parsed_string_list[1])
-            success = True
-        elif info == 'SaguaroQuest':
-            parsed_string_list = re.findall(r"<td>(.+?)</td>", str(jContent['table'][11]).replace(r'&nbsp;', ''))
-            result = int(parsed_string_list[1])
-            success = True
-
-        if success:
-            return result
-        else:
-            self.__logHTTPConn.debug(jContent['table'])
-            raise JSONError('Info:' + info + " not found.")
-
     def __checkIfSessionIsDeleted(self, cookie):
         """Prüft, ob die Session gelöscht wurde."""
         if not (cookie['PHPSESSID'].value == 'deleted'):
@@ -320,37 +454,142 @@ class HTTPConnection(object):
         """Aufbereitung und Prüfung der vom Server empfangenen YAML Daten auf Erfolg."""
         content = content.replace('\n', ' ')
         content = content.replace('\t', ' ')
-        yContent = yaml.load(content, Loader=yaml.FullLoader)
+        with self.__measureDecode('yaml'):
+            yContent = yaml.load(content, Loader=yaml.FullLoader)
         
         if yContent['success'] != 1:
-            raise YAMLError()
+            raise YAMLError('success ist nicht 1')
+        return yContent
 
 
     def __generateYAMLContentAndCheckStatusForOK(self, content):
         """Aufbereitung und Prüfung der vom Server empfangenen YAML Daten auf iO Status."""
         content = content.replace('\n', ' ')
         content = content.replace('\t', ' ')
-        yContent = yaml.load(content, Loader=yaml.FullLoader)
+        with self.__measureDecode('yaml'):
+            yContent = yaml.load(content, Loader=yaml.FullLoader)
         
         if yContent['status'] != 'ok':
-            raise YAMLError()
+            raise YAMLError('status ist nicht ok')
 
-    def _changeGarden(self, gardenID):
-        """Wechselt den Garten."""
-        try:
+    def __findNextWaterHarvestFromJSONContent(self, jContent):
+        """
+        Ermittelt aus dem JSON Content den nächsten Zeitpunkt, zu dem gegossen oder geerntet werden muss.
+        Leere Felder haben keinen Erntezeitpunkt und werden übersprungen. Wächst im Garten nichts, wird None zurückgegeben.
+        """
+        overall_time = []
+        max_water_time = 86400
+        # 41 Unkraut, 42 Baumstumpf, 43 Stein, 45 Maulwurf
+        for field in jContent['garden'].values():
+            if field[0] in [0, 41, 42, 43, 45]:
+                continue
+            water, harvest = field[4], field[3]
+            if harvest == 0:
+                continue
+            if harvest - water > max_water_time:
+                overall_time.append(water + max_water_time)
+            overall_time.append(harvest)
+        return min(overall_time, default=None)
+
+    def __fetchGardenSnapshot(self, gardenID):
+        """
+        Lädt den Zustand eines Gartens vom Server, ohne den Zwischenspeicher oder den
+        serverseitig ausgewählten Garten zu berücksichtigen.
+        """
+        if gardenID == AQUA_GARDEN_KEY:
+            address = f'ajax/ajax.php?do=watergardenGetGarden&token={self.__token}'
+        else:
             address = f'ajax/ajax.php?do=changeGarden&garden={str(gardenID)}&token={self.__token}'
-            response, content = self.__sendRequest(address)
-            self.__checkIfHTTPStateIsOK(response)
-            self.__generateJSONContentAndCheckForOK(content)
+        response, content = self.__sendRequest(address)
+        self.__checkIfHTTPStateIsOK(response)
+        jContent = self.__generateJSONContentAndCheckForOK(content)
+        return GardenSnapshot(gardenID, jContent)
+
+    def __getGardenSnapshot(self, gardenID):
+        """
+        Gibt den zwischengespeicherten Zustand des Gartens zurück. Ist keiner vorhanden,
+        wird der Garten einmalig vom Server geladen.
+        """
+        snapshot = self.__gardenCache.get(gardenID)
+        if snapshot is None:
+            snapshot = self.__loadGarden(gardenID)
+        return snapshot
+
+    def __getAquaGardenSnapshot(self):
+        """Gibt den zwischengespeicherten Zustand des Wassergartens zurück und lädt ihn bei Bedarf."""
+        snapshot = self.__gardenCache.get(AQUA_GARDEN_KEY)
+        if snapshot is None:
+            snapshot = self.__fetchGardenSnapshot(AQUA_GARDEN_KEY)
+            self.__gardenCache[AQUA_GARDEN_KEY] = snapshot
+        return snapshot
+
+    def prefetchGardens(self, gardenIDs, maxWorkers=4):
+        """
+        Lädt die Zustände mehrerer Gärten (gardenIDs, optional inkl. AQUA_GARDEN_KEY)
+        gleichzeitig mit höchstens maxWorkers parallelen Anfragen in den Zwischenspeicher.
+        Danach ist nicht mehr bekannt, welcher Garten serverseitig ausgewählt ist; die nächste
+        verändernde Aktion wechselt daher zuerst wieder in ihren Garten.
+        """
+        missing = [gardenID for gardenID in gardenIDs if gardenID not in self.__gardenCache]
+        if len(missing) == 0:
+            return
+
+        if maxWorkers <= 1 or len(missing) == 1:
+            snapshots = [self.__fetchGardenSnapshot(gardenID) for gardenID in missing]
+        else:
+            with ThreadPoolExecutor(max_workers=min(maxWorkers, len(missing))) as executor:
+                snapshots = list(executor.map(self.__fetchGardenSnapshot, missing))
+
+        self.__currentGardenID = None
+        for snapshot in snapshots:
+            self.__gardenCache[snapshot.gardenID] = snapshot
+
+    def __invalidateGarden(self, gardenID):
+        """Verwirft den Zustand eines Gartens nach einer verändernden Aktion."""
+        self.__gardenCache.pop(gardenID, None)
+
+    def invalidateGardenCache(self, gardenID=None):
+        """
+        Verwirft den zwischengespeicherten Zustand eines oder (ohne gardenID) aller Gärten,
+        z.B. zu Beginn eines neuen Durchlaufs.
+        """
+        if gardenID is None:
+            self.__gardenCache.clear()
+        else:
+            self.__invalidateGarden(gardenID)
+
+    def getCurrentGardenID(self):
+        """Gibt den serverseitig ausgewählten Garten zurück oder None, wenn er nicht bekannt ist."""
+        return self.__currentGardenID
+
+    def __loadGarden(self, gardenID):
+        """Wählt den Garten serverseitig aus und speichert seinen Zustand zwischen."""
+        try:
+            snapshot = self.__fetchGardenSnapshot(gardenID)
         except:
+            self.__currentGardenID = None
             raise
+        else:
+            self.__currentGardenID = gardenID
+            self.__gardenCache[gardenID] = snapshot
+            return snapshot
+
+    def _changeGarden(self, gardenID):
+        """
+        Wechselt serverseitig in den Garten. Ist er bereits ausgewählt, wird keine Anfrage
+        gesendet, auch wenn sein Zustand nach einer Aktion verworfen wurde; dieser wird erst
+        wieder geladen, wenn er gelesen wird.
+        """
+        if self.__currentGardenID != gardenID:
+            self.__loadGarden(gardenID)
 
     def __parseNPCPricesFromHtml(self, html_data):
         """Parsen aller NPC Preise aus dem HTML Skript der Spielehilfe."""
         #ElementTree benötigt eine Datei zum Parsen.
         #Mit BytesIO wird eine Datei im Speicher angelegt, nicht auf der Festplatte.
         my_parser = etree.HTMLParser(recover=True)
-        html_tree = etree.fromstring(str(html_data), parser=my_parser)
+        with self.__measureDecode('html'):
+            html_tree = etree.fromstring(str(html_data), parser=my_parser)
 
         table = html_tree.find('./body/div[@id="content"]/table')
         
@@ -384,8 +623,16 @@ class HTTPConnection(object):
         return headers
 
     def __getServer(self):
+        if self.__baseURL is not None:
+            return self.__baseURL
         return f'http://s{self.__Session.getServer()}{self.__Session.getServerURL()}'
 
+    def __getLoginServer(self, serverURL):
+        """Gibt die Adresse zurück, an die Login-Anfragen gesendet werden."""
+        if self.__baseURL is not None:
+            return self.__baseURL
+        return f'https://www{serverURL}'
+
 
     def logIn(self, loginDaten):
         """Führt einen login durch und öffnet eine Session."""
@@ -399,14 +646,14 @@ class HTTPConnection(object):
                    'Connection': 'keep-alive'}
 
         try:
-            response, content = self.__webclient.request(f'https://www{serverURL}dispatch.php',
+            response, content = self.__request(f'{self.__getLoginServer(serverURL)}dispatch.php',
                                                          'POST',
                                                          parameter,
                                                          headers)
             self.__checkIfHTTPStateIsOK(response)
             jContent = self.__generateJSONContentAndCheckForOK(content)
             self.__getTokenFromURL(jContent['url'])
-            response, content = self.__webclient.request(jContent['url'], 'GET', headers=headers)
+            response, content = self.__request(jContent['url'], 'GET', headers=headers)
             self.__checkIfHTTPStateIsFOUND(response)
         except:
             raise
@@ -416,6 +663,8 @@ class HTTPConnection(object):
             self.__Session.openSession(cookie['PHPSESSID'].value, str(loginDaten.server), serverURL)
             self.__cookie = cookie
             self.__userID = cookie['wunr'].value
+            self.__loginDaten = loginDaten
+            self.__portalLogin = False
 
     def logInPortal(self, loginDaten):
         """Führt einen login durch und öffnet eine Session."""
@@ -428,7 +677,7 @@ class HTTPConnection(object):
                    'Connection': 'keep-alive'}
 
         try:
-            response, content = self.__webclient.request(f'https://www{serverURL}/portal/game2port_login.php', \
+            response, content = self.__request(f'{self.__getLoginServer(serverURL)}portal/game2port_login.php', \
                                                          'POST', \
                                                          parameter, \
                                                          headers)
@@ -443,9 +692,13 @@ class HTTPConnection(object):
                    'Cookie': self.__unr}
 
         try:
-            loginadresse = f'https://s{str(loginDaten.server)}{serverURL}/logw.php?port=1&unr=' + \
+            if self.__baseURL is not None:
+                gameServer = self.__baseURL
+            else:
+                gameServer = f'https://s{str(loginDaten.server)}{serverURL}/'
+            loginadresse = f'{gameServer}logw.php?port=1&unr=' + \
                            f'{self.__unr}&portunr={self.__portunr}&hash={self.__token}&sno=1'
-            response, content = self.__webclient.request(loginadresse, 'GET', headers=headers)
+            response, content = self.__request(loginadresse, 'GET', headers=headers)
             self.__checkIfHTTPStateIsFOUND(response)
         except:
             raise
@@ -455,17 +708,100 @@ class HTTPConnection(object):
             self.__Session.openSession(cookie['PHPSESSID'].value, '1', '.wurzelimperium.de/')
             self.__cookie = cookie
             self.__userID = self.__unr
+            self.__loginDaten = loginDaten
+            self.__portalLogin = True
 
     def getUserID(self):
         """Gibt die wunr als userID zurück die beim Login über das Cookie erhalten wurde."""
         return self.__userID
 
+    def saveSession(self, fileName):
+        """
+        Speichert Session-ID, wunr, Token und Ablaufzeit der offenen Session in fileName, damit ein
+        späterer Programmlauf sie mit restoreSession übernehmen kann. Die Datei ist nur für den
+        Benutzer lesbar (0600), da jeder mit ihrem Inhalt die Session übernehmen kann.
+        """
+        state = {'version': SESSION_FILE_VERSION,
+                 'sessionID': self.__Session.getSessionID(),
+                 'server': self.__Session.getServer(),
+                 'serverURL': self.__Session.getServerURL(),
+                 'startTime': self.__Session.getStartTime(),
+                 'endTime': self.__Session.getEndTime(),
+                 'userID': self.__userID,
+                 'token': self.__token,
+                 'ajaxToken': self.__ajaxToken,
+                 'unr': self.__unr,
+                 'portunr': self.__portunr}
+        directory = os.path.dirname(fileName)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmpFile = fileName + '.tmp'
+        fd = os.open(tmpFile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(state, file)
+        os.replace(tmpFile, fileName)
+        self.__sessionFile = fileName
+
+    def restoreSession(self, fileName, loginDaten=None, portal=False) -> bool:
+        """
+        Übernimmt eine mit saveSession gespeicherte Session, sofern sie noch nicht abgelaufen ist
+        und der Server sie noch akzeptiert. Geprüft wird mit einer einzigen Anfrage (menu-update).
+        Ist die Session ungültig, wird die Datei gelöscht und False zurückgegeben.
+        Mit loginDaten kann die übernommene Session später automatisch erneuert werden.
+        """
+        try:
+            with open(fileName, encoding='utf-8') as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        if state.get('version') != SESSION_FILE_VERSION or state['endTime'] <= time.time():
+            self.__removeSessionFile(fileName)
+            return False
+
+        self.__Session.restoreSession(state['sessionID'], state['server'], state['serverURL'],
+                                      state['startTime'], state['endTime'])
+        self.__userID = state['userID']
+        self.__token = state['token']
+        self.__ajaxToken = state.get('ajaxToken', False)
+        self.__unr = state['unr']
+        self.__portunr = state['portunr']
+        self.__threadLocal.noRenewal = True
+        try:
+            self.readUserDataFromServer()
+        except:
+            self.__logHTTPConn.info('Gespeicherte Session ist nicht mehr gültig.')
+            self.__Session = Session()
+            self.__userID = None
+            self.__token = None
+            self.__ajaxToken = False
+            self.__unr = None
+            self.__portunr = None
+            self.__removeSessionFile(fileName)
+            return False
+        finally:
+            self.__threadLocal.noRenewal = False
+        self.__loginDaten = loginDaten
+        self.__portalLogin = portal
+        self.__sessionFile = fileName
+        return True
+
+    def __removeSessionFile(self, fileName):
+        try:
+            os.remove(fileName)
+        except OSError:
+            pass
+
+    def getSessionRemainingTime(self):
+        """Gibt die verbleibende Zeit der Session in Sekunden zurück (inkl. Reserve, siehe Session)."""
+        return self.__Session.getRemainingTime()
+
 
     def logOut(self):
         """Logout des Spielers inkl. Löschen der Session."""
         #TODO: Was passiert beim Logout einer bereits ausgeloggten Session
         try: #content ist beim Logout leer
-            response, content = self.__sendRequest('main.php?page=logout')
+            response, content = self.__sendRequest('main.php?page=logout', renew=False)
             self.__checkIfHTTPStateIsFOUND(response)
             cookie = SimpleCookie(response['set-cookie'])
             self.__checkIfSessionIsDeleted(cookie)
@@ -475,23 +811,53 @@ class HTTPConnection(object):
             self.__del__()
 
 
+    def __fetchStats(self):
+        """Lädt die Statistik des Spielers und gibt sie als StatsRecord zurück."""
+        address =   f'ajax/ajax.php?do=statsGetStats&which=0&start=0' \
+                    f'&additional={self.__userID}&token={self.__token}'
+        response, content = self.__sendRequest(address)
+        self.__checkIfHTTPStateIsOK(response)
+        jContent = self.__generateJSONContentAndCheckForOK(content.decode('UTF-8'))
+        return parseStats(jContent['table'])
+
+    def getStats(self, static=False):
+        """
+        Gibt die Statistik des Spielers als StatsRecord zurück. Sie wird einmal geladen und
+        zwischengespeichert: Benötigt der Aufrufer nur unveränderliche Werte (static, siehe
+        STATS_STATIC), gilt sie STATS_STATIC_TTL Sekunden, sonst STATS_TTL Sekunden bzw. bis
+        invalidateStatsCache aufgerufen wird, z.B. nach dem Abgeben einer Quest.
+        """
+        with self.__statsLock:
+            now = time.monotonic()
+            maxAge = STATS_STATIC_TTL if static else STATS_TTL
+            if self.__stats is None or now - self.__statsTime > maxAge or (not static and self.__statsStale):
+                self.__stats = self.__fetchStats()
+                self.__statsTime = now
+                self.__statsStale = False
+            return self.__stats
+
     def getInfoFromStats(self, info):
         """
         Returns different parameters from user's stats'
-        @param info: available values: 'Username', 'Gardens', 'CompletedQuests'
+        @param info: available values: see STATS_INFO, e.g. 'Username', 'Gardens', 'CompletedQuests'
         @return: parameter value
         """
-        try:
-            address =   f'ajax/ajax.php?do=statsGetStats&which=0&start=0' \
-                        f'&additional={self.__userID}&token={self.__token}'
-            response, content = self.__sendRequest(address)
-            self.__checkIfHTTPStateIsOK(response)
-            jContent = self.__generateJSONContentAndCheckForOK(content.decode('UTF-8'))
-            result = self.__getInfoFromJSONContent(jContent, info)
-        except:
-            raise
-        else:
-            return result
+        if info not in STATS_INFO:
+            raise JSONError('Info:' + info + " not found.")
+        result = getattr(self.getStats(info in STATS_STATIC), STATS_INFO[info])
+        if result is None:
+            raise JSONError('Info:' + info + " not found.")
+        return result
+
+    def invalidateStatsCache(self, static=False):
+        """
+        Verwirft die veränderlichen Werte der zwischengespeicherten Statistik, mit static
+        die gesamte Statistik. Die nächste Abfrage lädt sie dann neu vom Server.
+        """
+        with self.__statsLock:
+            if static:
+                self.__stats = None
+            self.__statsStale = True
 
 
     def readUserDataFromServer(self, data_type="UserData"):
@@ -515,14 +881,10 @@ class HTTPConnection(object):
         die auch gegossen werden können und gibt diese zurück.
         """
         try:
-            address = f'ajax/ajax.php?do=changeGarden&garden={str(gardenID)}&token={str(self.__token)}'
-            response, content = self.__sendRequest(address)
-            self.__checkIfHTTPStateIsOK(response)
-            jContent = self.__generateJSONContentAndCheckForOK(content)
+            snapshot = self.__getGardenSnapshot(gardenID)
+            return snapshot.getView('water', self.__findPlantsToBeWateredFromJSONContent)
         except:
             raise
-        else:
-            return self.__findPlantsToBeWateredFromJSONContent(jContent)
 
 
     def waterPlantInGarden(self, iGarten, iField, sFieldsToWater):
@@ -535,17 +897,77 @@ class HTTPConnection(object):
             self.__generateYAMLContentAndCheckForSuccess(content.decode('UTF-8'))
         except:
             raise
+        finally:
+            self.__invalidateGarden(iGarten)
+
+
+    def __sendWaterChunk(self, iGarten, plants):
+        """
+        Sendet eine wasser.php Anfrage für alle Pflanzen aus plants. Gibt False zurück, wenn der
+        Server success != 1 meldet; Verbindungs- und HTTP-Fehler werden weitergereicht.
+        """
+        sFields = ''
+        for iField, sFieldsToWater in plants:
+            sFields += f'feld[]={str(iField)}&felder[]={sFieldsToWater}&'
 
+        address = f'save/wasser.php?{sFields}cid={self.__token}&garden={str(iGarten)}'
+        response, content = self.__sendRequest(address)
+        self.__checkIfHTTPStateIsOK(response)
+        try:
+            self.__generateYAMLContentAndCheckForSuccess(content.decode('UTF-8'))
+        except YAMLError:
+            return False
+        return True
+
+    def __waterPlantsInGardenChunk(self, iGarten, plants):
+        """
+        Bewässert alle Pflanzen aus plants [(fieldID, sFieldsToWater), ...] mit einer Anfrage
+        und gibt die gegossenen fieldIDs zurück. Meldet der Server einen Fehler, kann er einen
+        Teil des Blocks bereits gegossen haben. Der Garten wird daher neu gelesen und nur der
+        noch ungegossene Rest geteilt und erneut gesendet, um die betroffenen Felder einzugrenzen.
+        """
+        if self.__sendWaterChunk(iGarten, plants):
+            return [iField for iField, _ in plants]
+
+        self.__invalidateGarden(iGarten)
+        snapshot = self.__getGardenSnapshot(iGarten)
+        pending = set(snapshot.getView('water', self.__findPlantsToBeWateredFromJSONContent)['fieldID'])
+        planted = {field[0] for field in snapshot.jContent['grow']}
+        watered = [iField for iField, _ in plants if iField in planted and iField not in pending]
+        notPlanted = [iField for iField, _ in plants if iField not in planted]
+        if notPlanted:
+            self.__logHTTPConn.debug(f'Felder {notPlanted} im Garten {iGarten} sind nicht bepflanzt.')
+        plants = [plant for plant in plants if plant[0] in pending]
+        if len(plants) == 1:
+            self.__logHTTPConn.debug(f'Feld {plants[0][0]} im Garten {iGarten} konnte nicht gegossen werden.')
+        elif len(plants) > 1:
+            middle = len(plants) // 2
+            watered += self.__waterPlantsInGardenChunk(iGarten, plants[:middle]) + \
+                       self.__waterPlantsInGardenChunk(iGarten, plants[middle:])
+        return watered
+
+    def waterPlantsInGarden(self, iGarten, plants, chunkSize=WATER_CHUNK_SIZE):
+        """
+        Bewässert mehrere Pflanzen im Garten iGarten mit möglichst wenigen Anfragen.
+        @param plants: Liste aus (fieldID, sFieldsToWater), z.B. [(1, '1'), (2, '2,3')]
+        @param chunkSize: maximale Anzahl an Pflanzen pro Anfrage
+        @return: Liste der fieldIDs, die tatsächlich gegossen wurden
+        """
+        watered = []
+        try:
+            for i in range(0, len(plants), chunkSize):
+                watered += self.__waterPlantsInGardenChunk(iGarten, plants[i:i + chunkSize])
+        finally:
+            self.__invalidateGarden(iGarten)
+        return watered
 
     def getPlantsToWaterInAquaGarden(self):
         """
         Ermittelt alle bepflanzten Felder im Wassergartens, die auch gegossen werden können und gibt diese zurück.
         """
         try:
-            response, content = self.__sendRequest(f'ajax/ajax.php?do=watergardenGetGarden&token={self.__token}')
-            self.__checkIfHTTPStateIsOK(response)
-            jContent = self.__generateJSONContentAndCheckForOK(content)
-            return self.__findPlantsToBeWateredFromJSONContent(jContent)
+            snapshot = self.__getAquaGardenSnapshot()
+            return snapshot.getView('water', self.__findPlantsToBeWateredFromJSONContent)
         except:
             raise
 
@@ -564,6 +986,36 @@ class HTTPConnection(object):
             self.__checkIfHTTPStateIsOK(response)
         except:
             raise
+        finally:
+            self.__invalidateGarden(AQUA_GARDEN_KEY)
+
+    def waterPlantsInAquaGarden(self, listFieldsToWater, chunkSize=WATER_CHUNK_SIZE):
+        """
+        Gießt mehrere Pflanzen im Wassergarten mit möglichst wenigen Anfragen.
+        @param listFieldsToWater: Liste aus sFieldsToWater je Pflanze, z.B. ['1', '2,3']
+        @return: Anzahl der gegossenen Pflanzen
+        """
+        watered = 0
+        try:
+            for i in range(0, len(listFieldsToWater), chunkSize):
+                chunk = listFieldsToWater[i:i + chunkSize]
+                sFields = ''
+                for sFieldsToWater in chunk:
+                    for field in sFieldsToWater.split(','):
+                        sFields += f'&water[]={field}'
+
+                address = f'ajax/ajax.php?do=watergardenCache{sFields}&token={self.__token}'
+                response, content = self.__sendRequest(address)
+                self.__checkIfHTTPStateIsOK(response)
+                try:
+                    self.__generateJSONContentAndCheckForOK(content)
+                except JSONError:
+                    self.__logHTTPConn.debug(f'{len(chunk)} Pflanzen im Wassergarten konnten nicht gegossen werden.')
+                else:
+                    watered += len(chunk)
+        finally:
+            self.__invalidateGarden(AQUA_GARDEN_KEY)
+        return watered
 
     def isHoneyFarmAvailable(self, iUserLevel):
         if not (iUserLevel < 10):
@@ -704,11 +1156,8 @@ class HTTPConnection(object):
     def getEmptyFieldsOfGarden(self, gardenID):
         """Gibt alle leeren Felder eines Gartens zurück."""
         try:
-            address = f'ajax/ajax.php?do=changeGarden&garden={str(gardenID)}&token={self.__token}'
-            response, content = self.__sendRequest(address)
-            self.__checkIfHTTPStateIsOK(response)
-            jContent = self.__generateJSONContentAndCheckForOK(content)
-            emptyFields = self.__findEmptyFieldsFromJSONContent(jContent)
+            snapshot = self.__getGardenSnapshot(gardenID)
+            emptyFields = snapshot.getView('empty', self.__findEmptyFieldsFromJSONContent)
         except:
             raise
         else:
@@ -717,11 +1166,8 @@ class HTTPConnection(object):
     def getWeedFieldsOfGarden(self, gardenID):
         """Gibt alle Unkraut-Felder eines Gartens zurück."""
         try:
-            address = f'ajax/ajax.php?do=changeGarden&garden={str(gardenID)}&token={self.__token}'
-            response, content = self.__sendRequest(address)
-            self.__checkIfHTTPStateIsOK(response)
-            jContent = self.__generateJSONContentAndCheckForOK(content)
-            weedFields = self.__findWeedFieldsFromJSONContent(jContent)
+            snapshot = self.__getGardenSnapshot(gardenID)
+            weedFields = snapshot.getView('weed', self.__findWeedFieldsFromJSONContent)
         except:
             raise
         else:
@@ -730,23 +1176,25 @@ class HTTPConnection(object):
     def getGrowingPlantsOfGarden(self, gardenID):
         """Returns all fields with growing plants of a garden."""
         try:
-            address = f'ajax/ajax.php?do=changeGarden&garden={str(gardenID)}&token={self.__token}'
-            response, content = self.__sendRequest(address)
-            self.__checkIfHTTPStateIsOK(response)
-            jContent = self.__generateJSONContentAndCheckForOK(content)
-            growingPlants = self.__findGrowingPlantsFromJSONContent(jContent)
+            snapshot = self.__getGardenSnapshot(gardenID)
+            growingPlants = snapshot.getView('growing', self.__findGrowingPlantsFromJSONContent)
         except:
             raise
         else:
             return growingPlants
 
+    def getNextWaterHarvestOfGarden(self, gardenID):
+        """Gibt den nächsten Zeitpunkt zurück, zu dem im Garten gegossen oder geerntet werden muss."""
+        try:
+            snapshot = self.__getGardenSnapshot(gardenID)
+            return snapshot.getView('timing', self.__findNextWaterHarvestFromJSONContent)
+        except:
+            raise
+
     def getEmptyFieldsAqua(self):
         try:
-            address = f'ajax/ajax.php?do=watergardenGetGarden&token={self.__token}'
-            response, content = self.__sendRequest(address)
-            self.__checkIfHTTPStateIsOK(response)
-            jContent = self.__generateJSONContentAndCheckForOK(content)
-            emptyAquaFields = self.__findEmptyAquaFieldsFromJSONContent(jContent)
+            snapshot = self.__getAquaGardenSnapshot()
+            emptyAquaFields = snapshot.getView('empty', self.__findEmptyAquaFieldsFromJSONContent)
         except:
             raise
         else:
@@ -758,7 +1206,9 @@ class HTTPConnection(object):
             self._changeGarden(gardenID)
             address = f'ajax/ajax.php?do=gardenHarvestAll&token={self.__token}'
             response, content = self.__sendRequest(address)
-            jContent = json.loads(content)
+            self.__invalidateGarden(gardenID)
+            with self.__measureDecode('json'):
+                jContent = json.loads(content)
 
             if jContent['status'] == 'error':
                 print(jContent['message'])
@@ -779,6 +1229,8 @@ class HTTPConnection(object):
             self.__checkIfHTTPStateIsOK(response)
         except:
             raise
+        finally:
+            self.__invalidateGarden(AQUA_GARDEN_KEY)
 
     def growPlant(self, field, plant, gardenID, fields):
         """Baut eine Pflanze auf einem Feld an."""
@@ -789,18 +1241,123 @@ class HTTPConnection(object):
         except:
             print('except')
             raise
+        finally:
+            self.__invalidateGarden(gardenID)
+
+    def __checkYAMLContentForFailure(self, content: str):
+        """
+        Prüft eine YAML Antwort, die nicht in jedem Fall ein success-Feld enthält.
+        Nur ein ausdrücklich gemeldeter Fehler führt zu einem YAMLError.
+        """
+        try:
+            with self.__measureDecode('yaml'):
+                yContent = yaml.load(content.replace('\n', ' ').replace('\t', ' '), Loader=yaml.FullLoader)
+        except yaml.YAMLError:
+            return
+        if isinstance(yContent, dict) and 'success' in yContent and yContent['success'] != 1:
+            raise YAMLError('Anpflanzen nicht erfolgreich')
+
+    def __growPlantsChunk(self, gardenID, plant, placements):
+        """
+        Pflanzt alle placements [(fieldID, sFields), ...] mit einer Anfrage an und gibt je
+        Platzierung True/False zurück. Meldet der Server einen Fehler, kann er einen Teil des
+        Blocks bereits angepflanzt haben. Der Garten wird daher neu gelesen und nur der Rest,
+        dessen Felder noch leer sind, geteilt und erneut gesendet, um die betroffenen Felder
+        einzugrenzen. Verbindungs- und HTTP-Fehler werden weitergereicht, da der Server die
+        Platzierungen dennoch übernommen haben kann.
+        """
+        sFields = ''
+        for field, fields in placements:
+            sFields += f'pflanze[]={str(plant)}&feld[]={str(field)}&felder[]={fields}&'
+
+        address = f'save/pflanz.php?{sFields}cid={self.__token}&garden={str(gardenID)}'
+        response, content = self.__sendRequest(address)
+        self.__checkIfHTTPStateIsOK(response)
+        try:
+            self.__checkYAMLContentForFailure(content.decode('UTF-8'))
+        except YAMLError:
+            pass
+        else:
+            return [True] * len(placements)
+
+        if len(placements) == 1:
+            self.__logHTTPConn.debug(f'Feld {placements[0][0]} im Garten {gardenID} konnte nicht bepflanzt werden.')
+            return [False]
+
+        self.__invalidateGarden(gardenID)
+        snapshot = self.__getGardenSnapshot(gardenID)
+        planted = {int(anchor) for anchor, productID in snapshot.jContent['grow'] if int(productID) == int(plant)}
+        empty = set(snapshot.getView('empty', self.__findEmptyFieldsFromJSONContent))
+
+        results = [False] * len(placements)
+        pending = []
+        for index, (field, fields) in enumerate(placements):
+            if int(field) in planted:
+                results[index] = True
+            elif all(int(fieldID) in empty for fieldID in fields.split(',')):
+                pending.append(index)
+            else:
+                self.__logHTTPConn.debug(f'Feld {field} im Garten {gardenID} ist nicht mehr frei.')
+
+        middle = (len(pending) + 1) // 2
+        for part in (pending[:middle], pending[middle:]):
+            if part:
+                partResults = self.__growPlantsChunk(gardenID, plant, [placements[index] for index in part])
+                for index, success in zip(part, partResults):
+                    results[index] = success
+        return results
+
+    def growPlants(self, gardenID, plant, placements, chunkSize=GROW_CHUNK_SIZE):
+        """
+        Baut die Pflanze plant auf mehreren Feldern mit möglichst wenigen Anfragen an.
+        @param placements: Liste aus (fieldID, sFields), z.B. [(1, '1,2'), (3, '3,4')]
+        @param chunkSize: maximale Anzahl an Pflanzen pro Anfrage
+        @return: Liste mit True/False je Eintrag aus placements
+        """
+        results = []
+        try:
+            for i in range(0, len(placements), chunkSize):
+                results += self.__growPlantsChunk(gardenID, plant, placements[i:i + chunkSize])
+        finally:
+            self.__invalidateGarden(gardenID)
+        return results
+
+    def growAquaPlants(self, plant, fields, chunkSize=GROW_CHUNK_SIZE):
+        """
+        Baut die Pflanze plant auf mehreren Feldern des Wassergartens mit möglichst wenigen Anfragen an.
+        @return: Liste mit True/False je Eintrag aus fields
+        """
+        results = []
+        try:
+            for i in range(0, len(fields), chunkSize):
+                chunk = fields[i:i + chunkSize]
+                sPlants = ''
+                for field in chunk:
+                    sPlants += f'&plant[{field}]={plant}'
+                response, content = self.__sendRequest(f'ajax/ajax.php?do=watergardenCache{sPlants}&token={self.__token}')
+                self.__checkIfHTTPStateIsOK(response)
+                try:
+                    self.__generateJSONContentAndCheckForOK(content)
+                except JSONError:
+                    self.__logHTTPConn.debug(f'Felder {chunk} im Wassergarten konnten nicht bepflanzt werden.')
+                    results += [False] * len(chunk)
+                else:
+                    results += [True] * len(chunk)
+        finally:
+            self.__invalidateGarden(AQUA_GARDEN_KEY)
+        return results
 
     def growAquaPlant(self, plant, field):
         """Baut eine Pflanze im Wassergarten an."""
-        headers = self.__getHeaders()
-        server = self.__getServer()
-        adresse = f'{server}ajax/ajax.php?do=watergardenCache&plant[{plant}]={field}&token={self.__token}'
+        adresse = f'ajax/ajax.php?do=watergardenCache&plant[{plant}]={field}&token={self.__token}'
         try:
-            response, content = self.__webclient.request(adresse, 'GET', headers = headers)
+            response, content = self.__sendRequest(adresse)
         except:
             pass
         else:
             pass
+        finally:
+            self.__invalidateGarden(AQUA_GARDEN_KEY)
 
     def getAllProductInformations(self):
         """Sammelt alle Produktinformationen und gibt diese zur Weiterverarbeitung zurück."""
@@ -808,13 +1365,36 @@ class HTTPConnection(object):
             response, content = self.__sendRequest('main.php?page=garden')
             content = content.decode('UTF-8')
             self.__checkIfHTTPStateIsOK(response)
-            reToken = re.search(r'ajax\.setToken\(\"(.*)\"\);', content)
+            with self.__measureDecode('html'):
+                reToken = re.search(r'ajax\.setToken\(\"(.*)\"\);', content)
+                reProducts = re.search(r'data_products = ({.*}});var', content)
             self.__token = reToken.group(1) #TODO: except, wenn token nicht aktualisiert werden kann
-            reProducts = re.search(r'data_products = ({.*}});var', content)
+            self.__ajaxToken = True
             return reProducts.group(1)
         except:
             raise
 
+    def hasAjaxToken(self):
+        """
+        Gibt zurück, ob der Token aus der Gartenseite gelesen wurde (bzw. aus einer so
+        gespeicherten Session stammt) und nicht mehr der aus der Login-URL ist.
+        """
+        return self.__ajaxToken
+
+    def refreshToken(self):
+        """Liest den aktuellen Token (ajax.setToken) aus der Gartenseite."""
+        try:
+            response, content = self.__sendRequest('main.php?page=garden')
+            self.__checkIfHTTPStateIsOK(response)
+            with self.__measureDecode('html'):
+                reToken = re.search(r'ajax\.setToken\(\"(.*?)\"\);', content.decode('UTF-8'))
+            if reToken is None:
+                raise JSONError('Fehler bei der Ermittlung des tokens')
+            self.__token = reToken.group(1)
+            self.__ajaxToken = True
+        except:
+            raise
+
     def getInventory(self):
         """Ermittelt den Lagerbestand und gibt diesen zurück."""
         try:
@@ -839,13 +1419,16 @@ class HTTPConnection(object):
         except:
             raise
 
-    def sellWimpProducts(self, wimp_id):
+    def sellWimpProducts(self, wimp_id, gardenID=None):
         """
         Sell products to wimp with a given id
         @param wimp_id: str
+        @param gardenID: garden of the wimp, selected first if given
         @return: dict of new balance of sold products
         """
         try:
+            if gardenID is not None:
+                self._changeGarden(gardenID)
             address = f'ajax/verkaufajax.php?do=accept&id={wimp_id}&token={self.__token}'
             response, content = self.__sendRequest(address, 'POST')
             self.__checkIfHTTPStateIsOK(response)
@@ -855,13 +1438,16 @@ class HTTPConnection(object):
             pass
 
 
-    def declineWimp(self, wimp_id):
+    def declineWimp(self, wimp_id, gardenID=None):
         """
         Decline wimp with a given id
         @param wimp_id: str
+        @param gardenID: garden of the wimp, selected first if given
         @return: 'decline'
         """
         try:
+            if gardenID is not None:
+                self._changeGarden(gardenID)
             address = f'ajax/verkaufajax.php?do=decline&id={wimp_id}&token={self.__token}'
             response, content = self.__sendRequest(address)
             self.__checkIfHTTPStateIsOK(response)
@@ -884,62 +1470,75 @@ class HTTPConnection(object):
         try:
             response, content = self.__sendRequest('stadt/markt.php?show=overview')
             self.__checkIfHTTPStateIsOK(response)
-            tradeableProducts = re.findall(r'markt\.php\?order=p&v=([0-9]{1,3})&filter=1', content)
+            with self.__measureDecode('html'):
+                tradeableProducts = re.findall(r'markt\.php\?order=p&v=([0-9]{1,3})&filter=1', content.decode('UTF-8'))
         except:
             pass #TODO: exception definieren
         else:
-            for i in range(0, len(tradeableProducts)):
-                tradeableProducts[i] = int(tradeableProducts[i])
-                
-            return tradeableProducts
+            return [int(productID) for productID in tradeableProducts]
 
-
-    def getOffersFromProduct(self, prod_id):
-        """Gibt eine Liste mit allen Angeboten eines Produkts zurück."""
-        nextPage = True
+    def __parseOffersPage(self, content):
+        """
+        Liest die Angebote einer Seite des Marktplatzes als Liste von [Anzahl, Preis] und
+        gibt zusätzlich zurück, ob es eine weitere Seite gibt.
+        """
+        with self.__measureDecode('html'):
+            root = html.fromstring(content.decode('UTF-8'))
+        table = root.findall('./body/div/table/*')
+
+        offers = []
+        if table[1][0].text != 'Keine Angebote':
+            #range von 1 bis länge-1, da erste Zeile Überschriften sind und die letzte Weiter/Zurück.
+            for row in table[1:len(table)-1]:
+                anzahl = row[0].text.replace('.', '')
+                preis = row[3].text.replace('\xa0wT', '').replace('.', '').replace(',', '.')
+                #produkt = row[1][0].text
+                #verkaeufer = row[2][0].text
+                offers.append([int(anzahl), float(preis)])
+
+        nextPage = any('weiter' in (element.text or '') for element in table[len(table)-1][0])
+        return offers, nextPage
+
+    def iterOffersFromProduct(self, prod_id, maxPrice=None):
+        """
+        Liefert die Angebote eines Produkts als [Anzahl, Preis], aufsteigend nach Preis.
+        Die Seiten des Marktplatzes werden erst geladen, wenn ihre Angebote benötigt werden.
+        Mit maxPrice endet die Abfrage beim ersten teureren Angebot, ohne weitere Seiten zu laden.
+        Kann eine Seite nicht geladen werden, wird der Fehler weitergereicht, nachdem die Angebote
+        der vorherigen Seiten geliefert wurden.
+        """
         iPage = 1
-        listOffers = []
-        while nextPage:
-            nextPage = False
-            
+        while True:
             try:
                 address = f'stadt/markt.php?order=p&v={str(prod_id)}&filter=1&page={str(iPage)}'
                 response, content = self.__sendRequest(address)
                 self.__checkIfHTTPStateIsOK(response)
             except:
-                pass #TODO: exception definieren
-            else:
-                html_file = io.BytesIO(content)
-                html_tree = html.parse(html_file)
-                root = html_tree.getroot()
-                table = root.findall('./body/div/table/*')
-                
-                if table[1][0].text == 'Keine Angebote':
-                    pass
-                else:
-                    #range von 1 bis länge-1, da erste Zeile Überschriften sind und die letzte Weiter/Zurück.
-                    #Falls es mehrere seiten gibt.
-                    for i in range(1, len(table)-1):
-                        anzahl = table[i][0].text
-                        anzahl = anzahl.encode('utf-8')
-                        anzahl = anzahl.replace('.', '')
-                        
-                        preis = table[i][3].text
-                        preis = preis.encode('utf-8')
-                        preis = preis.replace('\xc2\xa0wT', '')
-                        preis = preis.replace('.', '')
-                        preis = preis.replace(',', '.')
-                        #produkt = table[i][1][0].text
-                        #verkaeufer = table[i][2][0].text
-        
-                        listOffers.append([int(anzahl), float(preis)])
+                self.__logHTTPConn.warning(f'Seite {iPage} der Angebote von Produkt {prod_id} konnte nicht geladen werden.')
+                raise
 
-                    for element in table[len(table)-1][0]:
-                        if 'weiter' in element.text:
-                            nextPage = True
-                            iPage = iPage + 1
+            offers, nextPage = self.__parseOffersPage(content)
+            for offer in offers:
+                if maxPrice is not None and offer[1] > maxPrice:
+                    return
+                yield offer
 
-        return listOffers
+            if not nextPage:
+                return
+            iPage = iPage + 1
+
+    def getOffersFromProduct(self, prod_id, maxPrice=None):
+        """
+        Gibt eine Liste mit allen Angeboten (bis maxPrice) eines Produkts zurück. Kann eine Seite
+        nicht geladen werden, enthält sie wie bisher nur die Angebote der vorherigen Seiten.
+        """
+        offers = []
+        try:
+            for offer in self.iterOffersFromProduct(prod_id, maxPrice):
+                offers.append(offer)
+        except:
+            pass
+        return offers
 
     def getBigQuestData(self):
         """Returns Data from Yearly Series of Quests"""
@@ -974,6 +1573,8 @@ class HTTPConnection(object):
             return jContent['success']
         except:
             raise
+        finally:
+            self.__invalidateGarden(gardenID)
 
     def removeWeedOnFieldInAquaGarden(self, gardenID, fieldID):
         """Befreit ein Feld im Garten von Unkraut."""
@@ -985,13 +1586,14 @@ class HTTPConnection(object):
             return jContent['success']
         except:
             raise
+        finally:
+            self.__invalidateGarden(gardenID)
+            self.__invalidateGarden(AQUA_GARDEN_KEY)
 
     def initInfinityQuest(self):
-        headers = self.__getHeaders()
-        server = self.__getServer()
-        adresse = f'{server}ajax/ajax.php?do=infinite_quest_get&token={self.__token}'
+        adresse = f'ajax/ajax.php?do=infinite_quest_get&token={self.__token}'
         try:
-            response, content = self.__webclient.request(adresse, 'GET', headers=headers)
+            response, content = self.__sendRequest(adresse)
             self.__checkIfHTTPStateIsOK(response)
             jContent = self.__generateJSONContentAndCheckForOK(content)
             return jContent
@@ -1005,6 +1607,8 @@ class HTTPConnection(object):
             response, content = self.__sendRequest(address)
             self.__checkIfHTTPStateIsOK(response)
             jContent = self.__generateJSONContentAndCheckForOK(content)
+            # Die Quest-Zähler der Statistik sind danach veraltet
+            self.invalidateStatsCache()
             return jContent
         except:
             pass
@@ -1061,6 +1665,17 @@ class HTTPConnection(object):
         except:
             raise
 
+    def getHiveFlightTimes(self):
+        """Gibt je verfügbarem Bienenstock den Zeitpunkt zurück, zu dem sein Flug endet (0, wenn er nicht fliegt)."""
+        try:
+            response, content = self.__sendRequest(f'ajax/ajax.php?do=bees_init&token={self.__token}')
+            self.__checkIfHTTPStateIsOK(response)
+            jContent = self.__generateJSONContentAndCheckForOK(content)
+            hives = jContent['data']['data']['hives']
+            return {hive: int(hives[str(hive)].get('time', 0)) for hive in self.__getAvailableHives(jContent)}
+        except:
+            raise
+
     def harvestBienen(self):
         """Erntet den vollen Honigtopf"""
         try:
@@ -1079,11 +1694,11 @@ class HTTPConnection(object):
         except:
             pass
 
-    def sendeBienen(self, hive):
-        """Sendet die Bienen für 2 Stunden"""
+    def sendeBienen(self, hive, tour=1):
+        """Sendet die Bienen, mit tour 1 für 2 Stunden (siehe BEE_TOURS)"""
         #TODO: Check if bee is sended, sometimes 1 hives got skipped
         try:
-            address = f'ajax/ajax.php?do=bees_startflight&id={str(hive)}&tour=1&token={self.__token}'
+            address = f'ajax/ajax.php?do=bees_startflight&id={str(hive)}&tour={str(tour)}&token={self.__token}'
             response, content = self.__sendRequest(address)
             self.__checkIfHTTPStateIsOK(response)
         except:
@@ -1145,7 +1760,8 @@ class HTTPConnection(object):
             self.__checkIfHTTPStateIsOK(response)
             content = content.decode('UTF-8')
             my_parser = etree.HTMLParser(recover=True)
-            html_tree = etree.fromstring(content, parser=my_parser)
+            with self.__measureDecode('html'):
+                html_tree = etree.fromstring(content, parser=my_parser)
 
             note = html_tree.find('./body/form/div/textarea[@id="notiztext"]')
             noteText = note.text
@@ -1178,6 +1794,25 @@ class HTTPConnection(object):
         except:
             return ''
 
+class GardenSnapshot(object):
+    """
+    Zustand eines Gartens, wie er von ajax.php?do=changeGarden geliefert wird.
+    Der JSON Content wird nur einmal geladen; jede Sicht darauf (leere Felder, Unkraut,
+    wachsende Pflanzen, zu gießende Pflanzen, Zeiten) wird beim ersten Zugriff berechnet
+    und danach wiederverwendet.
+    """
+
+    def __init__(self, gardenID, jContent):
+        self.gardenID = gardenID
+        self.jContent = jContent
+        self.__views = {}
+
+    def getView(self, name, parser):
+        """Gibt die Sicht name zurück und berechnet sie bei Bedarf mit parser."""
+        if name not in self.__views:
+            self.__views[name] = parser(self.jContent)
+        return self.__views[name]
+
 class HTTPStateError(Exception):
     def __init__(self, value):
         self.value = value
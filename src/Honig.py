@@ -3,6 +3,9 @@
 
 import logging
 
+# Flugzeiten der Bienen je tour in Sekunden (ohne Verkürzung)
+BEE_TOURS = {1: 2 * 60 * 60, 2: 8 * 60 * 60, 3: 24 * 60 * 60}
+
 class Honig():
     """
     Diese Daten-Klasse enthält alle wichtigen Informationen über den Honiggarten.
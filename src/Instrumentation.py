@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Messpunkte für alle Anfragen von HTTPConnection.
+
+HTTPConnection meldet jede Anfrage (Endpunkt, Methode, Status, Dauer, Größe) und jedes
+Dekodieren einer Antwort (JSON, YAML, HTML) an ihre Instrumentation. Diese reicht die
+Ereignisse an alle registrierten Hooks weiter. Ohne Hooks wird nichts gemessen.
+
+MetricsCollector ist ein Hook, der Zähler und Histogramme führt und diese als Übersicht
+oder im Textformat von Prometheus ausgibt.
+"""
+
+import threading, time
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlsplit
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DECODE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+RequestEvent = namedtuple('RequestEvent', 'endpoint method status duration requestSize responseSize')
+
+def getEndpoint(uri):
+    """
+    Gibt den Endpunkt einer Anfrage zurück: den Pfad ohne Server und bei ajax.php und
+    verkaufajax.php zusätzlich die Aktion, z.B. 'ajax/ajax.php?do=changeGarden'.
+    """
+    url = urlsplit(uri)
+    endpoint = url.path.lstrip('/')
+    action = parse_qs(url.query).get('do')
+    if action:
+        endpoint += '?do=' + action[0]
+    return endpoint
+
+
+class InstrumentationHook(object):
+    """Basisklasse für Hooks; abgeleitete Klassen überschreiben nur die benötigten Methoden."""
+
+    def onRequest(self, event: RequestEvent):
+        pass
+
+    def onDecode(self, endpoint, format, duration):
+        pass
+
+
+class Instrumentation(object):
+    """Verteilt die Messwerte von HTTPConnection an alle registrierten Hooks."""
+
+    def __init__(self):
+        self.__hooks = ()
+
+    def addHook(self, hook: InstrumentationHook):
+        self.__hooks = self.__hooks + (hook,)
+
+    def removeHook(self, hook: InstrumentationHook):
+        self.__hooks = tuple(h for h in self.__hooks if h is not hook)
+
+    def isActive(self):
+        return len(self.__hooks) > 0
+
+    def emitRequest(self, event: RequestEvent):
+        for hook in self.__hooks:
+            hook.onRequest(event)
+
+    @contextmanager
+    def measureDecode(self, endpoint, format):
+        """Misst die Dauer des Dekodierens im with-Block, z.B. format 'json'."""
+        hooks = self.__hooks
+        if not hooks:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            for hook in hooks:
+                hook.onDecode(endpoint, format, duration)
+
+
+class Histogram(object):
+    """Histogramm mit festen, kumulativen Grenzen wie bei Prometheus."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'max')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+
+class MetricsCollector(InstrumentationHook):
+    """Führt Zähler und Histogramme je Endpunkt und Format. Threadsicher."""
+
+    def __init__(self, requestBuckets=REQUEST_BUCKETS, decodeBuckets=DECODE_BUCKETS):
+        self.__requestBuckets = requestBuckets
+        self.__decodeBuckets = decodeBuckets
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.__lock:
+            self.__requests = {}        # (endpoint, status) -> Anzahl
+            self.__bytesSent = {}       # endpoint -> Bytes
+            self.__bytesReceived = {}   # endpoint -> Bytes
+            self.__durations = {}       # endpoint -> Histogram
+            self.__decodes = {}         # (endpoint, format) -> Histogram
+
+    def onRequest(self, event: RequestEvent):
+        with self.__lock:
+            key = (event.endpoint, str(event.status))
+            self.__requests[key] = self.__requests.get(key, 0) + 1
+            self.__bytesSent[event.endpoint] = self.__bytesSent.get(event.endpoint, 0) + event.requestSize
+            self.__bytesReceived[event.endpoint] = self.__bytesReceived.get(event.endpoint, 0) + event.responseSize
+            histogram = self.__durations.get(event.endpoint)
+            if histogram is None:
+                histogram = self.__durations[event.endpoint] = Histogram(self.__requestBuckets)
+            histogram.observe(event.duration)
+
+    def onDecode(self, endpoint, format, duration):
+        with self.__lock:
+            histogram = self.__decodes.get((endpoint, format))
+            if histogram is None:
+                histogram = self.__decodes[(endpoint, format)] = Histogram(self.__decodeBuckets)
+            histogram.observe(duration)
+
+    def getRequestCount(self, endpoint=None):
+        with self.__lock:
+            return sum(count for (key, status), count in self.__requests.items() if endpoint in (None, key))
+
+    def getSummary(self):
+        """Gibt je Endpunkt Anzahl, Gesamt-, Durchschnitts- und Maximaldauer, Bytes und Dekodierzeit zurück."""
+        with self.__lock:
+            decodeTimes = {}
+            for (endpoint, format), histogram in self.__decodes.items():
+                decodeTimes[endpoint] = decodeTimes.get(endpoint, 0.0) + histogram.sum
+            summary = {}
+            for endpoint, histogram in self.__durations.items():
+                summary[endpoint] = {'requests': histogram.count,
+                                     'totalTime': histogram.sum,
+                                     'meanTime': histogram.sum / histogram.count,
+                                     'maxTime': histogram.max,
+                                     'bytesReceived': self.__bytesReceived.get(endpoint, 0),
+                                     'decodeTime': decodeTimes.get(endpoint, 0.0)}
+            return summary
+
+    def formatSummary(self):
+        """Übersicht aller Endpunkte, sortiert nach der insgesamt benötigten Zeit."""
+        summary = sorted(self.getSummary().items(), key=lambda item: item[1]['totalTime'], reverse=True)
+        lines = [f"{'endpoint'.ljust(45)} {'requests':>8} {'total s':>8} {'mean ms':>8} {'max ms':>8} "
+                 f"{'decode ms':>9} {'KiB':>8}"]
+        for endpoint, values in summary:
+            lines.append(f"{endpoint.ljust(45)} {values['requests']:8d} {values['totalTime']:8.3f} "
+                         f"{values['meanTime'] * 1000:8.1f} {values['maxTime'] * 1000:8.1f} "
+                         f"{values['decodeTime'] * 1000:9.1f} {values['bytesReceived'] / 1024:8.1f}")
+        return '\n'.join(lines)
+
+    def toPrometheus(self, prefix='wurzelbot'):
+        """Gibt alle Metriken im Textformat von Prometheus zurück."""
+        lines = []
+        with self.__lock:
+            lines += [f'# HELP {prefix}_http_requests_total Number of HTTP requests by endpoint and status.',
+                      f'# TYPE {prefix}_http_requests_total counter']
+            for (endpoint, status), count in sorted(self.__requests.items()):
+                lines.append(f'{prefix}_http_requests_total{{endpoint="{_escape(endpoint)}",status="{status}"}} {count}')
+
+            for name, values, help in (('http_request_bytes_total', self.__bytesSent, 'Bytes sent by endpoint.'),
+                                       ('http_response_bytes_total', self.__bytesReceived, 'Bytes received by endpoint.')):
+                lines += [f'# HELP {prefix}_{name} {help}', f'# TYPE {prefix}_{name} counter']
+                for endpoint, value in sorted(values.items()):
+                    lines.append(f'{prefix}_{name}{{endpoint="{_escape(endpoint)}"}} {value}')
+
+            lines += [f'# HELP {prefix}_http_request_duration_seconds Duration of HTTP requests by endpoint.',
+                      f'# TYPE {prefix}_http_request_duration_seconds histogram']
+            for endpoint, histogram in sorted(self.__durations.items()):
+                lines += _formatHistogram(f'{prefix}_http_request_duration_seconds',
+                                          f'endpoint="{_escape(endpoint)}"', histogram)
+
+            lines += [f'# HELP {prefix}_decode_duration_seconds Duration of decoding responses by endpoint and format.',
+                      f'# TYPE {prefix}_decode_duration_seconds histogram']
+            for (endpoint, format), histogram in sorted(self.__decodes.items()):
+                lines += _formatHistogram(f'{prefix}_decode_duration_seconds',
+                                          f'endpoint="{_escape(endpoint)}",format="{format}"', histogram)
+        return '\n'.join(lines) + '\n'
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _formatHistogram(name, labels, histogram):
+    lines = []
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+    return lines
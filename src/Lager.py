@@ -16,9 +16,12 @@ class Storage():
 
     def updateNumberInStock(self):
         """Aktualisiert den Lagerbestand für alle Produkte."""
+        self.setNumberInStock(self.__httpConn.getInventory())
+
+    def setNumberInStock(self, inventory):
+        """Übernimmt einen bereits vom Server gelesenen Lagerbestand."""
         self.__resetNumbersInStock()
 
-        inventory = self.__httpConn.getInventory()
         for i in inventory:
             self.__products[i] = inventory[i]
 
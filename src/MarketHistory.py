@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Lokaler Verlauf der Angebote auf dem Marktplatz.
+
+Jede Abfrage der Angebote eines Produkts wird als Momentaufnahme gespeichert: die Preisstufen
+mit der jeweils insgesamt angebotenen Menge. Die Datei wird nur angehängt und besteht aus einem
+Kopf und Datensätzen fester Größe (Zeitpunkt, Produkt, Preis in Hundertstel wT, Menge), je einem
+je Preisstufe; eine Momentaufnahme ohne Angebote wird als Datensatz mit Menge 0 gespeichert.
+
+Beim Öffnen wird die Datei einmal gelesen und je Produkt ein Index aufgebaut, sodass Abfragen
+über Zeitfenster (günstigster Preis, gleitender Durchschnitt) und die Suche nach Preislücken
+ohne Anfragen an den Server beantwortet werden.
+"""
+
+import bisect, logging, os, struct, threading, time
+
+MARKET_HISTORY_DIR     = 'cache'
+MARKET_HISTORY_MAGIC   = b'WBMH'
+MARKET_HISTORY_VERSION = 1
+
+_HEADER = struct.Struct('<4sH')
+_RECORD = struct.Struct('<dHII')    # Zeitpunkt, Produkt-ID, Preis in Hundertstel, Menge
+
+
+class _ProductHistory(object):
+    """Zeitlich sortierte Momentaufnahmen eines Produkts samt Präfixsummen der günstigsten Preise."""
+
+    def __init__(self):
+        self.timestamps = []
+        self.levels = []            # je Momentaufnahme Tupel von (Preis, Menge), aufsteigend nach Preis
+        self.cheapest = []          # günstigster Preis je Momentaufnahme oder None
+        self.__sums = [0.0]         # Präfixsummen der günstigsten Preise
+        self.__counts = [0]         # Präfixsummen der Momentaufnahmen mit Angeboten
+
+    def add(self, timestamp, levels):
+        cheapest = levels[0][0] if levels else None
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            # Nur bei Aufnahmen aus mehreren Prozessen möglich, daher genügt ein Neuaufbau
+            index = bisect.bisect_right(self.timestamps, timestamp)
+            self.timestamps.insert(index, timestamp)
+            self.levels.insert(index, levels)
+            self.cheapest.insert(index, cheapest)
+            self.__rebuildSums()
+            return
+        self.timestamps.append(timestamp)
+        self.levels.append(levels)
+        self.cheapest.append(cheapest)
+        self.__appendSum(cheapest)
+
+    def __appendSum(self, cheapest):
+        self.__sums.append(self.__sums[-1] + (cheapest or 0.0))
+        self.__counts.append(self.__counts[-1] + (cheapest is not None))
+
+    def __rebuildSums(self):
+        self.__sums = [0.0]
+        self.__counts = [0]
+        for cheapest in self.cheapest:
+            self.__appendSum(cheapest)
+
+    def getRange(self, start, end):
+        """Gibt die Indizes der Momentaufnahmen mit start <= Zeitpunkt <= end zurück."""
+        first = 0 if start is None else bisect.bisect_left(self.timestamps, start)
+        last = len(self.timestamps) if end is None else bisect.bisect_right(self.timestamps, end)
+        return first, last
+
+    def getSum(self, first, last):
+        """Gibt Summe und Anzahl der günstigsten Preise der Momentaufnahmen first bis last - 1 zurück."""
+        return self.__sums[last] - self.__sums[first], self.__counts[last] - self.__counts[first]
+
+
+class MarketHistory(object):
+    """Verlauf der Angebote je Produkt in einer Datei. Siehe Modulbeschreibung."""
+
+    def __init__(self, fileName, clock=time.time):
+        self.__fileName = fileName
+        self.__clock = clock
+        self.__logMarketHistory = logging.getLogger('bot.MarketHistory')
+        self.__lock = threading.Lock()
+        self.__products = {}        # Produkt-ID -> _ProductHistory
+        self.__file = None
+        self.__load()
+
+    def __load(self):
+        """Liest alle Momentaufnahmen und öffnet die Datei zum Anhängen."""
+        directory = os.path.dirname(self.__fileName)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(self.__fileName, 'a+b') as file:
+            file.seek(0)
+            content = file.read()
+
+            if len(content) < _HEADER.size or _HEADER.unpack_from(content) != (MARKET_HISTORY_MAGIC, MARKET_HISTORY_VERSION):
+                if content:
+                    self.__logMarketHistory.warning(f'{self.__fileName} hat ein unbekanntes Format und wird neu angelegt.')
+                file.truncate(0)
+                file.write(_HEADER.pack(MARKET_HISTORY_MAGIC, MARKET_HISTORY_VERSION))
+                content = b''
+            else:
+                # Ein beim Schreiben abgebrochener letzter Datensatz wird verworfen
+                valid = _HEADER.size + (len(content) - _HEADER.size) // _RECORD.size * _RECORD.size
+                if valid != len(content):
+                    file.truncate(valid)
+                content = memoryview(content)[_HEADER.size:valid]
+
+        key, levels = None, []
+        for timestamp, productID, price, amount in _RECORD.iter_unpack(content):
+            if (timestamp, productID) != key:
+                if key is not None:
+                    self.__getProduct(key[1]).add(key[0], tuple(levels))
+                key, levels = (timestamp, productID), []
+            if amount:
+                levels.append((price / 100, amount))
+        if key is not None:
+            self.__getProduct(key[1]).add(key[0], tuple(levels))
+
+        self.__file = open(self.__fileName, 'ab')
+
+    def __getProduct(self, productID):
+        history = self.__products.get(productID)
+        if history is None:
+            history = self.__products[productID] = _ProductHistory()
+        return history
+
+    def record(self, productID, offers, timestamp=None):
+        """
+        Speichert die vollständigen Angebote eines Produkts (Liste von [Anzahl, Preis]) als
+        Momentaufnahme zum Zeitpunkt timestamp (Standard: jetzt). Angebote gleichen Preises
+        werden zu einer Preisstufe zusammengefasst.
+        """
+        if timestamp is None:
+            timestamp = self.__clock()
+        productID = int(productID)
+        amounts = {}
+        for amount, price in offers:
+            cents = int(round(price * 100))
+            amounts[cents] = amounts.get(cents, 0) + int(amount)
+        cents = sorted(amounts)
+
+        records = b''.join(_RECORD.pack(timestamp, productID, price, amounts[price]) for price in cents) \
+                  or _RECORD.pack(timestamp, productID, 0, 0)
+        with self.__lock:
+            # Ein Schreibvorgang je Momentaufnahme, damit sie vollständig oder gar nicht in der Datei steht
+            self.__file.write(records)
+            self.__file.flush()
+            self.__getProduct(productID).add(timestamp, tuple((price / 100, amounts[price]) for price in cents))
+
+    def getProductIDs(self):
+        """Gibt die IDs aller Produkte mit mindestens einer Momentaufnahme zurück."""
+        with self.__lock:
+            return list(self.__products.keys())
+
+    def getLatestSnapshot(self, productID, maxAge=None):
+        """
+        Gibt die neueste Momentaufnahme eines Produkts als (Zeitpunkt, Preisstufen) zurück, wobei
+        die Preisstufen Tupel von (Preis, Menge) aufsteigend nach Preis sind. Ist keine vorhanden
+        oder ist sie älter als maxAge Sekunden, wird None zurückgegeben.
+        """
+        with self.__lock:
+            history = self.__products.get(int(productID))
+            if history is None or not history.timestamps:
+                return None
+            timestamp = history.timestamps[-1]
+            if maxAge is not None and self.__clock() - timestamp > maxAge:
+                return None
+            return timestamp, history.levels[-1]
+
+    def getSnapshots(self, productID, start=None, end=None):
+        """Gibt alle Momentaufnahmen eines Produkts mit start <= Zeitpunkt <= end als Liste von (Zeitpunkt, Preisstufen) zurück."""
+        with self.__lock:
+            history = self.__products.get(int(productID))
+            if history is None:
+                return []
+            first, last = history.getRange(start, end)
+            return list(zip(history.timestamps[first:last], history.levels[first:last]))
+
+    def __getWindow(self, productID, window, now):
+        history = self.__products.get(int(productID))
+        if history is None:
+            return None, 0, 0
+        if now is None:
+            now = self.__clock()
+        first, last = history.getRange(None if window is None else now - window, now)
+        return history, first, last
+
+    def getCheapestPrice(self, productID, window=None, now=None):
+        """
+        Gibt den günstigsten Preis eines Produkts in den letzten window Sekunden (ohne window im
+        gesamten Verlauf) zurück oder None, wenn es in diesem Zeitraum keine Angebote gab.
+        """
+        with self.__lock:
+            history, first, last = self.__getWindow(productID, window, now)
+            prices = [price for price in history.cheapest[first:last] if price is not None] if history else []
+            return min(prices, default=None)
+
+    def getMovingAverage(self, productID, window, now=None):
+        """
+        Gibt den Durchschnitt der günstigsten Preise aller Momentaufnahmen eines Produkts in den
+        letzten window Sekunden zurück oder None, wenn es in diesem Zeitraum keine Angebote gab.
+        """
+        with self.__lock:
+            history, first, last = self.__getWindow(productID, window, now)
+            if history is None:
+                return None
+            total, count = history.getSum(first, last)
+            return total / count if count else None
+
+    def findGaps(self, productID, factor=1.1, maxPrice=None, maxAge=None):
+        """
+        Ermittelt in der neuesten Momentaufnahme eines Produkts alle Lücken zwischen zwei
+        benachbarten Preisstufen, bei denen der höhere Preis den niedrigeren um mehr als factor
+        übersteigt, als Liste von [niedriger Preis, höherer Preis]. Preisstufen über maxPrice
+        werden nicht betrachtet. Gibt None zurück, wenn keine (ausreichend neue) Momentaufnahme vorliegt.
+        """
+        snapshot = self.getLatestSnapshot(productID, maxAge)
+        if snapshot is None:
+            return None
+        prices = [price for price, amount in snapshot[1] if maxPrice is None or price <= maxPrice]
+        return [[lower, higher] for lower, higher in zip(prices, prices[1:]) if higher / factor > lower]
+
+    def close(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
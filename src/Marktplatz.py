@@ -7,76 +7,136 @@ Created on 15.05.2019
 @author: MrFlamez
 '''
 
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+# Gültigkeitsdauer der zwischengespeicherten Liste handelbarer Produkte in Sekunden
+TRADEABLE_PRODUCTS_TTL = 60 * 60
+
 class Marketplace():
-    
-    def __init__(self, httpConnection):
+
+    def __init__(self, httpConnection, tradeableProductsTTL=TRADEABLE_PRODUCTS_TTL, clock=time.time, history=None):
+        """
+        Mit history (MarketHistory) wird jede vollständige Abfrage der Angebote eines Produkts
+        gespeichert, und Abfragen mit maxAge werden aus einer ausreichend neuen Momentaufnahme beantwortet.
+        """
         self.__httpConn = httpConnection
+        self.__history = history
         self.__tradeableProductIDs = None
-        
+        self.__tradeableProductsTTL = tradeableProductsTTL
+        self.__tradeableProductsExpiry = 0.0
+        self.__clock = clock
+        self.__lock = threading.Lock()
+
     def getAllTradableProducts(self):
         """
-        Gibt die IDs aller handelbaren Produkte zurück.
+        Gibt die IDs aller handelbaren Produkte zurück. Die Übersicht wird höchstens
+        alle tradeableProductsTTL Sekunden vom Server geladen.
         """
-        self.updateAllTradableProducts()
-        return self.__tradeableProductIDs
-    
+        with self.__lock:
+            if self.__tradeableProductIDs is None or self.__clock() >= self.__tradeableProductsExpiry:
+                self.updateAllTradableProducts()
+            return self.__tradeableProductIDs
+
     def updateAllTradableProducts(self):
+        """Lädt die Übersicht der handelbaren Produkte neu vom Server."""
         self.__tradeableProductIDs = self.__httpConn.getAllTradeableProductsFromOverview()
-    
-    def getCheapestOffer(self, id):
+        if self.__tradeableProductIDs is not None:
+            self.__tradeableProductIDs = frozenset(self.__tradeableProductIDs)
+            self.__tradeableProductsExpiry = self.__clock() + self.__tradeableProductsTTL
+
+    def setHistory(self, history):
+        self.__history = history
+
+    def getHistory(self):
+        return self.__history
+
+    def isProductTradeable(self, id):
+        tradeableProductIDs = self.getAllTradableProducts()
+        return tradeableProductIDs is not None and id in tradeableProductIDs
+
+    def getCheapestOffer(self, id, maxAge=None):
         """
-        Ermittelt das günstigste Angebot eines Produkts.
+        Ermittelt das günstigste Angebot eines Produkts. Dafür wird nur die erste Seite geladen,
+        mit maxAge gar keine, wenn der Verlauf eine höchstens maxAge Sekunden alte Momentaufnahme enthält.
         """
-        listOffers = self.getAllOffersOfProduct(id)
-        
-        if len(listOffers) >= 1 and listOffers != None:
-            return listOffers[0][1]
-        else: #No Offers
+        if maxAge is not None and self.__history is not None:
+            snapshot = self.__history.getLatestSnapshot(id, maxAge)
+            if snapshot is not None:
+                return snapshot[1][0][0] if snapshot[1] else None
+
+        try:
+            offer = next(self.iterOffersOfProduct(id), None)
+        except:
+            return None
+        if offer is None: #No Offers
             return None
+        return offer[1]
 
-    def getAllOffersOfProduct(self, id):
+    def iterOffersOfProduct(self, id, maxPrice=None):
         """
-        Ermittelt alle Angebote eines Produkts.
+        Liefert die Angebote eines Produkts als [Anzahl, Preis] aufsteigend nach Preis, Seite für Seite.
+        Mit maxPrice endet die Abfrage beim ersten teureren Angebot. Kann eine Seite nicht
+        geladen werden, wird der Fehler weitergereicht.
         """
-        self.updateAllTradableProducts()
-        
-        if self.__tradeableProductIDs != None \
-           and \
-           id in self.__tradeableProductIDs:
-
-            listOffers = self.__httpConn.getOffersFromProduct(id)
-        
-        else: #Product is not tradeable
-            listOffers = None
-            
-        return listOffers
-    
-    def findBigGapInProductOffers(self, id, npcPrice):
+        if not self.isProductTradeable(id):
+            return iter(())
+        return self.__httpConn.iterOffersFromProduct(id, maxPrice)
+
+    def getAllOffersOfProduct(self, id, maxPrice=None):
+        """
+        Ermittelt alle Angebote (bis maxPrice) eines Produkts.
+        Gibt None zurück, wenn das Produkt nicht handelbar ist. Im Verlauf wird nur gespeichert,
+        wenn alle Seiten geladen werden konnten.
+        """
+        if not self.isProductTradeable(id): #Product is not tradeable
+            return None
+        offers = []
+        try:
+            for offer in self.__httpConn.iterOffersFromProduct(id, maxPrice):
+                offers.append(offer)
+        except:
+            # Wie bisher werden die bis dahin geladenen Angebote zurückgegeben
+            return offers
+        if maxPrice is None and self.__history is not None:
+            self.__history.record(id, offers)
+        return offers
+
+    def getAllOffersOfProducts(self, ids, maxPrice=None, maxWorkers=4):
+        """
+        Ermittelt die Angebote (bis maxPrice) mehrerer Produkte gleichzeitig mit höchstens
+        maxWorkers parallelen Anfragen. Gibt ein dict Produkt-ID -> Angebote zurück, siehe getAllOffersOfProduct.
+        """
+        ids = list(ids)
+        self.getAllTradableProducts()
+        with ThreadPoolExecutor(max_workers=max(1, min(maxWorkers, len(ids)))) as executor:
+            listsOfOffers = executor.map(lambda id: self.getAllOffersOfProduct(id, maxPrice), ids)
+            return dict(zip(ids, listsOfOffers))
+
+    def findBigGapInProductOffers(self, id, npcPrice, maxAge=None):
         """
         Ermittelt eine große Lücke (> 10 %) zwischen den Angeboten und gibt diese zurück.
+        Angebote über dem NPC-Preis werden dafür nicht mehr geladen. Mit maxAge wird eine
+        höchstens maxAge Sekunden alte Momentaufnahme aus dem Verlauf verwendet, sofern vorhanden.
         """
-        
-        listOffers = self.getAllOffersOfProduct(id)
-        listPrices = []
+        maxPrice = npcPrice if id != 0 else None #id != 0: Coins nicht begrenzen
+        if maxAge is not None and self.__history is not None:
+            gaps = self.__history.findGaps(id, 1.1, maxPrice, maxAge)
+            if gaps is not None:
+                return gaps
+
+        listOffers = self.getAllOffersOfProduct(id, maxPrice)
 
         if (listOffers != None):
-            
+
             #Alle Preise in einer Liste sammeln
-            for element in listOffers:
-                listPrices.append(element[1])
-            
-            if (npcPrice != None and id != 0): #id != 0: Coins nicht sortieren
-                iList = range(0, len(listPrices))
-                iList.reverse()
-                for i in iList:
-                    if listPrices[i] > npcPrice:
-                        del listPrices[i]
-            
+            listPrices = [element[1] for element in listOffers]
+
             gaps = []
             #Zum Vergleich werden mindestens zwei Einträge benötigt.
             if (len(listPrices) >= 2):
                 for i in range(0, len(listPrices)-1):
                     if (((listPrices[i+1] / 1.1) - listPrices[i]) > 0.0):
                         gaps.append([listPrices[i], listPrices[i+1]])
-            
+
             return gaps
@@ -1,39 +1,162 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-class Note():
-    """Diese Daten-Klasse enthält alle wichtigen Informationen über die Notiz."""
+import hashlib, re, time
 
-    def __init__(self, httpConnection):
-        self._httpConn = httpConnection
+# Gültigkeitsdauer der zwischengespeicherten Notiz in Sekunden
+NOTE_TTL = 15 * 60
 
-    def getNote(self):
-      return self._httpConn.getNote()
+# Eine Regel je Zeile: <Name>: <Wert> bzw. <Name>(<Argument>): <Wert>
+RULE_PATTERN = re.compile(r'(\w+)\s*(?:\(([^)]*)\))?\s*:(.*)')
 
-    def getMinStock(self, plantName = None):
-      note = self.getNote()
-      note = note.replace('\r\n', '\n')
-      lines = note.split('\n')
+class NoteRules():
+    """
+    Die in der Notiz hinterlegten Regeln, einmalig ausgewertet und nach Produktname indiziert:
 
-      isPlantGiven = not plantName is None
-      for line in lines:
-        if line.strip() == '':
-          continue
+        minStock: 100                     Mindestbestand aller Produkte, wird nicht an Wimps verkauft
+        minStock(Karotte): 200            Mindestbestand eines Produkts
+        maxStock: 5000                    Höchstbestand: darüber wird nicht angepflanzt und nicht gekauft
+        maxStock(Salat): 1000             Höchstbestand eines Produkts
+        neverSell: Apfel, Kürbis          Produkte, die nie an Wimps verkauft werden
+        preferredCrops(1): Karotte, Salat Pflanzen, die bevorzugt in Garten 1 angebaut werden
+        wimpProfit: 90                    Mindestgewinn der Wimps in Prozent des NPC Preises
+        beeTour: 2                        Flugzeit der Bienen (1 = 2 Stunden, siehe BEE_TOURS)
+
+    Gilt eine Angabe mehrfach, zählt die erste. Produktnamen werden ohne Beachtung der
+    Groß- und Kleinschreibung verglichen.
+    """
 
-        if not isPlantGiven and line.startswith('minStock:'):
-          return self.__extractAmount(line, 'minStock:')
-        
-        if isPlantGiven and line.startswith(f'minStock({plantName}):'):
-          return self.__extractAmount(line, f'minStock({plantName}):')
+    def __init__(self, note=''):
+        self.__minStock = 0
+        self.__minStockByProduct = {}
+        self.__maxStock = None
+        self.__maxStockByProduct = {}
+        self.__neverSell = frozenset()
+        self.__preferredCropsByGarden = {}
+        self.__wimpProfit = None
+        self.__beeTour = None
+        self.__compile(note)
+
+    def __compile(self, note):
+      minStock = maxStock = neverSell = None
+      for line in note.replace('\r\n', '\n').split('\n'):
+        match = RULE_PATTERN.match(line.strip())
+        if match is None:
+          continue
 
-      # Return default 0 if not found in note
-      return 0
+        name, argument, value = match.groups()
+        key = None if argument is None else argument.strip().casefold()
+        if name == 'minStock':
+          if key is None:
+            if minStock is None:
+              minStock = self.__minStock = self.__extractAmount(value, 'minStock:')
+          elif key not in self.__minStockByProduct:
+            self.__minStockByProduct[key] = self.__extractAmount(value, f'minStock({argument}):')
+        elif name == 'maxStock':
+          if key is None:
+            if maxStock is None:
+              maxStock = self.__maxStock = self.__extractAmount(value, 'maxStock:')
+          elif key not in self.__maxStockByProduct:
+            self.__maxStockByProduct[key] = self.__extractAmount(value, f'maxStock({argument}):')
+        elif name == 'neverSell' and neverSell is None:
+          neverSell = self.__neverSell = frozenset(self.__extractNames(value))
+        elif name == 'preferredCrops' and key is not None:
+          try:
+            gardenID = int(key)
+          except ValueError:
+            print(f'Error: "preferredCrops({argument}):" must name a garden number')
+            continue
+          self.__preferredCropsByGarden.setdefault(gardenID, frozenset(self.__extractNames(value)))
+        elif name == 'wimpProfit' and self.__wimpProfit is None:
+          self.__wimpProfit = self.__extractAmount(value, 'wimpProfit:')
+        elif name == 'beeTour' and self.__beeTour is None:
+          self.__beeTour = self.__extractAmount(value, 'beeTour:')
 
-    def __extractAmount(self, line, prefix):
-      minStockStr = line.replace(prefix, '').strip()
-      minStockInt = 0
+    def __extractAmount(self, amountStr, prefix):
+      amount = 0
       try:
-        minStockInt = int(minStockStr)
+        amount = int(amountStr.strip())
       except:
         print(f'Error: "{prefix}" must be an int')
-      return minStockInt
\ No newline at end of file
+      return amount
+
+    def __extractNames(self, value):
+      return [name.strip().casefold() for name in value.split(',') if name.strip()]
+
+    def getMinStock(self, productName = None):
+      """Gibt den Mindestbestand insgesamt bzw. (mit productName) den des Produkts zurück, standardmäßig 0."""
+      if productName is None:
+        return self.__minStock
+      return self.__minStockByProduct.get(productName.casefold(), 0)
+
+    def getRequiredStock(self, productName):
+      """Gibt den für ein Produkt einzuhaltenden Mindestbestand zurück (der höhere aus beiden Angaben)."""
+      return max(self.__minStock, self.__minStockByProduct.get(productName.casefold(), 0))
+
+    def getMaxStock(self, productName):
+      """Gibt den Höchstbestand eines Produkts zurück oder None, wenn keiner festgelegt ist."""
+      return self.__maxStockByProduct.get(productName.casefold(), self.__maxStock)
+
+    def isNeverSell(self, productName):
+      return productName.casefold() in self.__neverSell
+
+    def getPreferredCrops(self, gardenID):
+      """Gibt die (kleingeschriebenen) Namen der in einem Garten bevorzugten Pflanzen zurück."""
+      return self.__preferredCropsByGarden.get(int(gardenID), frozenset())
+
+    def getPreferredCropsByGarden(self):
+      return dict(self.__preferredCropsByGarden)
+
+    def getWimpProfit(self, default = None):
+      return default if self.__wimpProfit is None else self.__wimpProfit
+
+    def getBeeTour(self, default = 1):
+      return default if self.__beeTour is None else self.__beeTour
+
+
+class Note():
+    """
+    Diese Daten-Klasse enthält alle wichtigen Informationen über die Notiz.
+    Die Notiz wird einmal geladen und bis zu invalidate bzw. höchstens ttl Sekunden
+    zwischengespeichert. Ihre Regeln (siehe NoteRules) werden nur neu ausgewertet,
+    wenn sich der Text geändert hat.
+    """
+
+    def __init__(self, httpConnection, ttl=NOTE_TTL, clock=time.monotonic):
+        self._httpConn = httpConnection
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__text = None
+        self.__hash = None
+        self.__expiry = 0.0
+        self.__rules = NoteRules()
+
+    def refresh(self):
+      """Lädt die Notiz neu vom Server und wertet geänderte Regeln aus."""
+      text = self._httpConn.getNote()
+      textHash = hashlib.sha256(text.encode('utf-8')).digest()
+      if textHash != self.__hash:
+        self.__rules = NoteRules(text)
+        self.__hash = textHash
+      self.__text = text
+      self.__expiry = self.__clock() + self.__ttl
+
+    def invalidate(self):
+      """Verwirft die zwischengespeicherte Notiz, z.B. zu Beginn eines Durchlaufs."""
+      self.__text = None
+
+    def __update(self):
+      if self.__text is None or self.__clock() >= self.__expiry:
+        self.refresh()
+
+    def getNote(self):
+      self.__update()
+      return self.__text
+
+    def getRules(self) -> NoteRules:
+      self.__update()
+      return self.__rules
+
+    def getMinStock(self, plantName = None):
+      """Gibt den Mindestbestand insgesamt bzw. der Pflanze plantName zurück, standardmäßig 0."""
+      return self.getRules().getMinStock(plantName)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Führt die Durchläufe mehrerer Accounts gleichzeitig in einem Prozess aus.
+
+Mit run wird für jeden Account ein Durchlauf ausgeführt, mit runDaemon werden die Accounts
+dauerhaft ereignisgesteuert bearbeitet (siehe Scheduler).
+
+Alle Bots teilen sich einen ConnectionPool je Host und einen RateLimiter, der die Anfragen
+aller Accounts zusammen begrenzt. Produktkatalog und NPC Preise werden je Server und Sprache
+nur einmal geladen und von allen Bots dieses Servers gemeinsam genutzt.
+"""
+
+import logging, threading, time, yaml
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from src.ConnectionPool import ConnectionPool
+from src.GardenPlanner import OBJECTIVE_FIELDS
+from src.Produktdaten import ProductData
+from src.RateLimiter import RateLimiter
+from src.Scheduler import Scheduler, AccountJobs
+from src.WurzelBot import WurzelBot
+
+Account = namedtuple('Account', 'server user password lang portal workers objective')
+
+ACCOUNT_DEFAULTS = {'lang': 'de', 'portal': False, 'workers': 1, 'objective': OBJECTIVE_FIELDS}
+
+AccountResult = namedtuple('AccountResult', 'account success duration error')
+
+def loadAccounts(fileName):
+    """
+    Liest die Accounts aus einer YAML-Datei der Form:
+
+        defaults:
+          lang: de
+        accounts:
+          - server: 12
+            user: FooBar
+            password: password1337
+          - server: 3
+            user: Baz
+            password: secret
+            portal: true
+            workers: 4
+
+    Unter defaults angegebene Werte gelten für alle Accounts ohne eigenen Wert.
+    """
+    with open(fileName, encoding='utf-8') as file:
+        content = yaml.safe_load(file) or {}
+
+    defaults = {**ACCOUNT_DEFAULTS, **(content.get('defaults') or {})}
+    accounts = []
+    for entry in content.get('accounts') or []:
+        values = {**defaults, **entry}
+        missing = [field for field in ('server', 'user', 'password') if values.get(field) is None]
+        if missing:
+            raise ValueError(f"Account {values.get('user')} in {fileName}: {', '.join(missing)} fehlt")
+        accounts.append(Account(server=int(values['server']), user=str(values['user']),
+                                password=str(values['password']), lang=values['lang'],
+                                portal=bool(values['portal']), workers=int(values['workers']),
+                                objective=values['objective']))
+    return accounts
+
+
+class Orchestrator(object):
+    """
+    Führt für eine Liste von Accounts je einen vollständigen Durchlauf (siehe WurzelBot.runCycle)
+    aus oder bearbeitet sie im Dauerbetrieb (runDaemon).
+    """
+
+    def __init__(self, accounts, maxConcurrent=4, requestsPerSecond=5.0, burst=None,
+                 maxConnectionsPerHost=4, baseURL=None, refreshProducts=False, delay=3, persistSessions=False):
+        """
+        maxConcurrent legt fest, wie viele Accounts gleichzeitig bearbeitet werden.
+        requestsPerSecond und burst bilden das gemeinsame Budget an Anfragen aller Accounts.
+        Mit persistSessions bleiben die Sessions nach run offen und werden beim nächsten Start übernommen.
+        """
+        self.__accounts = list(accounts)
+        self.__maxConcurrent = maxConcurrent
+        self.__baseURL = baseURL
+        self.__refreshProducts = refreshProducts
+        self.__delay = delay
+        self.__persistSessions = persistSessions
+        self.__logOrchestrator = logging.getLogger('bot.Orchestrator')
+        self.__pool = ConnectionPool(maxPerHost=maxConnectionsPerHost)
+        self.__rateLimiter = RateLimiter(requestsPerSecond, burst)
+        self.__productDataLock = threading.Lock()
+        self.__productData = {}     # (server, lang) -> ProductData
+        self.__scheduler = None
+
+    def __getProductData(self, account: Account):
+        """Gibt den gemeinsamen Produktkatalog für Server und Sprache des Accounts zurück."""
+        with self.__productDataLock:
+            key = (account.server, account.lang)
+            productData = self.__productData.get(key)
+            if productData is None:
+                productData = self.__productData[key] = ProductData()
+            return productData
+
+    def __createBot(self, account: Account):
+        return WurzelBot(maxWorkers=account.workers, baseURL=self.__baseURL, pool=self.__pool,
+                         rateLimiter=self.__rateLimiter, productData=self.__getProductData(account),
+                         persistSession=self.__persistSessions)
+
+    def __launchBot(self, bot, account: Account):
+        return bot.launchBot(account.server, account.user, account.password, account.lang,
+                             account.portal, self.__refreshProducts)
+
+    def __runAccount(self, account: Account):
+        start = time.perf_counter()
+        bot = self.__createBot(account)
+        try:
+            if not self.__launchBot(bot, account):
+                return AccountResult(account, False, time.perf_counter() - start, 'login failed')
+            try:
+                bot.runCycle(account.objective, self.__delay)
+            finally:
+                bot.exitBot()
+        except Exception as error:
+            self.__logOrchestrator.exception(f'Durchlauf für {account.user} auf Server {account.server} fehlgeschlagen')
+            return AccountResult(account, False, time.perf_counter() - start, repr(error))
+        return AccountResult(account, True, time.perf_counter() - start, None)
+
+    def run(self):
+        """Bearbeitet alle Accounts und gibt je Account ein AccountResult in der Reihenfolge der Accounts zurück."""
+        with ThreadPoolExecutor(max_workers=self.__maxConcurrent, thread_name_prefix='account') as executor:
+            return list(executor.map(self.__runAccount, self.__accounts))
+
+    def __launchAccount(self, account: Account):
+        """Meldet den Account an und gibt den Bot zurück, bei einem Fehler None."""
+        bot = self.__createBot(account)
+        try:
+            if self.__launchBot(bot, account):
+                return bot
+        except Exception:
+            self.__logOrchestrator.exception(f'Anmeldung von {account.user} auf Server {account.server} fehlgeschlagen')
+        return None
+
+    def runDaemon(self):
+        """
+        Meldet alle Accounts an und bearbeitet sie danach dauerhaft: Jede Aufgabe eines Accounts
+        läuft genau dann, wenn sie fällig ist, die Sessions bleiben dazwischen bestehen.
+        Läuft, bis stop aufgerufen wird. Gibt die Accounts zurück, deren Anmeldung fehlgeschlagen ist.
+        """
+        self.__scheduler = Scheduler(self.__maxConcurrent)
+        with ThreadPoolExecutor(max_workers=self.__maxConcurrent, thread_name_prefix='account') as executor:
+            bots = list(executor.map(self.__launchAccount, self.__accounts))
+
+        for account, bot in zip(self.__accounts, bots):
+            if bot is not None:
+                AccountJobs(bot, f'{account.user}@{account.server}', account.objective).register(self.__scheduler)
+        try:
+            self.__scheduler.run()
+        finally:
+            for bot in bots:
+                if bot is not None:
+                    bot.exitBot()
+        return [account for account, bot in zip(self.__accounts, bots) if bot is None]
+
+    def stop(self):
+        """Beendet runDaemon, sobald die gerade laufenden Aufgaben abgeschlossen sind."""
+        if self.__scheduler is not None:
+            self.__scheduler.stop()
+
+    def getStatistics(self):
+        """Gibt die Statistiken von Verbindungspool und Anfragebudget zurück."""
+        return {'pool': self.__pool.getStatistics(), 'rateLimiter': self.__rateLimiter.getStatistics()}
+
+    def close(self):
+        self.__pool.close()
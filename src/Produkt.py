@@ -7,19 +7,28 @@ Created on 23.01.2019
 @author: MrFlamez
 '''
 
-import datetime
+import datetime, sys
+
+def _toInt(value):
+    return None if value is None else int(value)
 
 class Product():
-    def __init__(self, id, cat, sx, sy, name, lvl, crop, plantable, time):
-        self.__id = id
-        self.__category = cat
-        self.__sx = sx
-        self.__sy = sy
-        self.__name = name.decode('UTF-8')
-        self.__level = lvl
-        self.__crop = crop
-        self.__isPlantable = plantable
-        self.__timeUntilHarvest = time
+    # Ohne __dict__ benötigt jedes Produkt deutlich weniger Speicher, was bei vielen
+    # Bot-Instanzen in einem Prozess ins Gewicht fällt.
+    __slots__ = ('__id', '__category', '__sx', '__sy', '__name', '__level', '__crop',
+                 '__isPlantable', '__timeUntilHarvest', '__priceNPC')
+
+    def __init__(self, id, cat, sx, sy, name: str, lvl, crop, plantable, time):
+        self.__id = int(id)
+        # Es gibt nur wenige Kategorien, daher teilen sich alle Produkte dieselben Strings
+        self.__category = None if cat is None else sys.intern(cat)
+        self.__sx = _toInt(sx)
+        self.__sy = _toInt(sy)
+        self.__name = name
+        self.__level = _toInt(lvl)
+        self.__crop = _toInt(crop)
+        self.__isPlantable = bool(plantable)
+        self.__timeUntilHarvest = _toInt(time)
         self.__priceNPC = None
         
     def getID(self):
@@ -40,6 +49,9 @@ class Product():
     def getSY(self):
         return self.__sy
     
+    def getTimeUntilHarvest(self):
+        return self.__timeUntilHarvest
+
     def getPriceNPC(self):
         return self.__priceNPC
     
@@ -53,7 +65,7 @@ class Product():
         return self.__category == "d"
 
     def setPriceNPC(self, price):
-        self.__priceNPC = price
+        self.__priceNPC = None if price is None else float(price)
         
     def printAll(self):
         # Show nothing instead of None
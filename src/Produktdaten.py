@@ -6,7 +6,7 @@ Created on 23.05.2019
 @author: MrFlamez
 '''
 
-import json
+import gzip, json, logging, os, threading, time
 from src.Produkt import Product
 
 CATEGORY_DECORATION       = 'd'
@@ -19,14 +19,60 @@ CATEGORY_COINS            = ''
 CATEGORY_ADORNMENTS       = 'z'
 CATEGORY_OTHER            = 'u'
 
+# Zwischenspeicher des Produktkatalogs je Server und Sprache
+CATALOGUE_CACHE_DIR     = 'cache'
+CATALOGUE_CACHE_VERSION = 1
+CATALOGUE_MAX_AGE       = 7 * 24 * 60 * 60
+
+# Reihenfolge der Attribute eines Produkts im Zwischenspeicher
+CATALOGUE_FIELDS = ('category', 'sx', 'sy', 'name', 'level', 'crop', 'plantable', 'time')
+
 class ProductData():
-    def __init__(self, httpConnection):
+    def __init__(self, httpConnection=None):
+        """
+        httpConnection wird zum Herunterladen des Katalogs verwendet. Teilen sich mehrere Bots
+        einen Katalog, übergibt jeder seine eigene Verbindung an initAllProducts bzw. initAllProductsOnce.
+        """
         self.__httpConn = httpConnection
+        self.__logProductData = logging.getLogger('bot.ProductData')
+        self.__lock = threading.RLock()
+        self.__initialized = False
+        self.__loadedFromCache = False
         self.__products = []
+        self.__productsByID = {}
+        self.__productsByName = {}
+        self.__productsByCategory = {}
+        self.__plantableIDs = frozenset()
+        self.__singleFieldPlantIDs = frozenset()
+        self.__singleFieldPlantNames = []
+
+    def __buildIndexes(self):
+        """Baut alle Indizes über die Produkte einmalig auf."""
+        self.__productsByID = {}
+        self.__productsByName = {}
+        self.__productsByCategory = {}
+        plantableIDs = set()
+        singleFieldPlantIDs = set()
+        self.__singleFieldPlantNames = []
+
+        for product in self.__products:
+            # Wie bei der bisherigen linearen Suche gilt bei gleichen Schlüsseln das erste Produkt
+            self.__productsByID.setdefault(int(product.getID()), product)
+            self.__productsByName.setdefault(product.getName().casefold(), product)
+            self.__productsByCategory.setdefault(product.getCategory(), []).append(product)
+
+            if not product.isPlant() or not product.isPlantable():
+                continue
+            plantableIDs.add(product.getID())
+            if product.getSX() == 1 and product.getSY() == 1:
+                singleFieldPlantIDs.add(product.getID())
+                self.__singleFieldPlantNames.append(product.getName())
+
+        self.__plantableIDs = frozenset(plantableIDs)
+        self.__singleFieldPlantIDs = frozenset(singleFieldPlantIDs)
     
-    def __setAllPricesOfNPC(self):
-        """Ermittelt alle möglichen NPC Preise und setzt diese in den Produkten."""
-        dNPC = self.__httpConn.getNPCPrices()
+    def __setAllPricesOfNPC(self, dNPC):
+        """Setzt alle NPC Preise (dict Produktname -> Preis) in den Produkten."""
         dNPCKeys = dNPC.keys()
         
         for product in self.__products:
@@ -39,59 +85,152 @@ class ProductData():
         coins.setPriceNPC((300.0))
 
     def getProductByID(self, id):
-        for product in self.__products:
-            if int(id) == int(product.getID()): return product
-        return None
+        return self.__productsByID.get(int(id))
 
     def getProductByName(self, name : str):
-        for product in self.__products:
-            if (name.lower() == product.getName().lower()): return product
-        return None
+        return self.__productsByName.get(name.casefold())
+
+    def getProductsByCategory(self, category):
+        """Gibt alle Produkte einer Kategorie (z.B. CATEGORY_VEGETABLES) zurück."""
+        return list(self.__productsByCategory.get(category, []))
 
     def getListOfAllProductIDs(self):
-        productIDList = []
-        for product in self.__products:
-            id = product.getID()
-            productIDList.append(id)
-            
-        return productIDList
+        return list(self.__productsByID.keys())
 
     def getListOfSingleFieldPlants(self):
-        singleFieldPlants = []
-        for product in self.__products:
-            if product.getSX() != 1 or product.getSY() != 1 \
-            or not product.isPlant() or not product.isPlantable():
-                continue
-        
-            singleFieldPlants.append(product.getName())
+        return list(self.__singleFieldPlantNames)
+
+    def isPlantableProduct(self, id):
+        """Prüft, ob das Produkt eine anbaubare Pflanze ist."""
+        return int(id) in self.__plantableIDs
+
+    def isSingleFieldPlant(self, id):
+        """Prüft, ob das Produkt eine anbaubare Pflanze ist, die genau ein Feld belegt."""
+        return int(id) in self.__singleFieldPlantIDs
 
-        return singleFieldPlants
+    def __getCacheFile(self, cacheKey):
+        return os.path.join(CATALOGUE_CACHE_DIR, f'products_{cacheKey}.json.gz')
 
-    def initAllProducts(self):
-        """Initialisiert alle Produkte."""
-        products = self.__httpConn.getAllProductInformations()
+    def __loadCatalogue(self, cacheKey, maxAge):
+        """
+        Lädt Produkte und NPC Preise aus dem Zwischenspeicher.
+        Gibt None zurück, wenn keiner vorhanden, er veraltet oder nicht lesbar ist.
+        """
+        cacheFile = self.__getCacheFile(cacheKey)
+        try:
+            # Prüfung über das Änderungsdatum, ohne die Datei zu lesen
+            if time.time() - os.path.getmtime(cacheFile) > maxAge:
+                return None
+            with gzip.open(cacheFile, 'rt', encoding='utf-8') as file:
+                catalogue = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if catalogue.get('version') != CATALOGUE_CACHE_VERSION:
+            return None
+
+        dictProducts = {key: dict(zip(CATALOGUE_FIELDS, values)) for key, values in catalogue['products'].items()}
+        return dictProducts, catalogue['npc']
+
+    def __saveCatalogue(self, cacheKey, dictProducts, dNPC):
+        """Speichert Produkte und NPC Preise kompakt im Zwischenspeicher."""
+        catalogue = {'version': CATALOGUE_CACHE_VERSION,
+                     'products': {key: [product[field] for field in CATALOGUE_FIELDS] for key, product in dictProducts.items()},
+                     'npc': dNPC}
+        cacheFile = self.__getCacheFile(cacheKey)
+        try:
+            os.makedirs(CATALOGUE_CACHE_DIR, exist_ok=True)
+            with gzip.open(cacheFile + '.tmp', 'wt', encoding='utf-8') as file:
+                json.dump(catalogue, file, separators=(',', ':'), ensure_ascii=False)
+            os.replace(cacheFile + '.tmp', cacheFile)
+        except OSError:
+            self.__logProductData.warning(f'Produktkatalog konnte nicht in {cacheFile} gespeichert werden.')
+
+    def __downloadCatalogue(self, httpConnection):
+        """Lädt alle Produkte und NPC Preise vom Server."""
+        products = httpConnection.getAllProductInformations()
         jProducts = json.loads(products)
-        dictProducts = dict(jProducts)
-        keys = dictProducts.keys()
-        keys = sorted(keys)
+        dictProducts = {}
         # Nicht genutzte Attribute: img, imgPhase, fileext, clear, edge, pieces, speedup_cooldown in Kategorie z
-        for key in keys:
+        for key, product in dict(jProducts).items():
             # 999 ist nur ein Testeintrag und wird nicht benötigt.
             if key == '999':
                 continue
-                
-            name = dictProducts[key]['name'].replace('&nbsp;', ' ')
-            self.__products.append(Product(id        = int(key), \
-                                           cat       = dictProducts[key]['category'], \
-                                           sx        = dictProducts[key]['sx'], \
-                                           sy        = dictProducts[key]['sy'], \
-                                           name      = name.encode('utf-8'), \
-                                           lvl       = dictProducts[key]['level'], \
-                                           crop      = dictProducts[key]['crop'], \
-                                           plantable = dictProducts[key]['plantable'], \
-                                           time      = dictProducts[key]['time']))
-                
-        self.__setAllPricesOfNPC()
+            dictProducts[key] = {field: product[field] for field in CATALOGUE_FIELDS}
+            dictProducts[key]['name'] = product['name'].replace('&nbsp;', ' ')
+
+        return dictProducts, httpConnection.getNPCPrices()
+
+    def initAllProducts(self, cacheKey=None, forceRefresh=False, maxAge=CATALOGUE_MAX_AGE, httpConnection=None):
+        """
+        Initialisiert alle Produkte.
+        Mit cacheKey (z.B. Server und Sprache) wird der Katalog zwischengespeichert und bei späteren
+        Starts wiederverwendet, solange er nicht älter als maxAge Sekunden ist oder forceRefresh gesetzt ist.
+        Ohne httpConnection wird die Verbindung aus dem Konstruktor verwendet.
+        Gibt True zurück, wenn der Katalog dabei über httpConnection vom Server geladen wurde.
+        """
+        with self.__lock:
+            return self.__initAllProducts(cacheKey, forceRefresh, maxAge, httpConnection or self.__httpConn)
+
+    def initAllProductsOnce(self, cacheKey=None, forceRefresh=False, maxAge=CATALOGUE_MAX_AGE, httpConnection=None):
+        """
+        Wie initAllProducts, lädt den Katalog aber nur, wenn er noch nicht initialisiert ist.
+        Threadsicher, sodass mehrere Bots desselben Servers und derselben Sprache einen Katalog teilen können.
+        """
+        with self.__lock:
+            if self.__initialized:
+                return False
+            return self.__initAllProducts(cacheKey, forceRefresh, maxAge, httpConnection or self.__httpConn)
+
+    def __initAllProducts(self, cacheKey, forceRefresh, maxAge, httpConnection):
+        catalogue = None
+        if cacheKey is not None and not forceRefresh:
+            catalogue = self.__loadCatalogue(cacheKey, maxAge)
+
+        self.__loadedFromCache = catalogue is not None
+        if catalogue is None:
+            catalogue = self.__downloadCatalogue(httpConnection)
+            if cacheKey is not None:
+                self.__saveCatalogue(cacheKey, *catalogue)
+        else:
+            self.__logProductData.info(f'Produktkatalog aus {self.__getCacheFile(cacheKey)} geladen.')
+
+        dictProducts, dNPC = catalogue
+        products = []
+        for key in sorted(dictProducts.keys()):
+            products.append(Product(id        = int(key), \
+                                    cat       = dictProducts[key]['category'], \
+                                    sx        = dictProducts[key]['sx'], \
+                                    sy        = dictProducts[key]['sy'], \
+                                    name      = dictProducts[key]['name'], \
+                                    lvl       = dictProducts[key]['level'], \
+                                    crop      = dictProducts[key]['crop'], \
+                                    plantable = dictProducts[key]['plantable'], \
+                                    time      = dictProducts[key]['time']))
+
+        self.__products = products
+        self.__buildIndexes()
+        self.__setAllPricesOfNPC(dNPC)
+        self.__initialized = True
+        return not self.__loadedFromCache
+
+    def isInitialized(self):
+        """Gibt zurück, ob der Produktkatalog bereits geladen wurde."""
+        return self.__initialized
+
+    def isLoadedFromCache(self):
+        """Gibt zurück, ob der Produktkatalog aus dem Zwischenspeicher stammt."""
+        return self.__loadedFromCache
+
+    def containsAllProducts(self, productIDs):
+        """
+        Prüft, ob alle productIDs (z.B. aus dem Lager) im Katalog enthalten sind.
+        Fehlt eines, ist ein zwischengespeicherter Katalog veraltet.
+        """
+        for productID in productIDs:
+            if int(productID) not in self.__productsByID:
+                return False
+        return True
 
     def printAll(self):
         sortedProducts = sorted(self.__products, key=lambda x:x.getName().lower())
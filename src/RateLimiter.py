@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading, time
+
+class RateLimiter(object):
+    """
+    Begrenzt die Anzahl der Anfragen je Sekunde über einen Token-Bucket. Eine Instanz kann
+    von mehreren HTTPConnection-Instanzen (Accounts) gemeinsam genutzt werden und bildet
+    dann ein gemeinsames Budget für alle.
+
+    Der Bucket füllt sich mit rate Token je Sekunde bis höchstens burst. Jede Anfrage
+    verbraucht ein Token; ist keines vorhanden, wartet sie, bis ihr Token nachgefüllt ist.
+    Wartende Anfragen reservieren ihr Token vorab, sodass sie in der Reihenfolge ihres
+    Eintreffens gesendet werden.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError('rate muss größer als 0 sein')
+        self.__rate = float(rate)
+        self.__capacity = float(burst if burst is not None else max(1.0, rate))
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__lock = threading.Lock()
+        self.__tokens = self.__capacity
+        self.__updated = clock()
+        self.__requests = 0
+        self.__waits = 0
+        self.__waitTime = 0.0
+
+    def acquire(self):
+        """Verbraucht ein Token und wartet, falls nötig. Gibt die Wartezeit in Sekunden zurück."""
+        with self.__lock:
+            now = self.__clock()
+            self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated) * self.__rate)
+            self.__updated = now
+            self.__tokens -= 1
+            wait = -self.__tokens / self.__rate if self.__tokens < 0 else 0.0
+            self.__requests += 1
+            if wait > 0:
+                self.__waits += 1
+                self.__waitTime += wait
+
+        if wait > 0:
+            self.__sleep(wait)
+        return wait
+
+    def getStatistics(self):
+        """Gibt die Anzahl der Anfragen, davon verzögerte, und die gesamte Wartezeit zurück."""
+        with self.__lock:
+            return {'requests': self.__requests, 'waits': self.__waits, 'waitTime': self.__waitTime}
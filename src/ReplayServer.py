@@ -0,0 +1,730 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Lokaler Ersatz für die Spielserver, mit dem der Bot ohne Spielkonto und ohne Netzwerk
+ausgeführt werden kann.
+
+Statische Antworten (Produktkatalog, NPC-Preise, Statistik, Bienen- und Bonsaifarm, ...)
+stammen aus den JSON-Dateien in fixtures/ und haben das Format der Spielserver.
+Gärten, Wassergarten, Lager, Wimps und Kontostand werden im Speicher gehalten und von
+den Anfragen des Bots verändert, sodass ein kompletter Durchlauf (Unkraut, Ernte,
+Anpflanzen, Gießen, Wimps) reproduzierbar nachgestellt werden kann.
+
+Beispiel:
+    server = ReplayServer(latency=0.05, gardens=3, aquaGarden=True)
+    baseURL = server.start()
+    bot = WurzelBot(baseURL=baseURL)
+"""
+
+import copy, html, json, os, random, secrets, threading, time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from src.FieldBitmap import MAX_FIELDS, getFootprintFields, getFootprintMask
+from src.Honig import BEE_TOURS
+
+FIXTURE_DIR = 'fixtures'
+
+# 41 Unkraut, 42 Baumstumpf, 43 Stein, 45 Maulwurf und die Kosten für das Entfernen
+WEED_COSTS = {41: 2.5, 42: 25.0, 43: 50.0, 45: 100.0}
+
+SESSION_LIFETIME = 7200
+OFFERS_PER_PAGE = 20
+
+def loadFixtures(directory=FIXTURE_DIR):
+    """Lädt alle Fixtures aus directory als dict Dateiname (ohne .json) -> Inhalt."""
+    fixtures = {}
+    for fileName in sorted(os.listdir(directory)):
+        if not fileName.endswith('.json'):
+            continue
+        with open(os.path.join(directory, fileName), encoding='utf-8') as file:
+            fixtures[fileName[:-5]] = json.load(file)
+    return fixtures
+
+def _formatAmount(value):
+    """Formatiert einen Betrag wie das Spiel, z.B. 1234.5 -> '1.234,50'."""
+    return f'{value:,.2f}'.replace(',', ' ').replace('.', ',').replace(' ', '.')
+
+
+class ReplayGarden(object):
+    """Veränderlicher Zustand eines Gartens auf dem ReplayServer."""
+
+    def __init__(self, gardenID):
+        self.gardenID = gardenID
+        self.plants = {}    # Ankerfeld -> [productID, sx, sy, harvest, water]
+        self.weeds = {}     # fieldID -> [weedID, Kosten]
+        self.occupied = {}  # fieldID -> Ankerfeld
+
+    def canPlant(self, fieldID, sx, sy):
+        if not 1 <= fieldID <= MAX_FIELDS or getFootprintMask(fieldID, sx, sy) == 0:
+            return False
+        for field in getFootprintFields(fieldID, sx, sy):
+            if field in self.occupied or field in self.weeds:
+                return False
+        return True
+
+    def plant(self, fieldID, productID, sx, sy, harvest, water=0):
+        if not self.canPlant(fieldID, sx, sy):
+            return False
+        self.plants[fieldID] = [productID, sx, sy, harvest, water]
+        for field in getFootprintFields(fieldID, sx, sy):
+            self.occupied[field] = fieldID
+        return True
+
+    def water(self, fieldID, now):
+        anchor = self.occupied.get(fieldID)
+        if anchor is None:
+            return False
+        self.plants[anchor][4] = now
+        return True
+
+    def harvest(self, now):
+        """Entfernt alle reifen Pflanzen und gibt dict productID -> Anzahl Pflanzen zurück."""
+        harvested = {}
+        for anchor, (productID, sx, sy, harvest, water) in list(self.plants.items()):
+            if harvest > now:
+                continue
+            del self.plants[anchor]
+            for field in getFootprintFields(anchor, sx, sy):
+                del self.occupied[field]
+            harvested[productID] = harvested.get(productID, 0) + 1
+        return harvested
+
+    def toJSON(self):
+        """Gibt den Garten im Format von ajax.php?do=changeGarden zurück."""
+        garden = {}
+        water = []
+        for fieldID in range(1, MAX_FIELDS + 1):
+            waterTime = 0
+            if fieldID in self.weeds:
+                weedID, cost = self.weeds[fieldID]
+                garden[str(fieldID)] = [weedID, 0, 0, 0, 0, 0, cost, 0, 0, '1x1', 0]
+            elif fieldID in self.occupied:
+                productID, sx, sy, harvest, waterTime = self.plants[self.occupied[fieldID]]
+                garden[str(fieldID)] = [productID, 0, 0, harvest, waterTime, 0, 0, 0, 0, f'{sx}x{sy}', productID]
+            else:
+                garden[str(fieldID)] = [0, 0, 0, 0, 0, 0, 0, 0, 0, '1x1', 0]
+            water.append([fieldID, str(waterTime)])
+
+        grow = [[anchor, plant[0]] for anchor, plant in sorted(self.plants.items())]
+        return {'status': 'ok', 'garden': garden, 'grow': grow, 'water': water}
+
+
+class ReplayGame(object):
+    """
+    Spielzustand eines Accounts und Verarbeitung aller Anfragen, die der Bot sendet.
+    Die Form des Accounts (Anzahl Gärten, Wassergarten, Bienen- und Bonsaifarm) ist
+    einstellbar; mit gleichem seed entstehen immer dieselben Gärten.
+    """
+
+    def __init__(self, fixtures, gardens=1, aquaGarden=False, honeyFarm=False, bonsaiFarm=False,
+                 seed=0, sessionLifetime=SESSION_LIFETIME, clock=time.time):
+        self.baseURL = ''
+        self.__fixtures = fixtures
+        self.__honeyFarm = honeyFarm
+        self.__bonsaiFarm = bonsaiFarm
+        self.__sessionLifetime = sessionLifetime
+        self.__clock = clock
+        self.__lock = threading.RLock()
+        self.__sessions = {}
+
+        account = fixtures['account']
+        self.__userID = str(account['userID'])
+        self.__userName = None
+        self.__products = {int(key): value for key, value in fixtures['data_products'].items()}
+        self.__npcPrices = {name: self.__parsePrice(price) for name, price in fixtures['hilfe_item2']['rows']}
+        self.__inventory = {int(key): int(value) for key, value in account['inventory'].items()}
+        self.__bar = float(fixtures['menu-update']['bar_unformat'])
+        self.__coins = int(fixtures['menu-update']['coins'])
+        self.__dailyLoginBonus = copy.deepcopy(fixtures['menu-update']['dailyloginbonus'])
+        self.__hives = copy.deepcopy(fixtures['bees_init']['data']['data']['hives'])
+        self.__bonsaiSlots = copy.deepcopy(fixtures['bonsai_init']['data']['data']['slots'])
+        self.__note = fixtures['notiz']['text']
+
+        rnd = random.Random(seed)
+        now = int(self.__clock())
+        self.__gardens = {}
+        self.__wimps = {}
+        for gardenID in range(1, gardens + 1):
+            self.__gardens[gardenID] = self.__generateGarden(gardenID, 'v', rnd, now)
+            self.__wimps[gardenID] = self.__generateWimps(gardenID, account['wimpsPerGarden'], rnd)
+        self.__aquaGarden = self.__generateGarden(101, 'w', rnd, now) if aquaGarden else None
+
+    def __parsePrice(self, price):
+        price = price[:-3].replace('.', '').replace(',', '.').strip()
+        return float(price) if price else None
+
+    def __getPlantIDs(self, category):
+        return [productID for productID, product in sorted(self.__products.items())
+                if product['category'] == category and product['plantable'] == 1]
+
+    def __generateGarden(self, gardenID, category, rnd, now):
+        """Erzeugt einen teilweise bepflanzten Garten mit Unkraut, reifen und wachsenden Pflanzen."""
+        garden = ReplayGarden(gardenID)
+        plantIDs = self.__getPlantIDs(category)
+        for fieldID in range(1, MAX_FIELDS + 1):
+            if fieldID in garden.occupied:
+                continue
+            roll = rnd.random()
+            if roll < 0.06:
+                weedID = rnd.choice(list(WEED_COSTS))
+                garden.weeds[fieldID] = [weedID, WEED_COSTS[weedID]]
+            elif roll < 0.6:
+                productID = rnd.choice(plantIDs)
+                product = self.__products[productID]
+                harvest = now + rnd.randint(-3600, product['time'])
+                water = rnd.choice([0, now - rnd.randint(0, 2 * 24 * 60 * 60)])
+                garden.plant(fieldID, productID, product['sx'], product['sy'], harvest, water)
+        return garden
+
+    def __generateWimps(self, gardenID, numberOfWimps, rnd):
+        """Erzeugt Wimps, die Produkte aus dem Lager zu etwa dem NPC-Preis kaufen möchten."""
+        productIDs = [productID for productID in self.__getPlantIDs('v') if self.__inventory.get(productID, 0) >= 10]
+        wimps = {}
+        for i in range(numberOfWimps):
+            products = {}
+            npcSum = 0.0
+            for productID in rnd.sample(productIDs, min(len(productIDs), rnd.randint(1, 3))):
+                amount = rnd.randint(2, min(40, self.__inventory[productID] // 4))
+                products[productID] = amount
+                npcSum += (self.__npcPrices.get(self.__products[productID]['name']) or 0.0) * amount
+            wimpID = str(gardenID * 100000 + 1000 + i)
+            wimps[wimpID] = {'sum': round(npcSum * rnd.uniform(0.8, 1.3), 2), 'products': products}
+        return wimps
+
+    def getGarden(self, gardenID):
+        """Gibt den ReplayGarden gardenID zurück (101 ist der Wassergarten)."""
+        return self.__aquaGarden if gardenID == 101 else self.__gardens[gardenID]
+
+    def getInventory(self):
+        return dict(self.__inventory)
+
+    def getBar(self):
+        return self.__bar
+
+    def setNote(self, text):
+        """Ändert den Text der Notiz, z.B. um Regeln in der Notiz zu testen."""
+        with self.__lock:
+            self.__note = text
+
+    def handle(self, method, path, query, cookie):
+        """
+        Verarbeitet eine Anfrage und gibt (status, headers, content) zurück.
+        query enthält die Parameter aus URL und Formular als dict name -> Liste der Werte.
+        """
+        with self.__lock:
+            if path == 'dispatch.php':
+                return self.__logIn(query)
+            if path == 'portal/game2port_login.php':
+                return self.__logInPortal(query)
+            if path == 'logw.php':
+                return self.__openSession(query)
+
+            session = self.__getSession(cookie)
+            if session is None:
+                return self.__redirect(self.baseURL)
+
+            if path == 'ajax/ajax.php':
+                handler = getattr(self, '_ajax_' + self.__getParam(query, 'do', ''), None)
+            else:
+                handler = self.__ROUTES.get(path)
+                handler = None if handler is None else getattr(self, handler)
+            if handler is None:
+                return 404, {'Content-Type': 'text/plain'}, b'not found'
+            return handler(session, method, query)
+
+    # Antworten
+    def __json(self, data):
+        return 200, {'Content-Type': 'application/json; charset=utf-8'}, json.dumps(data).encode('utf-8')
+
+    def __html(self, text):
+        return 200, {'Content-Type': 'text/html; charset=utf-8'}, text.encode('utf-8')
+
+    def __redirect(self, location, cookies=()):
+        headers = {'Location': location}
+        if cookies:
+            headers['Set-Cookie'] = list(cookies)
+        return 302, headers, b''
+
+    def __getParam(self, query, name, default=None):
+        values = query.get(name)
+        return values[0] if values else default
+
+    # Login und Session
+    def __logIn(self, query):
+        self.__userName = self.__getParam(query, 'user', 'ReplayUser')
+        token = secrets.token_hex(16)
+        server = self.__getParam(query, 'server', 'server1')
+        return self.__json({'status': 'ok', 'url': f'{self.baseURL}logw.php?s={server}&token={token}'})
+
+    def __logInPortal(self, query):
+        self.__userName = self.__getParam(query, 'portname', 'ReplayUser')
+        token = secrets.token_hex(16)
+        unr = f'{int(self.__userID):06x}'
+        portunr = f'{int(self.__userID):07x}'
+        return self.__redirect(f'{self.baseURL}portal/port_logw.php?token={token}&portunr={portunr}&unr={unr}&port=1')
+
+    def __openSession(self, query):
+        sessionID = secrets.token_hex(13)
+        self.__sessions[sessionID] = {'token': secrets.token_hex(16),
+                                      'garden': None,
+                                      'expires': self.__clock() + self.__sessionLifetime}
+        userID = self.__getParam(query, 'unr', self.__userID)
+        return self.__redirect(f'{self.baseURL}main.php?page=garden',
+                               [f'PHPSESSID={sessionID}; path=/', f'wunr={userID}; path=/'])
+
+    def __getSession(self, cookie):
+        if 'PHPSESSID' not in cookie:
+            return None
+        session = self.__sessions.get(cookie['PHPSESSID'].value)
+        if session is None:
+            return None
+        if session['expires'] < self.__clock():
+            del self.__sessions[cookie['PHPSESSID'].value]
+            return None
+        session['id'] = cookie['PHPSESSID'].value
+        return session
+
+    def _main(self, session, method, query):
+        page = self.__getParam(query, 'page')
+        if page == 'logout':
+            self.__sessions.pop(session['id'], None)
+            return self.__redirect(self.baseURL, ['PHPSESSID=deleted; expires=Thu, 01-Jan-1970 00:00:01 GMT; path=/'])
+        products = json.dumps(self.__fixtures['data_products'], ensure_ascii=False)
+        return self.__html(f'<html><head><script type="text/javascript">ajax.setToken("{session["token"]}");'
+                           f'var data_products = {products};var data_garden = null;</script></head>'
+                           f'<body><div id="garden"></div></body></html>')
+
+    # Gärten
+    def __getCurrentGarden(self, session):
+        gardenID = session['garden']
+        return None if gardenID is None else self.__gardens.get(gardenID)
+
+    def _ajax_changeGarden(self, session, method, query):
+        gardenID = int(self.__getParam(query, 'garden', 0))
+        if gardenID not in self.__gardens:
+            return self.__json({'status': 'error', 'message': 'Garten nicht vorhanden'})
+        session['garden'] = gardenID
+        return self.__json(self.__gardens[gardenID].toJSON())
+
+    def __harvest(self, garden):
+        harvested = garden.harvest(int(self.__clock()))
+        if not harvested:
+            return self.__json({'status': 'error', 'message': 'Es gibt nichts zu ernten.'})
+        msg = ''
+        for productID, plants in sorted(harvested.items()):
+            amount = plants * self.__products[productID]['crop']
+            self.__inventory[productID] = self.__inventory.get(productID, 0) + amount
+            msg += f'<div>{amount}&nbsp;{self.__products[productID]["name"]}</div>'
+        return self.__json({'status': 'ok', 'harvestMsg': msg})
+
+    def _ajax_gardenHarvestAll(self, session, method, query):
+        garden = self.__getCurrentGarden(session)
+        if garden is None:
+            return self.__json({'status': 'error', 'message': 'Kein Garten ausgewählt'})
+        return self.__harvest(garden)
+
+    def _water(self, session, method, query):
+        garden = self.__gardens.get(int(self.__getParam(query, 'garden', 0)))
+        if garden is None:
+            return self.__html('success: 0')
+        now = int(self.__clock())
+        for fieldID in query.get('feld[]', []):
+            if not garden.water(int(fieldID), now):
+                return self.__html('success: 0')
+        return self.__html('success: 1')
+
+    def __plant(self, garden, placements):
+        """
+        Pflanzt alle placements [(fieldID, productID), ...] an. Ist eine davon nicht möglich,
+        wird keine angepflanzt.
+        """
+        needed = {}
+        freeCheck = ReplayGarden(garden.gardenID)
+        freeCheck.occupied = dict(garden.occupied)
+        freeCheck.weeds = garden.weeds
+        for fieldID, productID in placements:
+            product = self.__products.get(productID)
+            if product is None or product['plantable'] != 1:
+                return False
+            if not freeCheck.plant(fieldID, productID, product['sx'], product['sy'], 0):
+                return False
+            needed[productID] = needed.get(productID, 0) + 1
+        for productID, amount in needed.items():
+            if self.__inventory.get(productID, 0) < amount:
+                return False
+
+        now = int(self.__clock())
+        for fieldID, productID in placements:
+            product = self.__products[productID]
+            garden.plant(fieldID, productID, product['sx'], product['sy'], now + product['time'])
+            self.__inventory[productID] -= 1
+        return True
+
+    def _grow(self, session, method, query):
+        garden = self.__gardens.get(int(self.__getParam(query, 'garden', 0)))
+        if garden is None:
+            return self.__html('success: 0')
+        placements = [(int(fieldID), int(productID))
+                      for fieldID, productID in zip(query.get('feld[]', []), query.get('pflanze[]', []))]
+        return self.__html('success: 1' if self.__plant(garden, placements) else 'success: 0')
+
+    def _removeWeed(self, session, method, query):
+        garden = self.__getCurrentGarden(session)
+        fieldID = int(self.__getParam(query, 'tile', 0))
+        if garden is None or fieldID not in garden.weeds or self.__bar < garden.weeds[fieldID][1]:
+            return self.__json({'success': 0})
+        self.__bar -= garden.weeds.pop(fieldID)[1]
+        return self.__json({'success': 1})
+
+    # Wassergarten
+    def _ajax_watergardenGetGarden(self, session, method, query):
+        if self.__aquaGarden is None:
+            return self.__json({'status': 'error', 'message': 'Kein Wassergarten vorhanden'})
+        return self.__json(self.__aquaGarden.toJSON())
+
+    def _ajax_watergardenCache(self, session, method, query):
+        if self.__aquaGarden is None:
+            return self.__json({'status': 'error', 'message': 'Kein Wassergarten vorhanden'})
+        placements = [(int(name[6:-1]), int(values[0])) for name, values in query.items() if name.startswith('plant[')]
+        if placements and not self.__plant(self.__aquaGarden, placements):
+            return self.__json({'status': 'error', 'message': 'Anpflanzen nicht möglich'})
+        now = int(self.__clock())
+        for fieldID in query.get('water[]', []):
+            self.__aquaGarden.water(int(fieldID), now)
+        return self.__json({'status': 'ok'})
+
+    def _ajax_watergardenHarvestAll(self, session, method, query):
+        if self.__aquaGarden is None:
+            return self.__json({'status': 'error', 'message': 'Kein Wassergarten vorhanden'})
+        return self.__harvest(self.__aquaGarden)
+
+    # Spieler, Statistik und Lager
+    def __getUserData(self):
+        userData = copy.deepcopy(self.__fixtures['menu-update'])
+        userData.update({'bar': f'{_formatAmount(self.__bar)} wT',
+                         'bar_unformat': round(self.__bar, 2),
+                         'coins': self.__coins,
+                         'time': int(self.__clock()),
+                         'dailyloginbonus': copy.deepcopy(self.__dailyLoginBonus)})
+        return userData
+
+    def _menuUpdate(self, session, method, query):
+        return self.__json(self.__getUserData())
+
+    def _ajax_statsGetStats(self, session, method, query):
+        if self.__getParam(query, 'which', '0') != '0':
+            return self.__json(self.__fixtures['statsGetStats_ranking'])
+        stats = copy.deepcopy(self.__fixtures['statsGetStats'])
+        stats['table'] = [row.replace('{userName}', html.escape(self.__userName or 'ReplayUser'))
+                             .replace('{gardens}', str(len(self.__gardens))) for row in stats['table']]
+        return self.__json(stats)
+
+    def _ajax_citymap_init(self, session, method, query):
+        citymap = copy.deepcopy(self.__fixtures['citymap_init'])
+        location = citymap['data']['location']
+        location['bees']['bought'] = 1 if self.__honeyFarm else 0
+        if self.__bonsaiFarm:
+            location['bonsai']['bought'] = 1
+        else:
+            location.pop('bonsai', None)
+        return self.__json(citymap)
+
+    def _achievements(self, session, method, query):
+        achievements = copy.deepcopy(self.__fixtures['achievements'])
+        if self.__aquaGarden is None:
+            # Nicht erreichte Errungenschaften werden grau dargestellt
+            achievements['html'] = achievements['html'].replace('trophy_54.png);"', 'trophy_54.png); filter:gray"')
+        return self.__json(achievements)
+
+    def _inventory(self, session, method, query):
+        products = {str(productID): amount for productID, amount in sorted(self.__inventory.items()) if amount > 0}
+        return self.__json({'status': 'ok', 'produkte': products})
+
+    def _ajax_dailyloginbonus_getreward(self, session, method, query):
+        reward = self.__dailyLoginBonus['data']['rewards'].get(self.__getParam(query, 'day', ''))
+        if reward is None or 'done' in reward:
+            return self.__json({'status': 'error', 'message': 'Bonus bereits abgeholt'})
+        self.__bar += reward.get('money', 0)
+        for productID, amount in reward.get('products', {}).items():
+            self.__inventory[int(productID)] = self.__inventory.get(int(productID), 0) + amount
+        reward['done'] = 1
+        return self.__json({'status': 'ok'})
+
+    # Wimps
+    def _wimps(self, session, method, query):
+        action = self.__getParam(query, 'do')
+        garden = self.__getCurrentGarden(session)
+        if garden is None:
+            return self.__json({'status': 'error', 'message': 'Kein Garten ausgewählt'})
+        wimps = self.__wimps[garden.gardenID]
+
+        if action == 'getAreaData':
+            sheets = [{'sheet': {'id': wimpID, 'sum': wimp['sum'],
+                                 'products': [{'pid': productID, 'amount': amount}
+                                              for productID, amount in wimp['products'].items()]}}
+                      for wimpID, wimp in wimps.items()]
+            return self.__json({'status': 'ok', 'wimps': sheets})
+
+        wimpID = self.__getParam(query, 'id')
+        if wimpID not in wimps:
+            return self.__json({'status': 'error', 'message': 'Wimp nicht vorhanden'})
+        if action == 'decline':
+            del wimps[wimpID]
+            return self.__json({'status': 'ok', 'action': 'decline'})
+        if action == 'accept':
+            wimp = wimps[wimpID]
+            for productID, amount in wimp['products'].items():
+                if self.__inventory.get(productID, 0) < amount:
+                    return self.__json({'status': 'error', 'message': 'Nicht genügend Produkte'})
+            for productID, amount in wimp['products'].items():
+                self.__inventory[productID] -= amount
+            self.__bar += wimp['sum']
+            del wimps[wimpID]
+            return self.__json({'status': 'ok', 'newProductCounts': {str(productID): self.__inventory[productID]
+                                                                     for productID in wimp['products']}})
+        return self.__json({'status': 'error', 'message': 'Unbekannte Aktion'})
+
+    # Bienen- und Bonsaifarm
+    def _ajax_bees_init(self, session, method, query):
+        bees = copy.deepcopy(self.__fixtures['bees_init'])
+        bees['data']['data']['hives'] = copy.deepcopy(self.__hives)
+        return self.__json(bees)
+
+    def _ajax_bees_startflight(self, session, method, query):
+        hive = self.__hives.get(self.__getParam(query, 'id', ''))
+        if hive is None or 'blocked' in hive:
+            return self.__json({'status': 'error', 'message': 'Bienenstock nicht verfügbar'})
+        tour = BEE_TOURS.get(int(self.__getParam(query, 'tour', 1)))
+        if tour is None:
+            return self.__json({'status': 'error', 'message': 'Unbekannte Flugzeit'})
+        hive['time'] = int(self.__clock()) + tour
+        return self.__json({'status': 'ok'})
+
+    def _ajax_bees_fill(self, session, method, query):
+        return self.__json({'status': 'ok'})
+
+    def _ajax_bees_changehiveproduct(self, session, method, query):
+        hive = self.__hives.get(self.__getParam(query, 'id', ''))
+        if hive is None or 'blocked' in hive:
+            return self.__json({'status': 'error', 'message': 'Bienenstock nicht verfügbar'})
+        hive['pid'] = int(self.__getParam(query, 'pid', 0))
+        return self.__json({'status': 'ok'})
+
+    def _ajax_bonsai_init(self, session, method, query):
+        bonsai = copy.deepcopy(self.__fixtures['bonsai_init'])
+        bonsai['data']['data']['slots'] = copy.deepcopy(self.__bonsaiSlots)
+        return self.__json(bonsai)
+
+    def _ajax_bonsai_branch_click(self, session, method, query):
+        slot = self.__bonsaiSlots.get(self.__getParam(query, 'slot', ''))
+        if slot is None or 'block' in slot or slot.get('branches', 0) == 0:
+            return self.__json({'status': 'error', 'message': 'Kein Ast vorhanden'})
+        slot['branches'] -= 1
+        return self.__json({'status': 'ok'})
+
+    # Quests
+    def _ajax_bigquest_init(self, session, method, query):
+        return self.__json(self.__fixtures['bigquest_init'])
+
+    def _ajax_infinite_quest_get(self, session, method, query):
+        return self.__json(self.__fixtures['infinite_quest_get'])
+
+    def _ajax_infinite_quest_entry(self, session, method, query):
+        productID = int(self.__getParam(query, 'pid', 0))
+        amount = int(self.__getParam(query, 'amount', 0))
+        if self.__inventory.get(productID, 0) < amount:
+            return self.__json({'status': 'error', 'message': 'Nicht genügend Produkte'})
+        self.__inventory[productID] -= amount
+        return self.__json({'status': 'ok'})
+
+    # Markt, Shops und NPC-Preise
+    def _help(self, session, method, query):
+        rows = ''.join(f'<tr><td>{html.escape(name)}</td><td>{html.escape(price)}</td></tr>'
+                       for name, price in self.__fixtures['hilfe_item2']['rows'])
+        return self.__html(f'<html><body><div id="content"><table>'
+                           f'<tr><th><b>Produkt</b></th><th><b>NPC-Preis</b></th></tr>{rows}'
+                           f'</table></div></body></html>')
+
+    def _market(self, session, method, query):
+        market = self.__fixtures['markt']
+        if self.__getParam(query, 'show') == 'overview':
+            links = ''.join(f'<a href="markt.php?order=p&v={productID}&filter=1">'
+                            f'{html.escape(self.__products[productID]["name"])}</a>'
+                            for productID in market['tradeable'])
+            return self.__html(f'<html><body><div id="overview">{links}</div></body></html>')
+
+        productID = self.__getParam(query, 'v', '')
+        page = int(self.__getParam(query, 'page', 1))
+        offers = market['offers'].get(productID, [])
+        pageOffers = offers[(page - 1) * OFFERS_PER_PAGE:page * OFFERS_PER_PAGE]
+        name = html.escape(self.__products.get(int(productID or 0), {}).get('name', ''))
+
+        rows = '<tr><th>Anzahl</th><th>Produkt</th><th>Verkäufer</th><th>Preis</th></tr>'
+        if not pageOffers:
+            rows += '<tr><td>Keine Angebote</td><td></td><td></td><td></td></tr>'
+        for amount, price in pageOffers:
+            rows += (f'<tr><td>{_formatAmount(amount)[:-3]}</td><td><a>{name}</a></td><td><a>Verkäufer</a></td>'
+                     f'<td>{_formatAmount(price)}\xa0wT</td></tr>')
+        navigation = ''
+        if page * OFFERS_PER_PAGE < len(offers):
+            navigation = f'<a href="markt.php?order=p&v={productID}&filter=1&page={page + 1}">weiter</a>'
+        rows += f'<tr><td colspan="4">{navigation}</td></tr>'
+        return self.__html(f'<html><body><div><table>{rows}</table></div></body></html>')
+
+    def __buy(self, productID, amount):
+        product = self.__products.get(productID)
+        if product is None or amount <= 0:
+            return False
+        price = (self.__npcPrices.get(product['name']) or 0.0) * amount
+        if price > self.__bar:
+            return False
+        self.__bar -= price
+        self.__inventory[productID] = self.__inventory.get(productID, 0) + amount
+        return True
+
+    def _shop(self, session, method, query):
+        if method == 'POST':
+            self.__buy(int(self.__getParam(query, 'produkt[0]', 0)), int(self.__getParam(query, 'anzahl[0]', 0)))
+        return self.__html('<html><body><div id="shop"></div></body></html>')
+
+    def _ajax_shopBuyProducts(self, session, method, query):
+        productID, amount = self.__getParam(query, 'products', '0:0').split(':')
+        if not self.__buy(int(productID), int(amount)):
+            return self.__json({'status': 'error', 'message': 'Kauf nicht möglich'})
+        return self.__json({'status': 'ok'})
+
+    # Notiz, Profil und Nachrichten
+    def _note(self, session, method, query):
+        return self.__html(f'<html><body><form><div><textarea id="notiztext">{html.escape(self.__note)}'
+                           f'</textarea></div></form></body></html>')
+
+    def _profile(self, session, method, query):
+        return self.__html('<html><body><div id="profil">Email: bestätigt</div></body></html>')
+
+    def _newMessage(self, session, method, query):
+        if method == 'POST':
+            recipient = html.escape(self.__getParam(query, 'msg_to', ''))
+            return self.__html(f'<html><body>Deine Nachricht wurde an {recipient} verschickt.</body></html>')
+        return self.__html(f'<html><body><form><input type="hidden" name="hpc" value="{secrets.token_hex(8)}" '
+                           f'id="hpc"></form></body></html>')
+
+    # Pfad -> Methode für alle Anfragen außerhalb von ajax/ajax.php
+    __ROUTES = {'main.php': '_main',
+                'save/wasser.php': '_water',
+                'save/pflanz.php': '_grow',
+                'save/abriss.php': '_removeWeed',
+                'ajax/menu-update.php': '_menuUpdate',
+                'ajax/achievements.php': '_achievements',
+                'ajax/updatelager.php': '_inventory',
+                'ajax/verkaufajax.php': '_wimps',
+                'hilfe.php': '_help',
+                'stadt/markt.php': '_market',
+                'stadt/shop.php': '_shop',
+                'notiz.php': '_note',
+                'nutzer/profil.php': '_profile',
+                'nachrichten/new.php': '_newMessage'}
+
+
+class _ReplayRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Header und Inhalt werden getrennt geschrieben; ohne TCP_NODELAY verzögert das
+    # Zusammenspiel von Nagle und verzögertem ACK jede Antwort um rund 40 ms.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.__handle('GET')
+
+    def do_POST(self):
+        self.__handle('POST')
+
+    def __handle(self, method):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length > 0 else b''
+        if body:
+            for name, values in parse_qs(body.decode('utf-8'), keep_blank_values=True).items():
+                query.setdefault(name, []).extend(values)
+        cookie = SimpleCookie()
+        try:
+            cookie.load(self.headers.get('Cookie') or '')
+        except Exception:
+            cookie = SimpleCookie()
+
+        path = url.path.lstrip('/')
+        status, headers, content = self.server.game.handle(method, path, query, cookie)
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+
+        self.send_response(status)
+        for name, value in headers.items():
+            for item in (value if isinstance(value, list) else [value]):
+                self.send_header(name, item)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+        endpoint = path
+        if path == 'ajax/ajax.php' or path == 'ajax/verkaufajax.php':
+            endpoint += '?do=' + (query.get('do') or [''])[0]
+        self.server.recordRequest(endpoint, len(self.requestline) + len(body), len(content))
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    HTTP-Server, der einen Account mit ReplayGame bereitstellt.
+    latency (Sekunden) verzögert jede Antwort, um die Laufzeit zu den Spielservern nachzubilden.
+    Weitere Parameter (gardens, aquaGarden, honeyFarm, bonsaiFarm, seed, ...) gehen an ReplayGame.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, fixtureDir=FIXTURE_DIR, verbose=False, **account):
+        self.game = ReplayGame(loadFixtures(fixtureDir), **account)
+        self.latency = latency
+        self.verbose = verbose
+        self.__requestStats = {}
+        self.__statsLock = threading.Lock()
+        self.__thread = None
+        ThreadingHTTPServer.__init__(self, (host, port), _ReplayRequestHandler)
+        self.game.baseURL = self.getBaseURL()
+
+    def getBaseURL(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        """Startet den Server in einem Hintergrund-Thread und gibt dessen Adresse zurück."""
+        self.__thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.__thread.start()
+        return self.getBaseURL()
+
+    def stop(self):
+        """Beendet den Server."""
+        self.shutdown()
+        self.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def recordRequest(self, endpoint, bytesReceived, bytesSent):
+        with self.__statsLock:
+            stats = self.__requestStats.setdefault(endpoint, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += bytesReceived
+            stats[2] += bytesSent
+
+    def getRequestStats(self):
+        """Gibt je Endpunkt die Anzahl der Anfragen sowie gesendete und empfangene Bytes zurück."""
+        with self.__statsLock:
+            return {endpoint: {'requests': requests, 'bytesReceived': received, 'bytesSent': sent}
+                    for endpoint, (requests, received, sent) in sorted(self.__requestStats.items())}
+
+    def resetRequestStats(self):
+        with self.__statsLock:
+            self.__requestStats = {}
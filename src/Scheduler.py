@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Ereignisgesteuerter Dauerbetrieb für einen oder mehrere Accounts.
+
+Scheduler hält alle anstehenden Aufgaben in einem Heap, sortiert nach ihrem Fälligkeitszeitpunkt,
+und schläft bis zur nächsten. Jede Aufgabe gibt nach ihrer Ausführung zurück, wann sie wieder
+fällig ist. Aufgaben derselben Gruppe (desselben Accounts) laufen nie gleichzeitig, da ein
+WurzelBot nicht threadsicher ist; Aufgaben verschiedener Accounts laufen parallel.
+
+AccountJobs legt für einen angemeldeten WurzelBot die Aufgaben an:
+- Gärten: Unkraut, Ernte, Anpflanzen, Gießen und Wimps, sobald laut getNextRunTime geerntet
+  oder gegossen werden muss
+- Bienen: erneut senden, sobald der erste Stock vom 2-Stunden-Flug zurück ist
+- Bonsai: Äste schneiden in festen Abständen, da das Spiel dafür keinen Zeitpunkt liefert
+- Tagesbonus: einmal am Tag kurz nach Mitternacht
+- Session: regelmäßige Anfrage, damit die Session nicht verfällt; läuft sie ab, meldet
+  HTTPConnection den Account vor der Anfrage neu an
+"""
+
+import datetime, heapq, itertools, logging, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from src.GardenPlanner import OBJECTIVE_FIELDS
+
+# Frühester und spätester Abstand zwischen zwei Durchläufen der Gärten in Sekunden
+MIN_GARDEN_INTERVAL = 60
+MAX_GARDEN_INTERVAL = 4 * 60 * 60
+
+BEE_FLIGHT_TIME = 2 * 60 * 60
+BONSAI_INTERVAL = 4 * 60 * 60
+KEEPALIVE_INTERVAL = 15 * 60
+RETRY_DELAY = 5 * 60
+
+# Abstand nach Mitternacht, nach dem der Tagesbonus abgeholt wird
+BONUS_OFFSET = 5 * 60
+
+class Scheduler(object):
+    """Führt Aufgaben zu ihrem Fälligkeitszeitpunkt aus. Siehe Modulbeschreibung."""
+
+    def __init__(self, maxWorkers=4, clock=time.time):
+        self.__clock = clock
+        self.__executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix='job')
+        self.__logScheduler = logging.getLogger('bot.Scheduler')
+        self.__condition = threading.Condition()
+        self.__heap = []                # (when, seq, group, name, action)
+        self.__sequence = itertools.count()
+        self.__current = {}             # (group, name) -> seq des gültigen Eintrags
+        self.__busyGroups = set()
+        self.__deferred = {}            # group -> zurückgestellte Einträge
+        self.__stopped = False
+
+    def schedule(self, when, group, name, action):
+        """
+        Plant action (ohne Argumente, gibt den nächsten Zeitpunkt oder None zurück) für den
+        Zeitpunkt when. Ein bereits geplanter Eintrag mit gleicher group und name wird ersetzt.
+        """
+        with self.__condition:
+            seq = next(self.__sequence)
+            self.__current[(group, name)] = seq
+            heapq.heappush(self.__heap, (when, seq, group, name, action))
+            self.__condition.notify()
+
+    def cancel(self, group, name=None):
+        """Entfernt eine oder (ohne name) alle Aufgaben einer Gruppe."""
+        with self.__condition:
+            for key in [key for key in self.__current if key[0] == group and name in (None, key[1])]:
+                del self.__current[key]
+
+    def getNextTime(self, group, name):
+        """Gibt den geplanten Zeitpunkt einer Aufgabe zurück oder None."""
+        with self.__condition:
+            seq = self.__current.get((group, name))
+            for entry in self.__heap:
+                if entry[1] == seq:
+                    return entry[0]
+            for entry in self.__deferred.get(group, []):
+                if entry[1] == seq:
+                    return entry[0]
+        return None
+
+    def __isCurrent(self, entry):
+        return self.__current.get((entry[2], entry[3])) == entry[1]
+
+    def run(self):
+        """Arbeitet die Aufgaben ab, bis stop aufgerufen wird oder keine mehr geplant sind."""
+        with self.__condition:
+            while not self.__stopped:
+                while self.__heap and not self.__isCurrent(self.__heap[0]):
+                    heapq.heappop(self.__heap)
+                if not self.__heap:
+                    if not self.__busyGroups:
+                        break
+                    self.__condition.wait()
+                    continue
+
+                delay = self.__heap[0][0] - self.__clock()
+                if delay > 0:
+                    self.__condition.wait(delay)
+                    continue
+
+                entry = heapq.heappop(self.__heap)
+                group = entry[2]
+                if group in self.__busyGroups:
+                    self.__deferred.setdefault(group, []).append(entry)
+                    continue
+                self.__busyGroups.add(group)
+                self.__executor.submit(self.__execute, entry)
+        self.__executor.shutdown(wait=True)
+
+    def __execute(self, entry):
+        when, seq, group, name, action = entry
+        try:
+            nextTime = action()
+        except Exception:
+            self.__logScheduler.exception(f'Aufgabe {name} von {group} fehlgeschlagen')
+            nextTime = self.__clock() + RETRY_DELAY
+
+        with self.__condition:
+            self.__busyGroups.discard(group)
+            # Zurückgestellte Aufgaben der Gruppe sind inzwischen fällig
+            for deferred in self.__deferred.pop(group, []):
+                heapq.heappush(self.__heap, deferred)
+            if nextTime is not None and self.__current.get((group, name)) == seq:
+                self.schedule(nextTime, group, name, action)
+            self.__condition.notify()
+
+    def stop(self):
+        """Beendet run nach den gerade laufenden Aufgaben."""
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+
+
+def _getNextBonusTime(now):
+    tomorrow = datetime.datetime.fromtimestamp(now).date() + datetime.timedelta(days=1)
+    return datetime.datetime.combine(tomorrow, datetime.time()).timestamp() + BONUS_OFFSET
+
+
+class AccountJobs(object):
+    """Die Aufgaben eines angemeldeten WurzelBots für den Scheduler. Siehe Modulbeschreibung."""
+
+    def __init__(self, bot, name, objective=OBJECTIVE_FIELDS, clock=time.time):
+        self.__bot = bot
+        self.__name = name
+        self.__objective = objective
+        self.__clock = clock
+
+    def register(self, scheduler: Scheduler):
+        """Plant alle Aufgaben des Accounts, die ersten sofort."""
+        now = self.__clock()
+        scheduler.schedule(now, self.__name, 'gardens', self.gardens)
+        scheduler.schedule(now, self.__name, 'bonus', self.bonus)
+        scheduler.schedule(now + KEEPALIVE_INTERVAL, self.__name, 'session', self.session)
+        if self.__bot.spieler.isHoneyFarmAvailable():
+            scheduler.schedule(now, self.__name, 'bees', self.bees)
+        if self.__bot.spieler.isBonsaiFarmAvailable():
+            scheduler.schedule(now, self.__name, 'bonsai', self.bonsai)
+
+    def gardens(self):
+        bot = self.__bot
+        bot.startCycle()
+        bot.removeWeedInAllGardens()
+        bot.harvestAllGarden()
+        if bot.hasEmptyFields():
+            bot.growPlantsByPlan(self.__objective)
+        bot.waterPlantsInAllGardens()
+        bot.sellWimpsProducts(0, 0)
+
+        bot.startCycle()
+        now = self.__clock()
+        nextTime = bot.getNextRunTime()
+        if nextTime is None:
+            return now + MAX_GARDEN_INTERVAL
+        return min(max(nextTime, now + MIN_GARDEN_INTERVAL), now + MAX_GARDEN_INTERVAL)
+
+    def bees(self):
+        self.__bot.sendBienen()
+        now = self.__clock()
+        nextTime = self.__bot.getNextBeeFlightTime()
+        if nextTime is None or nextTime <= now:
+            # Der Flug wurde nicht gestartet oder der Server liefert keine Flugzeiten
+            return now + BEE_FLIGHT_TIME
+        return nextTime
+
+    def bonsai(self):
+        self.__bot.doCutBonsai()
+        return self.__clock() + BONSAI_INTERVAL
+
+    def bonus(self):
+        self.__bot.getDailyLoginBonus()
+        return _getNextBonusTime(self.__clock())
+
+    def session(self):
+        """Hält die Session mit einer kleinen Anfrage am Leben; eine abgelaufene Session wird dabei erneuert."""
+        self.__bot.updateUserData()
+        return self.__clock() + KEEPALIVE_INTERVAL
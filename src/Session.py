@@ -38,12 +38,14 @@ class Session(object):
         """Prüft, ob die offene Session abgelaufen ist."""
         return time.time() > self.__endTime
 
-    def isSessionValid(self): #TODO: Prüfen wie die Methode sinnvoll eingesetzt werden kann
-        """Prüft anhand verschiedener Kriterien, ob die aktuelle Session gültig ist."""
-        bReturn = True
-        if (self.__sessionID == None): bReturn = False
-        if (self.__isSessionTimeElapsed()): bReturn = False
-        return bReturn
+    def isSessionValid(self):
+        """
+        Prüft anhand verschiedener Kriterien, ob die aktuelle Session gültig ist.
+        HTTPConnection prüft dies vor jeder Anfrage und erneuert die Session bei Bedarf.
+        """
+        if (self.__sessionID == None): return False
+        if (self.__isSessionTimeElapsed()): return False
+        return True
 
     def openSession(self, sessionID, server, serverURL):
         """
@@ -59,6 +61,19 @@ class Session(object):
         sID = str(self.__sessionID)
         self.__logSession.info(f'Session (ID: {sID}) geöffnet')
 
+    def restoreSession(self, sessionID, server, serverURL, startTime, endTime):
+        """
+        Übernimmt eine gespeicherte Session, z.B. aus einem früheren Programmlauf.
+        """
+        self.__sessionID = sessionID
+        self.__server = server
+        self.__serverURL = serverURL
+        self.__startTime = startTime
+        self.__endTime = endTime
+
+        sID = str(self.__sessionID)
+        self.__logSession.info(f'Session (ID: {sID}) wiederhergestellt')
+
     def closeSession(self, wunr, server):
         """
         Zurücksetzen aller Informationen. Gleichbedeutend mit einem Schließen der Session.
@@ -74,6 +89,14 @@ class Session(object):
         """Gibt die verbleibende Zeit zurück, bis die Session abläuft."""
         return self.__endTime - time.time()
 
+    def getStartTime(self):
+        """Gibt den Zeitpunkt zurück, zu dem die Session geöffnet wurde."""
+        return self.__startTime
+
+    def getEndTime(self):
+        """Gibt den Zeitpunkt zurück, ab dem die Session (abzüglich Reserve) als abgelaufen gilt."""
+        return self.__endTime
+
     def getSessionID(self):
         """Gibt die Session-ID zurück."""
         return self.__sessionID
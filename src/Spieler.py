@@ -75,6 +75,12 @@ class Spieler():
     def getBarFormated(self):
         return self.__userData['bar']
 
+    def setUserName(self, userName):
+        self.__userName = userName
+
+    def setUserData(self, userData):
+        self.__userData = userData
+
     def setUserNameFromServer(self, http):
         """
         Liest den Spielernamen vom Server und speichert ihn in der Klasse.
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Liest die Statistik eines Spielers (ajax.php?do=statsGetStats&which=0) aus.
+
+Die Tabelle besteht aus Zeilen der Form <tr><td>Bezeichnung</td><td>Wert</td></tr>. Die Zeilen
+werden in einem Durchlauf gelesen und über ihre Bezeichnung (in allen Sprachen der Spielserver)
+den Feldern von StatsRecord zugeordnet. Ist eine Bezeichnung unbekannt, etwa weil das Spiel sie
+umbenannt hat, wird das Feld über die bisherige Position der Zeile ermittelt.
+
+Achtung: Die Bezeichnungen in STATS_FIELDS sind nicht an echten Antworten der Spielserver
+geprüft. Sie sind Annahmen, ebenso wie die Fixtures statsGetStats*.json, die synthetisch sind.
+Bis sie mit aufgezeichneten Tabellen abgeglichen sind, ist auf den Spielservern damit zu
+rechnen, dass die Felder über ihre Position gefunden werden (siehe Log-Level debug).
+"""
+
+import html, logging, re
+from collections import namedtuple
+
+# Feld von StatsRecord, Schlüssel für HTTPConnection.getInfoFromStats, bisherige Position
+# der Zeile, Typ des Werts und Bezeichnungen der Zeile (de, en, ru; ungeprüft, siehe oben)
+StatsField = namedtuple('StatsField', 'name info position valueType labels')
+
+STATS_FIELDS = (
+    StatsField('userName',          'Username',          0,  str, ('Spielername', 'Player name', 'Имя игрока')),
+    StatsField('points',            'Points',            1,  int, ('Punkte', 'Points', 'Очки')),
+    StatsField('rank',              'Rank',              2,  int, ('Platz', 'Rank', 'Место')),
+    StatsField('guild',             'Guild',             3,  str, ('Gilde', 'Guild', 'Гильдия')),
+    StatsField('memberSince',       'MemberSince',       4,  str, ('Mitglied seit', 'Member since', 'Участник с')),
+    StatsField('completedQuests',   'CompletedQuests',   5,  int, ('Erfüllte Aufträge', 'Completed quests', 'Выполненные задания')),
+    StatsField('completedContests', 'CompletedContests', 6,  int, ('Erfüllte Wettbewerbe', 'Completed contests', 'Выполненные конкурсы')),
+    StatsField('cactusQuest',       'CactusQuest',       7,  int, ('Kaktusquest', 'Cactus quest', 'Квест кактуса')),
+    StatsField('echinoQuest',       'EchinoQuest',       8,  int, ('Echinokaktusquest', 'Echinocactus quest', 'Квест эхинокактуса')),
+    StatsField('bigheadQuest',      'BigheadQuest',      9,  int, ('Bischofsmützenquest', 'Bishop\'s cap quest', 'Квест астрофитума')),
+    StatsField('opuntiaQuest',      'OpuntiaQuest',      10, int, ('Opuntienquest', 'Opuntia quest', 'Квест опунции')),
+    StatsField('saguaroQuest',      'SaguaroQuest',      11, int, ('Saguaroquest', 'Saguaro quest', 'Квест сагуаро')),
+    StatsField('soldProducts',      'SoldProducts',      12, int, ('Verkaufte Produkte', 'Products sold', 'Продано товаров')),
+    StatsField('boughtProducts',    'BoughtProducts',    13, int, ('Gekaufte Produkte', 'Products bought', 'Куплено товаров')),
+    StatsField('servedWimps',       'ServedWimps',       14, int, ('Bediente Wimps', 'Wimps served', 'Обслужено вимпов')),
+    StatsField('harvestedPlants',   'HarvestedPlants',   15, int, ('Geerntete Pflanzen', 'Plants harvested', 'Собрано растений')),
+    StatsField('gardens',           'Gardens',           16, int, ('Gärten', 'Gardens', 'Сады')),
+    StatsField('beehives',          'Beehives',          17, int, ('Bienenstöcke', 'Beehives', 'Ульи')),
+)
+
+StatsRecord = namedtuple('StatsRecord', [field.name for field in STATS_FIELDS])
+
+# Schlüssel für HTTPConnection.getInfoFromStats -> Feld von StatsRecord
+STATS_INFO = {field.info: field.name for field in STATS_FIELDS}
+
+_ROW_PATTERN = re.compile(r'<td[^>]*>(.*?)</td>\s*<td[^>]*>(.*?)</td>', re.DOTALL)
+_TAG_PATTERN = re.compile(r'<[^>]*>')
+# Tausendertrennzeichen der Sprachen
+_SEPARATORS = dict.fromkeys(map(ord, ' .,\'\xa0\u202f'))
+
+_logStatsParser = logging.getLogger('bot.StatsParser')
+
+def _normalizeLabel(label):
+    return ' '.join(label.replace('’', '\'').split()).rstrip(':').casefold()
+
+# Bezeichnungen unverändert und normalisiert, damit die meisten Zeilen ohne Normalisierung gefunden werden
+_FIELDS_BY_LABEL = {key: field for field in STATS_FIELDS for label in field.labels
+                    for key in (label, _normalizeLabel(label))}
+
+def _getText(cell):
+    """Entfernt Tags und Entities aus einer Zelle."""
+    if '<' in cell:
+        cell = _TAG_PATTERN.sub('', cell)
+    if '&' in cell:
+        cell = html.unescape(cell)
+    return cell.strip()
+
+def _convert(field, text):
+    if field.valueType is int:
+        if not text.isdigit():
+            text = text.translate(_SEPARATORS)
+        return int(text) if text.isdigit() else None
+    return text or None
+
+def parseStats(table):
+    """
+    Liest die Zeilen der Statistik (jContent['table'], Liste von HTML-Zeilen) und gibt einen
+    StatsRecord zurück. Felder, die weder über ihre Bezeichnung noch über ihre Position
+    gefunden werden, sind None.
+    """
+    values = {}
+    unknownRows = {}    # Position -> Wert der Zeilen mit unbekannter Bezeichnung
+    search = _ROW_PATTERN.search
+    for position, row in enumerate(table):
+        match = search(row)
+        if match is None:
+            continue
+        label, value = match.groups()
+        label, value = _getText(label), _getText(value)
+        field = _FIELDS_BY_LABEL.get(label) or _FIELDS_BY_LABEL.get(_normalizeLabel(label))
+        if field is None or field.name in values:
+            unknownRows[position] = (label, value)
+            continue
+        values[field.name] = _convert(field, value)
+
+    for field in STATS_FIELDS:
+        if field.name in values or field.position not in unknownRows:
+            continue
+        label, value = unknownRows[field.position]
+        _logStatsParser.debug(f'Statistik: Zeile "{label}" an Position {field.position} als {field.name} verwendet')
+        values[field.name] = _convert(field, value)
+
+    return StatsRecord(**{field.name: values.get(field.name) for field in STATS_FIELDS})
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Bewertet die Wimps aller Gärten gemeinsam und wählt aus, welche bedient werden.
+
+Die Nachfrage aller Wimps wird als Matrix Wimp x Produkt aufgebaut und mit dem Vektor der
+NPC Preise in einem Durchlauf bewertet. Wimps unter dem Mindestgewinn werden abgelehnt,
+Wimps mit nie zu verkaufenden Produkten übergangen. Aus den übrigen wird per Branch and
+Bound die Auswahl mit dem höchsten Erlös gesucht, deren Nachfrage der Lagerbestand über
+den Mindestbeständen decken kann. Ein Wimp, der zuerst kommt, verdrängt so keine
+lukrativeren Wimps, die dieselben Produkte wollen.
+"""
+
+from collections import namedtuple
+from src.Produktdaten import ProductData
+
+# Höchstzahl untersuchter Knoten beim Branch and Bound; danach gilt die beste bisherige Auswahl
+MAX_NODES = 100000
+
+WimpOffer = namedtuple('WimpOffer', 'gardenID wimpID price products')
+
+# accept: zu bedienende, decline: abzulehnende, skip: unverändert zu lassende WimpOffer
+WimpPlan = namedtuple('WimpPlan', 'accept decline skip')
+
+class WimpEvaluator(object):
+    """Siehe Modulbeschreibung."""
+
+    def __init__(self, productData: ProductData, maxNodes=MAX_NODES):
+        self.__productData = productData
+        self.__maxNodes = maxNodes
+
+    def evaluate(self, offers, stock, minimalProfit, requiredStock=None, neverSell=frozenset()):
+        """
+        @param offers: Liste von WimpOffer; products ist ein dict productID -> Anzahl
+        @param stock: dict productID -> Lagerbestand
+        @param minimalProfit: Mindestgewinn in Prozent des NPC Preises der Produkte
+        @param requiredStock: dict productID -> Mindestbestand, der nach dem Verkauf übrig bleiben muss
+        @param neverSell: productIDs, die nie verkauft werden
+        @return: WimpPlan
+        """
+        requiredStock = requiredStock or {}
+        neverSell = {str(productID) for productID in neverSell}
+
+        # Spalten der Matrix: alle nachgefragten Produkte
+        columns = {}
+        for offer in offers:
+            for productID in offer.products:
+                columns.setdefault(str(productID), len(columns))
+        productIDs = list(columns)
+
+        demand = [[0] * len(columns) for _ in offers]
+        for row, offer in zip(demand, offers):
+            for productID, amount in offer.products.items():
+                row[columns[str(productID)]] = int(amount)
+
+        npcPrices = [self.__productData.getProductByID(productID).getPriceNPC() or 0.0 for productID in productIDs]
+        # Wie bisher muss nach dem Verkauf mehr als der Mindestbestand übrig bleiben
+        capacity = [int(stock.get(productID, 0)) - int(requiredStock.get(productID, 0)) - 1 for productID in productIDs]
+        blocked = [productID in neverSell for productID in productIDs]
+
+        accept, decline, skip, candidates = [], [], [], []
+        for offer, row in zip(offers, demand):
+            npcValue = sum(amount * price for amount, price in zip(row, npcPrices))
+            profit = offer.price / npcValue * 100 if npcValue > 0 else float('inf')
+            if profit < minimalProfit:
+                decline.append(offer)
+            elif any(amount and isBlocked for amount, isBlocked in zip(row, blocked)) \
+                 or any(amount > max(limit, 0) for amount, limit in zip(row, capacity)):
+                skip.append(offer)
+            else:
+                candidates.append((offer, [(column, amount) for column, amount in enumerate(row) if amount], profit))
+
+        selected = self.__select(candidates, capacity)
+        for index, (offer, items, profit) in enumerate(candidates):
+            (accept if index in selected else skip).append(offer)
+        return WimpPlan(accept, decline, skip)
+
+    def __select(self, candidates, capacity):
+        """
+        Gibt die Indizes der Kandidaten mit dem höchsten gemeinsamen Erlös zurück, deren
+        Nachfrage zusammen die Kapazität je Produkt nicht übersteigt.
+        """
+        # Lukrativste zuerst, damit die erste Lösung (gierig) bereits gut ist und früh beschnitten wird
+        order = sorted(range(len(candidates)), key=lambda index: (-candidates[index][2], -candidates[index][0].price))
+        prices = [candidates[index][0].price for index in order]
+        items = [candidates[index][1] for index in order]
+        remainingPrices = [0.0] * (len(order) + 1)
+        for position in range(len(order) - 1, -1, -1):
+            remainingPrices[position] = remainingPrices[position + 1] + prices[position]
+
+        capacity = list(capacity)
+        best = [-1.0, []]
+        chosen = []
+        nodes = 0
+
+        def fits(position):
+            return all(capacity[column] >= amount for column, amount in items[position])
+
+        def take(position, sign):
+            for column, amount in items[position]:
+                capacity[column] -= sign * amount
+
+        def search(position, value):
+            nonlocal nodes
+            nodes += 1
+            if value > best[0]:
+                best[0], best[1] = value, list(chosen)
+            if position == len(order) or nodes > self.__maxNodes:
+                return
+            if value + remainingPrices[position] <= best[0]:
+                return
+
+            if fits(position):
+                take(position, 1)
+                chosen.append(position)
+                search(position + 1, value + prices[position])
+                chosen.pop()
+                take(position, -1)
+            search(position + 1, value)
+
+        search(0, 0.0)
+        return {order[position] for position in best[1]}
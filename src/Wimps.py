@@ -15,11 +15,11 @@ class Wimps:
     def getWimpsData(self, garden):
         return self.__httpConn.getWimpsData(garden._id)
 
-    def sellWimpProducts(self, wimp_id):
-        return self.__httpConn.sellWimpProducts(wimp_id)
+    def sellWimpProducts(self, wimp_id, gardenID=None):
+        return self.__httpConn.sellWimpProducts(wimp_id, gardenID)
 
-    def declineWimp(self, wimp_id):
-        return self.__httpConn.declineWimp(wimp_id)
+    def declineWimp(self, wimp_id, gardenID=None):
+        return self.__httpConn.declineWimp(wimp_id, gardenID)
     
     def productsToString(self, products, productData: ProductData):
         result = "Price: " + str(products[0]) + " wT"
@@ -7,21 +7,29 @@ Created on 21.03.2017
 '''
 
 from src.Spieler import Spieler, Login
-from src.HTTPCommunication import HTTPConnection
+from src.HTTPCommunication import HTTPConnection, AQUA_GARDEN_KEY, WATER_CHUNK_SIZE, SESSION_CACHE_DIR
+from src.ConnectionPool import ConnectionPool
+from src.RateLimiter import RateLimiter
+from src.AsyncHTTPCommunication import AsyncHTTPConnection
+from src.Instrumentation import MetricsCollector
 from src.Messenger import Messenger
 from src.Garten import Garden, AquaGarden
-from src.Honig import Honig
+from src.FieldBitmap import getFootprintFields, getFootprintFieldsAsString
+from src.GardenPlanner import GardenPlanner, OBJECTIVE_FIELDS
+from src.Honig import Honig, BEE_TOURS
 from src.Bonsai import Bonsai
 from src.Lager import Storage
 from src.Marktplatz import Marketplace
+from src.MarketHistory import MarketHistory, MARKET_HISTORY_DIR
 from src.Produktdaten import ProductData
 from collections import Counter
 from src.Wimps import Wimps
+from src.WimpEvaluator import WimpEvaluator, WimpOffer
 from src.Quests import Quest
 from src.Bonus import Bonus
 from src.Note import Note
 from src.Shop_lists import *
-import logging, i18n, datetime
+import logging, i18n, datetime, asyncio, time, hashlib, os
 
 i18n.load_path.append('lang')
 
@@ -30,11 +38,36 @@ class WurzelBot(object):
     Die Klasse WurzelBot übernimmt jegliche Koordination aller anstehenden Aufgaben.
     """
 
-    def __init__(self):
+    def __init__(self, maxWorkers=1, baseURL=None, collectMetrics=False, pool: ConnectionPool = None,
+                 rateLimiter: RateLimiter = None, productData: ProductData = None, persistSession=False,
+                 marketHistory=False):
+        """
+        maxWorkers legt fest, wie viele Gärten gleichzeitig gelesen werden dürfen.
+        Bei 1 werden alle Gärten nacheinander abgefragt.
+        Mit baseURL wird statt der Spielserver z.B. ein lokaler ReplayServer verwendet.
+        Mit collectMetrics werden Dauer und Größe aller Anfragen in self.metrics erfasst.
+        Über pool teilen sich mehrere Bots (Accounts) die Verbindungen zum Spielserver,
+        über rateLimiter ein gemeinsames Budget an Anfragen je Sekunde und über productData
+        den Produktkatalog samt NPC Preisen desselben Servers und derselben Sprache.
+        Mit persistSession bleibt die Session beim Beenden offen und wird im Verzeichnis cache
+        gespeichert; ein erneuter Start innerhalb ihrer Gültigkeit übernimmt sie ohne Login.
+        Mit marketHistory werden die abgefragten Angebote des Marktplatzes je Server und Sprache
+        im Verzeichnis cache gespeichert (siehe MarketHistory).
+        """
+        self.maxWorkers = maxWorkers
+        self.__baseURL = baseURL
+        self.__persistSession = persistSession
+        self.__marketHistory = marketHistory
+        self.__sessionFile = None
         self.__logBot = logging.getLogger("bot")
         self.__logBot.setLevel(logging.DEBUG)
-        self.__HTTPConn = HTTPConnection()
-        self.productData = ProductData(self.__HTTPConn)
+        self.__HTTPConn = HTTPConnection(baseURL, pool=pool, rateLimiter=rateLimiter)
+        self.metrics = None
+        if collectMetrics:
+            self.metrics = MetricsCollector()
+            self.__HTTPConn.getInstrumentation().addHook(self.metrics)
+        self.__sharedProductData = productData is not None
+        self.productData = productData if productData is not None else ProductData(self.__HTTPConn)
         self.spieler = Spieler()
         self.messenger = Messenger(self.__HTTPConn)
         self.storage = Storage(self.__HTTPConn)
@@ -49,10 +82,11 @@ class WurzelBot(object):
         self.note = Note(self.__HTTPConn)
 
 
-    def __initGardens(self):
+    def __initGardens(self, tmpNumberOfGardens=None):
         """Ermittelt die Anzahl der Gärten und initialisiert alle."""
         try:
-            tmpNumberOfGardens = self.__HTTPConn.getInfoFromStats("Gardens")
+            if tmpNumberOfGardens is None:
+                tmpNumberOfGardens = self.__HTTPConn.getInfoFromStats("Gardens")
             self.spieler.numberOfGardens = tmpNumberOfGardens
             for i in range(1, tmpNumberOfGardens + 1):
                 self.garten.append(Garden(self.__HTTPConn, i))
@@ -74,101 +108,318 @@ class WurzelBot(object):
         """
         Rechnet anhand der fieldID und Größe der Pflanze (sx, sy) alle IDs aus und gibt diese als String zurück.
         """
-        if (sx == '1' and sy == '1'): return str(fieldID)
-        if (sx == '2' and sy == '1'): return str(fieldID) + ',' + str(fieldID + 1)
-        if (sx == '1' and sy == '2'): return str(fieldID) + ',' + str(fieldID + 17)
-        if (sx == '2' and sy == '2'): return str(fieldID) + ',' + str(fieldID + 1) + ',' + str(fieldID + 17) + ',' + str(fieldID + 18)
-        self.__logBot.debug(f'Error der plantSize --> sx: {sx} sy: {sy}')
+        try:
+            return getFootprintFieldsAsString(fieldID, sx, sy)
+        except (KeyError, ValueError):
+            self.__logBot.debug(f'Error der plantSize --> sx: {sx} sy: {sy}')
 
 
     def __getAllFieldIDsFromFieldIDAndSizeAsIntList(self, fieldID, sx, sy):
         """
         Rechnet anhand der fieldID und Größe der Pflanze (sx, sy) alle IDs aus und gibt diese als Integer-Liste zurück.
         """
-        sFields = self.__getAllFieldIDsFromFieldIDAndSizeAsString(fieldID, sx, sy)
-        listFields = sFields.split(',') #Stringarray
-                        
-        for i in range(0, len(listFields)):
-            listFields[i] = int(listFields[i])
-            
-        return listFields
+        return list(getFootprintFields(fieldID, sx, sy))
 
 
-    def launchBot(self, server, user, pw, lang, portalacc) -> bool:
+    def __initProducts(self, cacheKey, forceRefresh=False, reload=False):
         """
-        Diese Methode startet und initialisiert den Wurzelbot. Dazu wird ein Login mit den
-        übergebenen Logindaten durchgeführt und alles nötige initialisiert.
+        Initialisiert den Produktkatalog, bevorzugt aus dem Zwischenspeicher je Server und Sprache.
+        Ein geteilter Katalog wird nur vom ersten Bot geladen, außer bei reload.
+        Wird der Katalog nicht mit dieser Verbindung heruntergeladen, wird der Token, der sonst
+        dabei aus der Gartenseite gelesen wird, gesondert abgefragt (main.php), außer die
+        Verbindung hält ihn bereits, z.B. aus einer übernommenen Session.
         """
-        self.__logBot.info('-------------------------------------------')
-        self.__logBot.info(f'Starting Wurzelbot for User {user} on Server No. {server}')
-        loginDaten = Login(server=server, user=user, password=pw, language=lang)
+        if self.__sharedProductData and not reload:
+            downloaded = self.productData.initAllProductsOnce(cacheKey, forceRefresh, httpConnection=self.__HTTPConn)
+        else:
+            downloaded = self.productData.initAllProducts(cacheKey, forceRefresh, httpConnection=self.__HTTPConn)
+        if not downloaded and not self.__HTTPConn.hasAjaxToken():
+            self.__HTTPConn.refreshToken()
+        self.storage.initProductList(self.productData.getListOfAllProductIDs())
+
+
+    def __validateProducts(self, cacheKey):
+        """
+        Enthält das Lager Produkte, die der zwischengespeicherte Katalog nicht kennt,
+        ist dieser veraltet und wird neu vom Server geladen.
+        """
+        if self.productData.isLoadedFromCache() and not self.productData.containsAllProducts(self.storage.getKeys()):
+            self.__logBot.info('Product catalogue cache is outdated, reloading it from server.')
+            self.__initProducts(cacheKey, forceRefresh=True, reload=True)
+
+
+    def __openMarketHistory(self, cacheKey):
+        """Öffnet mit marketHistory den Verlauf der Angebote des Servers für den Marktplatz."""
+        if not self.__marketHistory:
+            return
+        fileName = os.path.join(MARKET_HISTORY_DIR, f'market_{cacheKey}.bin')
+        try:
+            self.marktplatz.setHistory(MarketHistory(fileName))
+        except OSError:
+            self.__logBot.warning(f'Could not open market history {fileName}')
+
+
+    def __getSessionFile(self, loginDaten, portalacc):
+        """Gibt die Datei zurück, in der die Session des Accounts gespeichert wird."""
+        account = f'{loginDaten.server}|{loginDaten.language}|{loginDaten.user}|{bool(portalacc)}|{self.__baseURL}'
+        return os.path.join(SESSION_CACHE_DIR, f'session_{hashlib.sha256(account.encode()).hexdigest()[:16]}.json')
+
+
+    def __logIn(self, loginDaten, portalacc):
+        """
+        Meldet den Account an. Mit persistSession wird zuvor versucht, die gespeicherte Session
+        zu übernehmen. Gespeichert wird eine Session erst in __finishLaunch, wenn sie den Token
+        aus der Gartenseite hält.
+        """
+        if self.__persistSession:
+            self.__sessionFile = self.__getSessionFile(loginDaten, portalacc)
+            if self.__HTTPConn.restoreSession(self.__sessionFile, loginDaten, portalacc == True):
+                self.__logBot.info(f'Reusing saved session for User {loginDaten.user}')
+                return
 
         if portalacc == True:
-            try:
-                self.__HTTPConn.logInPortal(loginDaten)
-            except:
-                self.__logBot.error(i18n.t('wimpb.error_starting_wbot'))
-                return False
+            self.__HTTPConn.logInPortal(loginDaten)
         else:
-            try:
-                self.__HTTPConn.logIn(loginDaten)
-            except:
-                self.__logBot.error(i18n.t('wimpb.error_starting_wbot'))
+            self.__HTTPConn.logIn(loginDaten)
+
+
+    def __saveSession(self):
+        try:
+            self.__HTTPConn.saveSession(self.__sessionFile)
+        except OSError:
+            self.__logBot.warning(f'Could not save session to {self.__sessionFile}')
+
+
+    def __beginLaunch(self, server, user, pw, lang):
+        self.__logBot.info('-------------------------------------------')
+        self.__logBot.info(f'Starting Wurzelbot for User {user} on Server No. {server}')
+        return Login(server=server, user=user, password=pw, language=lang)
+
+
+    def __setFarmAvailability(self, honey, aqua, bonsai) -> bool:
+        """
+        Übernimmt die Verfügbarkeit von Bienenfarm, Wassergarten und Bonsaifarm. Ist eine davon
+        eine Exception, weil sie nicht ermittelt werden konnte, wird False zurückgegeben.
+        """
+        for result, error in [(honey, 'wimpb.error_no_beehives'),
+                              (aqua, 'wimpb.error_no_water_garden'),
+                              (bonsai, 'wimpb.error_no_bonsaifarm')]:
+            if isinstance(result, Exception):
+                self.__logBot.error(i18n.t(error))
                 return False
+        self.spieler.setHoneyFarmAvailability(honey)
+        self.spieler.setAquaGardenAvailability(aqua)
+        self.spieler.setBonsaiFarmAvailability(bonsai)
+        return True
+
 
+    def __setUpGardens(self, loginDaten, numberOfGardens=None) -> bool:
+        """Initialisiert die Gärten und übernimmt Logindaten und UserID in den Spieler."""
         try:
-            self.spieler.setUserNameFromServer(self.__HTTPConn)
+            if isinstance(numberOfGardens, Exception):
+                raise numberOfGardens
+            self.__initGardens(numberOfGardens)
         except:
-            self.__logBot.error(i18n.t('wimpb.username_not_determined'))
+            self.__logBot.error(i18n.t('wimpb.error_number_of_gardens'))
             return False
 
+        self.spieler.accountLogin = loginDaten
+        self.spieler.setUserID(self.__HTTPConn.getUserID())
+        return True
+
+
+    def __finishLaunch(self, cacheKey):
+        """Schritte nach dem Laden von Produktkatalog und Lagerbestand."""
+        self.__validateProducts(cacheKey)
+        self.__openMarketHistory(cacheKey)
+        if self.__persistSession:
+            self.__saveSession()
+
+
+    def launchBot(self, server, user, pw, lang, portalacc, refreshProducts=False) -> bool:
+        """
+        Diese Methode startet und initialisiert den Wurzelbot. Dazu wird ein Login mit den
+        übergebenen Logindaten durchgeführt und alles nötige initialisiert.
+        Mit refreshProducts wird der zwischengespeicherte Produktkatalog neu geladen.
+        """
+        loginDaten = self.__beginLaunch(server, user, pw, lang)
+
         try:
-            self.spieler.setUserDataFromServer(self.__HTTPConn)
+            self.__logIn(loginDaten, portalacc)
         except:
-            self.__logBot.error(i18n.t('wimpb.error_refresh_userdata'))
+            self.__logBot.error(i18n.t('wimpb.error_starting_wbot'))
             return False
-        
+
         try:
-            self.spieler.setHoneyFarmAvailability(self.__HTTPConn.isHoneyFarmAvailable(self.spieler.getLevelNr()))
+            self.spieler.setUserNameFromServer(self.__HTTPConn)
         except:
-            self.__logBot.error(i18n.t('wimpb.error_no_beehives'))
+            self.__logBot.error(i18n.t('wimpb.username_not_determined'))
             return False
 
         try:
-            self.spieler.setAquaGardenAvailability(self.__HTTPConn.isAquaGardenAvailable(self.spieler.getLevelNr()))
+            self.spieler.setUserDataFromServer(self.__HTTPConn)
         except:
-            self.__logBot.error(i18n.t('wimpb.error_no_water_garden'))
+            self.__logBot.error(i18n.t('wimpb.error_refresh_userdata'))
             return False
 
-        try:
-            self.spieler.setBonsaiFarmAvailability(self.__HTTPConn.isBonsaiFarmAvailable(self.spieler.getLevelNr()))
-        except:
-            self.__logBot.error(i18n.t('wimpb.error_no_bonsaifarm'))
+        levelNr = self.spieler.getLevelNr()
+        availability = []
+        for check in (self.__HTTPConn.isHoneyFarmAvailable,
+                      self.__HTTPConn.isAquaGardenAvailable,
+                      self.__HTTPConn.isBonsaiFarmAvailable):
+            try:
+                availability.append(check(levelNr))
+            except Exception as exception:
+                availability.append(exception)
+        if not self.__setFarmAvailability(*availability):
             return False
 
-        try:
-            self.__initGardens()
-        except:
-            self.__logBot.error(i18n.t('wimpb.error_number_of_gardens'))
+        if not self.__setUpGardens(loginDaten):
             return False
 
-        self.spieler.accountLogin = loginDaten
-        self.spieler.setUserID(self.__HTTPConn.getUserID())
-        self.productData.initAllProducts()
-        self.storage.initProductList(self.productData.getListOfAllProductIDs())
+        self.__initProducts(f'{server}_{lang}', refreshProducts)
         self.storage.updateNumberInStock()
+        self.__finishLaunch(f'{server}_{lang}')
         return True
 
 
+    async def launchBotAsync(self, server, user, pw, lang, portalacc, refreshProducts=False) -> bool:
+        """
+        Async-Variante von launchBot. Voneinander unabhängige Anfragen werden gleichzeitig
+        gesendet, sodass der Start nur so lange dauert wie die langsamste Anfrage je Schritt.
+        """
+        loginDaten = self.__beginLaunch(server, user, pw, lang)
+        conn = AsyncHTTPConnection(self.__HTTPConn, max(self.maxWorkers, 4))
+
+        try:
+            try:
+                await conn.run(self.__logIn, loginDaten, portalacc)
+            except:
+                self.__logBot.error(i18n.t('wimpb.error_starting_wbot'))
+                return False
+
+            userName, userData, numberOfGardens = await asyncio.gather(conn.getInfoFromStats("Username"),
+                                                                       conn.readUserDataFromServer(),
+                                                                       conn.getInfoFromStats("Gardens"),
+                                                                       return_exceptions=True)
+            if isinstance(userName, Exception):
+                self.__logBot.error(i18n.t('wimpb.username_not_determined'))
+                return False
+            self.spieler.setUserName(userName)
+
+            if isinstance(userData, Exception):
+                self.__logBot.error(i18n.t('wimpb.error_refresh_userdata'))
+                return False
+            self.spieler.setUserData(userData)
+
+            levelNr = self.spieler.getLevelNr()
+            availability = await asyncio.gather(conn.isHoneyFarmAvailable(levelNr),
+                                                conn.isAquaGardenAvailable(levelNr),
+                                                conn.isBonsaiFarmAvailable(levelNr),
+                                                return_exceptions=True)
+            if not self.__setFarmAvailability(*availability):
+                return False
+
+            if not self.__setUpGardens(loginDaten, numberOfGardens):
+                return False
+
+            # Der Lagerbestand wird erst mit dem dabei gelesenen Token abgefragt
+            await conn.run(self.__initProducts, f'{server}_{lang}', refreshProducts)
+            self.storage.setNumberInStock(await conn.getInventory())
+            self.__finishLaunch(f'{server}_{lang}')
+            return True
+        finally:
+            conn.close()
+
+
     def exitBot(self):
         """Beendet den Wurzelbot geordnet und setzt alles zurück."""
         self.__logBot.info(i18n.t('wimpb.exit_wbot'))
+        if self.__persistSession and self.__sessionFile is not None:
+            # Die Session bleibt für den nächsten Start offen
+            self.__saveSession()
+            self.__logBot.info(f'Session kept open in {self.__sessionFile}')
+        else:
+            try:
+                self.__HTTPConn.logOut()
+                self.__logBot.info(i18n.t('wimpb.logout_success'))
+                self.__logBot.info('-------------------------------------------')
+            except:
+                self.__logBot.error(i18n.t('wimpb.exit_wbot_abnormal'))
+
+        if self.marktplatz.getHistory() is not None:
+            self.marktplatz.getHistory().close()
+            self.marktplatz.setHistory(None)
+
+        if self.metrics is not None:
+            self.__logBot.info('Request metrics:\n' + self.metrics.formatSummary())
+
+
+    def writeMetrics(self, fileName):
+        """Schreibt die erfassten Metriken im Textformat von Prometheus in fileName."""
+        if self.metrics is None:
+            return
+        with open(fileName, 'w', encoding='utf-8') as file:
+            file.write(self.metrics.toPrometheus())
+
+
+    def __prefetchGardens(self, withAquaGarden=False):
+        """
+        Lädt bei paralleler Ausführung die Zustände aller Gärten gleichzeitig vorab.
+        Verändernde Aktionen laufen anschließend weiterhin nacheinander.
+        """
+        if self.maxWorkers <= 1:
+            return
+
+        gardenIDs = [garden.getID() for garden in self.garten]
+        if withAquaGarden and self.spieler.isAquaGardenAvailable():
+            gardenIDs.append(AQUA_GARDEN_KEY)
+
         try:
-            self.__HTTPConn.logOut()
-            self.__logBot.info(i18n.t('wimpb.logout_success'))
-            self.__logBot.info('-------------------------------------------')
+            self.__HTTPConn.prefetchGardens(gardenIDs, self.maxWorkers)
         except:
-            self.__logBot.error(i18n.t('wimpb.exit_wbot_abnormal'))
+            self.__logBot.error('Could not prefetch gardens, falling back to sequential requests.')
+
+
+    def startCycle(self):
+        """
+        Beginnt einen neuen Durchlauf. Zwischengespeicherte Spielzustände und die Notiz aus
+        dem vorherigen Durchlauf werden verworfen und beim nächsten Zugriff neu geladen.
+        """
+        self.__HTTPConn.invalidateGardenCache()
+        self.note.invalidate()
+        for garden in self.garten:
+            garden.resetFreeFields()
+        if self.wassergarten is not None:
+            self.wassergarten.resetFreeFields()
+
+
+    def runCycle(self, objective=OBJECTIVE_FIELDS, delay=3):
+        """
+        Führt einen kompletten Durchlauf aus: Unkraut entfernen, ernten, anpflanzen, gießen,
+        Tagesbonus abholen und Wimps bedienen.
+        delay (Sekunden) ist die Pause vor dem Gießen und zwischen zwei Bonus-Abholungen.
+        """
+        self.startCycle()
+
+        print(i18n.t('wimpb.remove_weed_from_all_gardens'))
+        self.removeWeedInAllGardens()
+
+        self.harvestAllGarden()
+
+        # Große Pflanzen zuerst, kleinere füllen die verbleibenden Lücken
+        if self.hasEmptyFields():
+            self.growPlantsByPlan(objective)
+
+        time.sleep(delay)
+        print(i18n.t('wimpb.watering_all_plants'))
+        self.waterPlantsInAllGardens()
+
+        print(i18n.t('wimpb.claim_bonus'))
+        self.getDailyLoginBonus(delay)
+
+        print(i18n.t('wimpb.process_wimps'))
+        self.sellWimpsProducts(0, 0)
 
 
     def updateUserData(self):
@@ -179,13 +430,17 @@ class WurzelBot(object):
             self.__logBot.error(i18n.t('wimpb.error_refresh_userdata'))
 
 
-    def waterPlantsInAllGardens(self):
-        """Alle Gärten des Spielers werden komplett bewässert."""
+    def waterPlantsInAllGardens(self, chunkSize=WATER_CHUNK_SIZE):
+        """
+        Alle Gärten des Spielers werden komplett bewässert.
+        chunkSize legt fest, wie viele Pflanzen höchstens mit einer Anfrage gegossen werden.
+        """
+        self.__prefetchGardens(withAquaGarden=True)
         for garden in self.garten:
-            garden.waterPlants()
+            garden.waterPlants(chunkSize)
         
         if self.spieler.isAquaGardenAvailable():
-            self.wassergarten.waterPlants()
+            self.wassergarten.waterPlants(chunkSize)
 
 
     def writeMessagesIfMailIsConfirmed(self, recipients, subject, body):
@@ -206,6 +461,7 @@ class WurzelBot(object):
         Kann dazu verwendet werden zu entscheiden, wie viele Pflanzen angebaut werden können.
         """
         emptyFields = []
+        self.__prefetchGardens()
         try:
             for garden in self.garten:
                 emptyFields.append(garden.getEmptyFields())
@@ -215,6 +471,7 @@ class WurzelBot(object):
 
     def getGrowingPlantsInGardens(self):
         growingPlants = Counter()
+        self.__prefetchGardens()
         try:
             for garden in self.garten:
                 growingPlants.update(garden.getGrowingPlants())
@@ -232,54 +489,109 @@ class WurzelBot(object):
 
         return dict(allWimpsProducts)
 
+    def __getWimpOffers(self):
+        """
+        Liest die Wimps aller Gärten, beginnend mit dem bereits ausgewählten Garten, und gibt
+        sie als Liste von WimpOffer zurück.
+        """
+        currentGardenID = self.__HTTPConn.getCurrentGardenID()
+        gardens = sorted(self.garten, key=lambda garden: garden.getID() != currentGardenID)
+        offers = []
+        for garden in gardens:
+            for wimp, (price, products) in self.wimparea.getWimpsData(garden).items():
+                offers.append(WimpOffer(garden.getID(), wimp, price, products))
+        return offers
+
     def sellWimpsProducts(self, minimal_balance, minimal_profit):
-        stock_list = self.storage.getOrderedStockList()
-        wimps_data = []
-        for garden in self.garten:
-            for k, v in self.wimparea.getWimpsData(garden).items():
-                wimps_data.append({k: v})
-
-        for wimps in wimps_data:
-            for wimp, products in wimps.items():
-                if not self.checkWimpsProfitable(products, minimal_profit):
-                    self.wimparea.declineWimp(wimp)
-                else:
-                    if self.checkWimpsRequiredAmount(minimal_balance, products[1], stock_list):
-                        print("Selling products to wimp: " + wimp)
-                        print(self.wimparea.productsToString(products, self.productData))
-                        new_products_counts = self.wimparea.sellWimpProducts(wimp)
-                        for id, amount in products[1].items():
-                            stock_list[id] -= amount
-
-    def checkWimpsProfitable(self, products, minimal_profit):
-        npc_sum = 0
-        for id, amount in products[1].items():
-            npc_sum += self.productData.getProductByID(id).getPriceNPC() * amount
-        return products[0] / npc_sum * 100 >= minimal_profit
-
-    def checkWimpsRequiredAmount(self, minimal_balance, products, stock_list):
-        to_sell = True
-        for id, amount in products.items():
-            product = self.productData.getProductByID(id)
-            minimal_balance = max(self.note.getMinStock(), self.note.getMinStock(product.getName()), minimal_balance)
-            if stock_list.get(id, 0) - (amount + minimal_balance) <= 0:
-                to_sell = False
-                break
-        return to_sell
+        """
+        Bedient die Wimps aller Gärten. Alle Wimps werden gemeinsam bewertet (siehe WimpEvaluator):
+        unrentable werden abgelehnt, von den übrigen wird die Auswahl mit dem höchsten Erlös
+        bedient, die der Lagerbestand über den Mindestbeständen decken kann. Mindestgewinn
+        (wimpProfit), Mindestbestände und nie zu verkaufende Produkte (neverSell) werden,
+        sofern angegeben, aus den Regeln der Notiz übernommen.
+        """
+        rules = self.note.getRules()
+        minimal_profit = rules.getWimpProfit(minimal_profit)
+        offers = self.__getWimpOffers()
+
+        requiredStock = {}
+        neverSell = set()
+        for productID in {productID for offer in offers for productID in offer.products}:
+            productName = self.productData.getProductByID(productID).getName()
+            requiredStock[productID] = max(rules.getRequiredStock(productName), minimal_balance)
+            if rules.isNeverSell(productName):
+                neverSell.add(productID)
+
+        plan = WimpEvaluator(self.productData).evaluate(offers, self.storage.getOrderedStockList(),
+                                                        minimal_profit, requiredStock, neverSell)
+        for offer in plan.skip:
+            self.__logBot.info(f'Wimp {offer.wimpID} in garden {offer.gardenID} is not served.')
+
+        # Gartenweise, beginnend mit dem zuletzt gelesenen (noch ausgewählten) Garten
+        gardenIDs = list(dict.fromkeys(offer.gardenID for offer in reversed(offers)))
+        for gardenID in gardenIDs:
+            for offer in plan.decline:
+                if offer.gardenID == gardenID:
+                    self.wimparea.declineWimp(offer.wimpID, gardenID)
+            for offer in plan.accept:
+                if offer.gardenID == gardenID:
+                    print(f'Selling products to wimp: {offer.wimpID}')
+                    print(self.wimparea.productsToString([offer.price, offer.products], self.productData))
+                    self.wimparea.sellWimpProducts(offer.wimpID, gardenID)
 
     def getQuestProducts(self, quest_name, quest_number=0):
         return self.quest.getQuestProducts(quest_name, quest_number)
 
     def getNextRunTime(self):
+        """
+        Gibt den nächsten Zeitpunkt zurück, zu dem in einem der Gärten gegossen oder geerntet
+        werden muss, oder None, wenn in keinem Garten etwas wächst.
+        """
         garden_time = []
+        self.__prefetchGardens()
         for garden in self.garten:
-            garden_time.append(garden.getNextWaterHarvest())
+            next_time = garden.getNextWaterHarvest()
+            if next_time is not None:
+                garden_time.append(next_time)
 
         self.updateUserData()
+        if not garden_time:
+            print('Next time water/harvest: nothing is growing')
+            return None
         human_time = datetime.datetime.fromtimestamp(min(garden_time))
         print(f"Next time water/harvest: {human_time.strftime('%d/%m/%y %H:%M:%S')} ({min(garden_time)})")
         return min(garden_time)
 
+    def getNextBeeFlightTime(self):
+        """
+        Gibt den Zeitpunkt zurück, zu dem der erste Bienenstock von seinem Flug zurückkehrt,
+        oder None, wenn keine Bienenfarm vorhanden ist. Fliegt ein Stock nicht, ist das jetzt.
+        """
+        if not self.spieler.isHoneyFarmAvailable():
+            return None
+        flight_times = self.__HTTPConn.getHiveFlightTimes()
+        if not flight_times:
+            return None
+        return max(min(flight_times.values()), time.time())
+
+    def getSessionRemainingTime(self):
+        """Gibt die verbleibende Zeit der Session in Sekunden zurück."""
+        return self.__HTTPConn.getSessionRemainingTime()
+
+    def renewSession(self) -> bool:
+        """
+        Meldet den Account mit den Logindaten aus launchBot sofort erneut an. Gärten, Lager und
+        Produktkatalog bleiben erhalten, nur zwischengespeicherte Gartenzustände werden verworfen.
+        Läuft die Session ab, erneuert HTTPConnection sie ohnehin vor der nächsten Anfrage.
+        """
+        try:
+            self.__HTTPConn.renewSession()
+        except:
+            self.__logBot.error(i18n.t('wimpb.error_starting_wbot'))
+            return False
+        self.__logBot.info(f'Session for User {self.spieler.accountLogin.user} renewed')
+        return True
+
     def hasEmptyFields(self):
         emptyFields = self.getEmptyFieldsOfGardens()
         amount = 0
@@ -291,6 +603,7 @@ class WurzelBot(object):
     def getWeedFieldsOfGardens(self):
         """Gibt alle Unkrau-Felder aller normalen Gärten zurück."""
         weedFields = []
+        self.__prefetchGardens()
         try:
             for garden in self.garten:
                 weedFields.append(garden.getWeedFields())
@@ -338,6 +651,7 @@ class WurzelBot(object):
             amount = self.storage.getStockByProductID(product.getID())
 
         remainingAmount = amount
+        self.__prefetchGardens()
         garden: Garden
         for garden in self.garten:
             planted += garden.growPlant(product.getID(), product.getSX(), product.getSY(), remainingAmount)
@@ -347,6 +661,54 @@ class WurzelBot(object):
 
         return planted
 
+    def __getPreferredGardens(self, rules):
+        """Gibt die laut Notiz (preferredCrops) bevorzugten Gärten je Produkt-ID zurück."""
+        preferredGardens = {}
+        for gardenID, productNames in rules.getPreferredCropsByGarden().items():
+            for productName in productNames:
+                product = self.productData.getProductByName(productName)
+                if product is not None:
+                    preferredGardens.setdefault(product.getID(), set()).add(gardenID)
+        return preferredGardens
+
+    def growPlantsByPlan(self, objective=OBJECTIVE_FIELDS):
+        """
+        Erstellt mit dem GardenPlanner einen Anbauplan für alle vorrätigen Pflanzen über alle
+        Gärten hinweg und pflanzt diesen an. Gibt die Anzahl der gepflanzten Pflanzen zurück.
+        Pflanzen, deren Bestand den Höchstbestand der Notiz (maxStock) erreicht hat, werden
+        nicht angebaut; bevorzugte Pflanzen eines Gartens (preferredCrops) zuerst dort.
+        """
+        self.__prefetchGardens()
+        freeFieldsByGarden = {}
+        for garden in self.garten:
+            freeFields = garden.getFreeFields()
+            if freeFields is not None:
+                freeFieldsByGarden[garden.getID()] = freeFields
+
+        rules = self.note.getRules()
+        stock = {}
+        for productID, amount in self.storage.getOrderedStockList().items():
+            maxStock = rules.getMaxStock(self.productData.getProductByID(productID).getName())
+            if maxStock is None or amount < maxStock:
+                stock[productID] = amount
+
+        planner = GardenPlanner(self.productData, objective)
+        placements = planner.plan(freeFieldsByGarden, stock, self.__getPreferredGardens(rules))
+        self.__logBot.info(f'Anbauplan: {len(placements)} Pflanzen auf {planner.getFilledFields(placements)} Feldern.')
+
+        fieldsByGardenAndProduct = {}
+        for placement in placements:
+            key = (placement.gardenID, placement.productID, placement.sx, placement.sy)
+            fieldsByGardenAndProduct.setdefault(key, []).append(placement.fieldID)
+
+        planted = 0
+        gardens = {garden.getID(): garden for garden in self.garten}
+        for (gardenID, productID, sx, sy), fieldIDs in fieldsByGardenAndProduct.items():
+            planted += gardens[gardenID].growPlant(productID, sx, sy, len(fieldIDs), fieldIDs=fieldIDs)
+
+        self.storage.updateNumberInStock()
+        return planted
+
     def growPlantsInAquaGardens(self, productName, amount=-1):
         """
         Pflanzt so viele Pflanzen von einer Sorte wie möglich über alle Gärten hinweg an.
@@ -395,9 +757,10 @@ class WurzelBot(object):
 
     def getOrderedStockList(self):
         orderedList = ''
-        for productID in self.storage.getOrderedStockList():
+        orderedStockList = self.storage.getOrderedStockList()
+        for productID, amount in orderedStockList.items():
             orderedList += str(self.productData.getProductByID(productID).getName()).ljust(20)
-            orderedList += str(self.storage.getOrderedStockList()[productID]).rjust(5)
+            orderedList += str(amount).rjust(5)
             orderedList += str('\n')
         return orderedList.strip()
     
@@ -405,8 +768,7 @@ class WurzelBot(object):
         lowestStock = -1
         lowestProductId = -1
         for productID in self.storage.getOrderedStockList():
-            if not self.productData.getProductByID(productID).isPlant() or \
-                not self.productData.getProductByID(productID).isPlantable():
+            if not self.productData.isPlantableProduct(productID):
                 continue
 
             currentStock = self.storage.getStockByProductID(productID)
@@ -422,9 +784,7 @@ class WurzelBot(object):
         lowestSingleStock = -1
         lowestSingleProductId = -1
         for productID in self.storage.getOrderedStockList():
-            if not self.productData.getProductByID(productID).isPlant() or \
-                not self.productData.getProductByID(productID).isPlantable() or \
-                not self.productData.getProductByID(productID).getName() in self.productData.getListOfSingleFieldPlants():
+            if not self.productData.isSingleFieldPlant(productID):
                 continue
 
             currentStock = self.storage.getStockByProductID(productID)
@@ -445,6 +805,7 @@ class WurzelBot(object):
     def removeWeedInAllGardens(self):
         """Entfernt Unkraut/Maulwürfe/Steine aus allen Gärten."""
         #TODO: Wassergarten ergänzen
+        self.__prefetchGardens()
         try:
             for garden in self.garten:
                 garden.removeWeed()
@@ -452,8 +813,8 @@ class WurzelBot(object):
         except:
             self.__logBot.error(i18n.t('wimpb.w_harvest_not_successful'))
 
-    def getDailyLoginBonus(self):
-        self.bonus.getDailyLoginBonus()
+    def getDailyLoginBonus(self, delay=3):
+        self.bonus.getDailyLoginBonus(delay)
 
     def infinityQuest(self, MINwt):
         #TODO: Mehr Checks bzw Option wieviele Quests/WT man ausgeben mag - da es kein cooldown gibt! (hoher wt verlust)
@@ -494,6 +855,13 @@ class WurzelBot(object):
 
         productId = product.getID()
 
+        maxStock = self.note.getRules().getMaxStock(productName)
+        if maxStock is not None:
+            amount = min(amount, maxStock - self.storage.getStockByProductID(productId))
+            if amount <= 0:
+                self.__logBot.info(f'Not buying "{productName}", maximum stock of {maxStock} reached')
+                return 0
+
         Shop = None
         for k, ID in Shops.items():
             if productName in k:
@@ -515,12 +883,17 @@ class WurzelBot(object):
     def sendBienen(self):
         #TODO prüfen ob wirklich gesendet wurde, ansonsten Befehl wiederholen
         """
-        Probiert alle Bienen für Zeitoption 1 (ohne Verkürzung 2h) zu senden
+        Probiert alle Bienen für die Zeitoption der Notiz (beeTour, siehe BEE_TOURS) zu senden,
+        standardmäßig Zeitoption 1 (ohne Verkürzung 2h)
         """
         if self.spieler.isHoneyFarmAvailable():
+            tour = self.note.getRules().getBeeTour()
+            if tour not in BEE_TOURS:
+                self.__logBot.error(f'Unknown beeTour {tour} in note, using 1')
+                tour = 1
             hives = self.__HTTPConn.getHoneyFarmInfos()[2]
             for hive in hives:
-                self.__HTTPConn.sendeBienen(hive)
+                self.__HTTPConn.sendeBienen(hive, tour)
                 self.bienenfarm.harvest()
         else:
             self.__logBot.error('Konnte nicht alle Bienen ernten.')
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Gemeinsame Hilfen für Tests gegen den ReplayServer."""
+
+from collections import Counter
+from src.HTTPCommunication import HTTPConnection
+from src.Instrumentation import InstrumentationHook
+from src.ReplayServer import ReplayServer
+from src.Spieler import Login
+
+class RequestCounter(InstrumentationHook):
+    """Zählt die gesendeten Anfragen je Endpunkt."""
+
+    def __init__(self):
+        self.requests = Counter()
+
+    def onRequest(self, event):
+        self.requests[event.endpoint] += 1
+
+def startReplay(**account):
+    """
+    Startet einen ReplayServer mit account (gardens, aquaGarden, seed, ...) und gibt den Server
+    sowie eine angemeldete HTTPConnection mit Token aus der Gartenseite und RequestCounter zurück.
+    """
+    server = ReplayServer(**account)
+    httpConn = HTTPConnection(server.start())
+    httpConn.logIn(Login(server=1, user='test', password='test', language='de'))
+    httpConn.refreshToken()
+    counter = RequestCounter()
+    httpConn.getInstrumentation().addHook(counter)
+    return server, httpConn, counter
+
+def failingRequest(exception):
+    """Gibt einen Ersatz für HTTPConnection.__sendRequest zurück, der immer exception auslöst."""
+    def sendRequest(self, *args, **kwargs):
+        raise exception
+    return sendRequest
+
+SEND_REQUEST = '_HTTPConnection__sendRequest'
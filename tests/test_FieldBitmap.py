@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from src.FieldBitmap import FieldBitmap, LEN_X, LEN_Y, MAX_FIELDS, PLANT_SIZES, \
+    getFootprintFields, getFootprintFieldsAsString, getFootprintMask
+
+
+class FootprintTest(unittest.TestCase):
+
+    def test_footprints_of_all_sizes(self):
+        self.assertEqual(getFootprintFields(1, 1, 1), (1,))
+        self.assertEqual(getFootprintFields(1, 2, 1), (1, 2))
+        self.assertEqual(getFootprintFields(1, 1, 2), (1, 1 + LEN_X))
+        self.assertEqual(getFootprintFields(1, 2, 2), (1, 2, 1 + LEN_X, 2 + LEN_X))
+        self.assertEqual(getFootprintFieldsAsString(5, 2, 2), f'5,6,{5 + LEN_X},{6 + LEN_X}')
+
+    def test_mask_matches_fields(self):
+        for sx, sy in PLANT_SIZES:
+            for fieldID in range(1, MAX_FIELDS + 1):
+                mask = getFootprintMask(fieldID, sx, sy)
+                if mask == 0:
+                    continue
+                expected = sum(1 << (field - 1) for field in getFootprintFields(fieldID, sx, sy))
+                self.assertEqual(mask, expected, (fieldID, sx, sy))
+
+    def test_plants_over_the_edge_have_no_mask(self):
+        # Letzte Spalte, letzte Zeile und letztes Feld
+        self.assertEqual(getFootprintMask(LEN_X, 2, 1), 0)
+        self.assertNotEqual(getFootprintMask(LEN_X, 1, 2), 0)
+        self.assertEqual(getFootprintMask(MAX_FIELDS - LEN_X + 1, 1, 2), 0)
+        self.assertEqual(getFootprintMask(MAX_FIELDS, 2, 2), 0)
+        self.assertNotEqual(getFootprintMask(MAX_FIELDS, 1, 1), 0)
+        self.assertEqual(sum(getFootprintMask(fieldID, 2, 2) != 0 for fieldID in range(1, MAX_FIELDS + 1)),
+                         (LEN_X - 1) * (LEN_Y - 1))
+
+
+class FieldBitmapTest(unittest.TestCase):
+
+    def test_from_field_ids_round_trip(self):
+        fieldIDs = [1, 2, 18, 100, MAX_FIELDS]
+        bitmap = FieldBitmap.fromFieldIDs(fieldIDs)
+        self.assertEqual(bitmap.getFieldIDs(), fieldIDs)
+        self.assertEqual(len(bitmap), 5)
+        self.assertTrue(bitmap.isFree(18))
+        self.assertFalse(bitmap.isFree(3))
+
+    def test_occupy_and_release(self):
+        bitmap = FieldBitmap.fromFieldIDs(range(1, MAX_FIELDS + 1))
+        self.assertTrue(bitmap.canPlace(1, 2, 2))
+        bitmap.occupy(1, 2, 2)
+        self.assertEqual(len(bitmap), MAX_FIELDS - 4)
+        for fieldID in (1, 2, 1 + LEN_X, 2 + LEN_X):
+            self.assertFalse(bitmap.isFree(fieldID))
+        # Überlappende Pflanzen passen nicht mehr
+        self.assertFalse(bitmap.canPlace(2, 2, 1))
+        self.assertFalse(bitmap.canPlace(1 + LEN_X, 1, 1))
+        self.assertTrue(bitmap.canPlace(3, 2, 2))
+
+        bitmap.release(1, 2, 2)
+        self.assertEqual(len(bitmap), MAX_FIELDS)
+
+    def test_copy_is_independent(self):
+        bitmap = FieldBitmap.fromFieldIDs([1, 2])
+        copy = bitmap.copy()
+        copy.occupy(1, 2, 1)
+        self.assertEqual(bitmap.getFieldIDs(), [1, 2])
+        self.assertFalse(copy)
+
+    def test_cannot_place_over_the_edge(self):
+        bitmap = FieldBitmap.fromFieldIDs(range(1, MAX_FIELDS + 1))
+        self.assertFalse(bitmap.canPlace(LEN_X, 2, 1))
+        self.assertFalse(bitmap.canPlace(MAX_FIELDS, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
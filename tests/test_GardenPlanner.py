@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json, random, unittest
+from src.FieldBitmap import FieldBitmap, MAX_FIELDS, getFootprintFields
+from src.GardenPlanner import GardenPlanner, OBJECTIVE_VALUE
+from src.Produktdaten import ProductData
+
+# productID -> (sx, sy, crop, Zeit bis zur Ernte in Sekunden, NPC Preis)
+PRODUCTS = {1: (1, 1, 2, 3600, 1.0),
+            2: (1, 1, 2, 3600, 5.0),
+            3: (2, 1, 4, 3600, 1.0),
+            4: (1, 2, 4, 3600, 1.0),
+            5: (2, 2, 8, 3600, 1.0)}
+
+class _CatalogueConnection(object):
+    """Liefert den Produktkatalog PRODUCTS anstelle des Servers."""
+
+    def getAllProductInformations(self):
+        products = {'0': {'name': 'Coins', 'category': '', 'sx': 1, 'sy': 1, 'level': 0,
+                          'crop': 0, 'plantable': 0, 'time': 0}}
+        for productID, (sx, sy, crop, time, price) in PRODUCTS.items():
+            products[str(productID)] = {'name': f'Pflanze {productID}', 'category': 'v', 'sx': sx, 'sy': sy,
+                                        'level': 1, 'crop': crop, 'plantable': 1, 'time': time}
+        return json.dumps(products)
+
+    def getNPCPrices(self):
+        return {f'Pflanze {productID}': product[4] for productID, product in PRODUCTS.items()}
+
+def _productData():
+    productData = ProductData(_CatalogueConnection())
+    productData.initAllProducts()
+    return productData
+
+
+class GardenPlannerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.productData = _productData()
+
+    def __assertValid(self, placements, freeFieldsByGarden, stock):
+        """Jede Platzierung liegt auf freien Feldern, keine überlappt, kein Bestand wird überschritten."""
+        used = {gardenID: set() for gardenID in freeFieldsByGarden}
+        planted = {}
+        for placement in placements:
+            fields = set(getFootprintFields(placement.fieldID, placement.sx, placement.sy))
+            free = set(freeFieldsByGarden[placement.gardenID].getFieldIDs())
+            self.assertTrue(fields <= free, placement)
+            self.assertFalse(fields & used[placement.gardenID], placement)
+            used[placement.gardenID] |= fields
+            planted[placement.productID] = planted.get(placement.productID, 0) + 1
+        for productID, amount in planted.items():
+            self.assertLessEqual(amount, stock[productID])
+        return used, planted
+
+    def test_large_plants_first_and_small_plants_fill_gaps(self):
+        # Zwei Zeilen mit je 3 freien Feldern: ein 2x2 und zwei 1x1 füllen alle 6 Felder
+        freeFields = {1: FieldBitmap.fromFieldIDs([1, 2, 3, 18, 19, 20])}
+        stock = {1: 5, 5: 5}
+        placements = GardenPlanner(self.productData).plan(freeFields, stock)
+
+        self.assertEqual(placements[0].productID, 5)
+        self.assertEqual(placements[0].fieldID, 1)
+        used, planted = self.__assertValid(placements, freeFields, stock)
+        self.assertEqual(planted, {5: 1, 1: 2})
+        self.assertEqual(GardenPlanner(self.productData).getFilledFields(placements), 6)
+
+    def test_plan_cannot_be_extended(self):
+        rnd = random.Random(7)
+        planner = GardenPlanner(self.productData)
+        for _ in range(20):
+            freeFields = {gardenID: FieldBitmap.fromFieldIDs(fieldID for fieldID in range(1, MAX_FIELDS + 1)
+                                                             if rnd.random() < 0.5)
+                          for gardenID in (1, 2)}
+            stock = {productID: rnd.randint(0, 40) for productID in PRODUCTS}
+            placements = planner.plan(freeFields, stock)
+            used, planted = self.__assertValid(placements, freeFields, stock)
+
+            # Bleibt Bestand übrig, passt die Pflanze auf kein freies Feld mehr
+            for gardenID, bitmap in freeFields.items():
+                remaining = FieldBitmap.fromFieldIDs(set(bitmap.getFieldIDs()) - used[gardenID])
+                for productID, (sx, sy, *_) in PRODUCTS.items():
+                    if planted.get(productID, 0) < stock[productID]:
+                        self.assertFalse(any(remaining.canPlace(fieldID, sx, sy) for fieldID in remaining.getFieldIDs()),
+                                         (gardenID, productID))
+
+    def test_input_bitmaps_are_not_changed(self):
+        bitmap = FieldBitmap.fromFieldIDs(range(1, 11))
+        GardenPlanner(self.productData).plan({1: bitmap}, {1: 100})
+        self.assertEqual(bitmap.getFieldIDs(), list(range(1, 11)))
+
+    def test_lowest_stock_first_for_same_size(self):
+        placements = GardenPlanner(self.productData).plan({1: FieldBitmap.fromFieldIDs([1, 2])}, {1: 10, 2: 3})
+        self.assertEqual([placement.productID for placement in placements], [2, 2])
+
+    def test_value_objective_prefers_higher_value_per_field(self):
+        planner = GardenPlanner(self.productData, OBJECTIVE_VALUE)
+        placements = planner.plan({1: FieldBitmap.fromFieldIDs([1, 2])}, {1: 10, 2: 10})
+        self.assertEqual([placement.productID for placement in placements], [2, 2])
+
+    def test_preferred_gardens_are_filled_first(self):
+        freeFields = {1: FieldBitmap.fromFieldIDs([1, 2]), 2: FieldBitmap.fromFieldIDs([1, 2])}
+        placements = GardenPlanner(self.productData).plan(freeFields, {1: 2, 2: 2}, preferredGardens={1: {2}})
+        byProduct = {}
+        for placement in placements:
+            byProduct.setdefault(placement.productID, set()).add(placement.gardenID)
+        self.assertEqual(byProduct, {1: {2}, 2: {1}})
+
+    def test_unknown_objective(self):
+        self.assertRaises(ValueError, GardenPlanner, self.productData, 'speed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from src.FieldBitmap import MAX_FIELDS
+from src.Garten import Garden
+
+class _Connection(object):
+    """Nimmt die Platzierungen von Garden entgegen, statt sie an den Server zu senden."""
+
+    def __init__(self, emptyFields, results=None):
+        self.emptyFields = emptyFields
+        self.results = results
+        self.sent = []
+
+    def getEmptyFieldsOfGarden(self, gardenID):
+        return list(self.emptyFields)
+
+    def growPlants(self, gardenID, plant, placements, chunkSize):
+        self.sent.append(placements)
+        return self.results if self.results is not None else [True] * len(placements)
+
+
+class GrowPlantTest(unittest.TestCase):
+
+    def test_overlapping_explicit_placements_are_sent_once(self):
+        connection = _Connection(range(1, MAX_FIELDS + 1))
+        garden = Garden(connection, 1)
+        # 2x2 auf Feld 1 und 2 überlappen; nur die erste wird gesendet
+        self.assertEqual(garden.growPlant(5, 2, 2, 3, fieldIDs=[1, 2, 3]), 2)
+        self.assertEqual([field for field, _ in connection.sent[0]], [1, 3])
+        self.assertFalse(garden.getFreeFields().canPlace(2, 2, 2))
+
+    def test_failed_placements_are_released(self):
+        connection = _Connection([1, 2, 3], results=[True, False])
+        garden = Garden(connection, 1)
+        self.assertEqual(garden.growPlant(7, 1, 1, 2), 1)
+        self.assertEqual(garden.getFreeFields().getFieldIDs(), [2, 3])
+
+    def test_planned_placements_fill_from_field_one(self):
+        connection = _Connection([3, 4, 5, 6])
+        garden = Garden(connection, 1)
+        self.assertEqual(garden.growPlant(7, 2, 1, 5), 2)
+        self.assertEqual([field for field, _ in connection.sent[0]], [3, 5])
+        self.assertEqual([fields for _, fields in connection.sent[0]], ['3,4', '5,6'])
+
+
+if __name__ == '__main__':
+    unittest.main()
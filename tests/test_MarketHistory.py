@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os, shutil, tempfile, unittest
+from src.MarketHistory import MarketHistory, MARKET_HISTORY_MAGIC, _HEADER, _RECORD
+from src.Marktplatz import Marketplace
+
+class _Clock(object):
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class MarketHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, 'history', 'market.bin')
+        self.clock = _Clock()
+        self.history = MarketHistory(self.fileName, self.clock)
+
+    def tearDown(self):
+        self.history.close()
+        shutil.rmtree(self.directory)
+
+    def __reopen(self):
+        self.history.close()
+        self.history = MarketHistory(self.fileName, self.clock)
+
+    def test_record_merges_price_levels(self):
+        self.history.record(1, [[10, 1.5], [5, 1.2], [3, 1.5]], timestamp=100.0)
+        self.assertEqual(self.history.getLatestSnapshot(1), (100.0, ((1.2, 5), (1.5, 13))))
+        self.assertEqual(os.path.getsize(self.fileName), _HEADER.size + 2 * _RECORD.size)
+
+    def test_snapshots_survive_reopening(self):
+        self.history.record(1, [[5, 1.2]], timestamp=100.0)
+        self.history.record(2, [[1, 9.99], [2, 10.0]], timestamp=100.0)
+        self.history.record(1, [], timestamp=200.0)
+        self.__reopen()
+
+        self.assertEqual(sorted(self.history.getProductIDs()), [1, 2])
+        self.assertEqual(self.history.getSnapshots(1), [(100.0, ((1.2, 5),)), (200.0, ())])
+        self.assertEqual(self.history.getSnapshots(2), [(100.0, ((9.99, 1), (10.0, 2)))])
+
+    def test_empty_snapshot(self):
+        self.history.record(1, [], timestamp=100.0)
+        self.assertEqual(self.history.getLatestSnapshot(1), (100.0, ()))
+        self.assertIsNone(self.history.getCheapestPrice(1))
+        self.assertIsNone(self.history.getMovingAverage(1, 1000, now=100.0))
+        self.assertEqual(self.history.findGaps(1), [])
+
+    def test_torn_record_is_discarded(self):
+        self.history.record(1, [[5, 1.2]], timestamp=100.0)
+        self.history.record(1, [[5, 1.3]], timestamp=200.0)
+        self.history.close()
+        with open(self.fileName, 'ab') as file:
+            file.write(_RECORD.pack(300.0, 1, 140, 5)[:7])
+        self.__reopen()
+
+        self.assertEqual(os.path.getsize(self.fileName), _HEADER.size + 2 * _RECORD.size)
+        self.assertEqual(self.history.getLatestSnapshot(1), (200.0, ((1.3, 5),)))
+
+        # Nach dem Abschneiden wird wieder an einer Datensatzgrenze angehängt
+        self.history.record(1, [[5, 1.4]], timestamp=300.0)
+        self.__reopen()
+        self.assertEqual([timestamp for timestamp, _ in self.history.getSnapshots(1)], [100.0, 200.0, 300.0])
+
+    def test_unknown_format_is_recreated(self):
+        self.history.close()
+        with open(self.fileName, 'wb') as file:
+            file.write(b'XXXX' + b'\0' * 40)
+        with self.assertLogs('bot.MarketHistory', 'WARNING'):
+            self.history = MarketHistory(self.fileName, self.clock)
+
+        self.assertEqual(self.history.getProductIDs(), [])
+        with open(self.fileName, 'rb') as file:
+            self.assertEqual(file.read(), _HEADER.pack(MARKET_HISTORY_MAGIC, 1))
+
+    def test_out_of_order_snapshots(self):
+        for timestamp, price in ((100.0, 3.0), (300.0, 1.0), (200.0, 2.0), (50.0, 4.0)):
+            self.history.record(1, [[1, price]], timestamp=timestamp)
+
+        self.assertEqual([timestamp for timestamp, _ in self.history.getSnapshots(1)], [50.0, 100.0, 200.0, 300.0])
+        self.assertEqual(self.history.getLatestSnapshot(1)[0], 300.0)
+        # Die Präfixsummen folgen der sortierten Reihenfolge
+        self.assertAlmostEqual(self.history.getMovingAverage(1, 150, now=250.0), 2.5)
+        self.assertAlmostEqual(self.history.getMovingAverage(1, 1000, now=300.0), 2.5)
+
+        self.__reopen()
+        self.assertEqual([timestamp for timestamp, _ in self.history.getSnapshots(1)], [50.0, 100.0, 200.0, 300.0])
+
+    def test_window_queries(self):
+        self.history.record(1, [[1, 2.0]], timestamp=100.0)
+        self.history.record(1, [], timestamp=200.0)
+        self.history.record(1, [[1, 4.0]], timestamp=300.0)
+
+        self.assertEqual(self.history.getCheapestPrice(1), 2.0)
+        self.assertEqual(self.history.getCheapestPrice(1, window=150, now=300.0), 4.0)
+        self.assertIsNone(self.history.getCheapestPrice(1, window=50, now=250.0))
+        # Momentaufnahmen ohne Angebote zählen nicht zum Durchschnitt
+        self.assertAlmostEqual(self.history.getMovingAverage(1, 150, now=300.0), 4.0)
+        # Die Fenstergrenzen sind eingeschlossen
+        self.assertAlmostEqual(self.history.getMovingAverage(1, 200, now=300.0), 3.0)
+        self.assertEqual([timestamp for timestamp, _ in self.history.getSnapshots(1, 150.0, 300.0)], [200.0, 300.0])
+        self.assertIsNone(self.history.getCheapestPrice(2))
+        self.assertIsNone(self.history.getMovingAverage(2, 100))
+
+    def test_latest_snapshot_max_age(self):
+        self.history.record(1, [[1, 2.0]], timestamp=900.0)
+        self.assertIsNotNone(self.history.getLatestSnapshot(1, maxAge=100))
+        self.clock.now = 1001.0
+        self.assertIsNone(self.history.getLatestSnapshot(1, maxAge=100))
+        self.assertIsNone(self.history.findGaps(1, maxAge=100))
+
+    def test_find_gaps(self):
+        self.history.record(1, [[1, 1.0], [1, 1.05], [1, 1.5], [1, 1.6], [1, 3.0]], timestamp=1000.0)
+        self.assertEqual(self.history.findGaps(1), [[1.05, 1.5], [1.6, 3.0]])
+        self.assertEqual(self.history.findGaps(1, maxPrice=2.0), [[1.05, 1.5]])
+        self.assertIsNone(self.history.findGaps(2))
+
+
+class _MarketConnection(object):
+    """Liefert die Angebote seitenweise; failAfter bricht nach so vielen Angeboten ab."""
+
+    def __init__(self, offers, failAfter=None):
+        self.offers = offers
+        self.failAfter = failAfter
+
+    def getAllTradeableProductsFromOverview(self):
+        return [1, 2]
+
+    def iterOffersFromProduct(self, id, maxPrice=None):
+        for index, offer in enumerate(self.offers):
+            if index == self.failAfter:
+                raise RuntimeError('page failed')
+            if maxPrice is not None and offer[1] > maxPrice:
+                return
+            yield offer
+
+
+class MarketplaceRecordingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.history = MarketHistory(os.path.join(self.directory, 'market.bin'), _Clock())
+
+    def tearDown(self):
+        self.history.close()
+        shutil.rmtree(self.directory)
+
+    def test_complete_offers_are_recorded(self):
+        marketplace = Marketplace(_MarketConnection([[2, 1.0], [3, 2.0]]), history=self.history)
+        self.assertEqual(marketplace.getAllOffersOfProduct(1), [[2, 1.0], [3, 2.0]])
+        self.assertEqual(self.history.getLatestSnapshot(1)[1], ((1.0, 2), (2.0, 3)))
+
+    def test_partial_offers_are_not_recorded(self):
+        marketplace = Marketplace(_MarketConnection([[2, 1.0], [3, 2.0]], failAfter=1), history=self.history)
+        self.assertEqual(marketplace.getAllOffersOfProduct(1), [[2, 1.0]])
+        self.assertIsNone(self.history.getLatestSnapshot(1))
+
+    def test_offers_up_to_max_price_are_not_recorded(self):
+        marketplace = Marketplace(_MarketConnection([[2, 1.0], [3, 2.0]]), history=self.history)
+        self.assertEqual(marketplace.getAllOffersOfProduct(1, maxPrice=1.5), [[2, 1.0]])
+        self.assertIsNone(self.history.getLatestSnapshot(1))
+
+    def test_cheapest_offer_from_history(self):
+        marketplace = Marketplace(_MarketConnection([[2, 1.0]], failAfter=0), history=self.history)
+        self.assertIsNone(marketplace.getCheapestOffer(1))
+        self.history.record(1, [[4, 0.5]])
+        self.assertEqual(marketplace.getCheapestOffer(1, maxAge=60), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
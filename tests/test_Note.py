@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io, unittest
+from contextlib import redirect_stdout
+from src.Note import Note, NoteRules
+
+NOTE = '''Meine Notiz
+minStock: 100
+minStock(Karotte): 200
+minStock(Salat) : 50
+maxStock: 5000
+maxStock(Salat): 1000
+neverSell: Apfel, KÜRBIS,
+preferredCrops(1): Karotte, Salat
+preferredCrops( 2 ): Tomate
+wimpProfit: 90
+'''
+
+class NoteRulesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = NoteRules(NOTE.replace('\n', '\r\n'))
+
+    def test_min_stock(self):
+        self.assertEqual(self.rules.getMinStock(), 100)
+        self.assertEqual(self.rules.getMinStock('karotte'), 200)
+        self.assertEqual(self.rules.getMinStock('Salat'), 50)
+        self.assertEqual(self.rules.getMinStock('Apfel'), 0)
+        # Der höhere aus globalem und produktbezogenem Mindestbestand gilt
+        self.assertEqual(self.rules.getRequiredStock('Karotte'), 200)
+        self.assertEqual(self.rules.getRequiredStock('Salat'), 100)
+
+    def test_max_stock(self):
+        self.assertEqual(self.rules.getMaxStock('SALAT'), 1000)
+        self.assertEqual(self.rules.getMaxStock('Karotte'), 5000)
+        self.assertIsNone(NoteRules('minStock: 5').getMaxStock('Karotte'))
+
+    def test_never_sell(self):
+        self.assertTrue(self.rules.isNeverSell('apfel'))
+        self.assertTrue(self.rules.isNeverSell('Kürbis'))
+        self.assertFalse(self.rules.isNeverSell('Karotte'))
+
+    def test_preferred_crops(self):
+        self.assertEqual(self.rules.getPreferredCrops(1), frozenset(['karotte', 'salat']))
+        self.assertEqual(self.rules.getPreferredCrops('2'), frozenset(['tomate']))
+        self.assertEqual(self.rules.getPreferredCrops(3), frozenset())
+        self.assertEqual(sorted(self.rules.getPreferredCropsByGarden()), [1, 2])
+
+    def test_defaults(self):
+        rules = NoteRules()
+        self.assertEqual(rules.getMinStock(), 0)
+        self.assertEqual(rules.getWimpProfit(), None)
+        self.assertEqual(rules.getWimpProfit(80), 80)
+        self.assertEqual(rules.getBeeTour(), 1)
+        self.assertEqual(self.rules.getWimpProfit(80), 90)
+        self.assertEqual(NoteRules('beeTour: 3').getBeeTour(), 3)
+
+    def test_first_occurrence_wins(self):
+        rules = NoteRules('minStock: 10\nminStock: 20\nminStock(Salat): 1\nminStock(salat): 2\n'
+                          'neverSell: Apfel\nneverSell: Birne\npreferredCrops(1): Salat\npreferredCrops(1): Tomate\n'
+                          'wimpProfit: 70\nwimpProfit: 80\nbeeTour: 2\nbeeTour: 4')
+        self.assertEqual(rules.getMinStock(), 10)
+        self.assertEqual(rules.getMinStock('Salat'), 1)
+        self.assertFalse(rules.isNeverSell('Birne'))
+        self.assertEqual(rules.getPreferredCrops(1), frozenset(['salat']))
+        self.assertEqual(rules.getWimpProfit(), 70)
+        self.assertEqual(rules.getBeeTour(), 2)
+
+    def test_invalid_amount(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            rules = NoteRules('minStock: viele\nminStock: 20\nmaxStock(Salat): 1.5')
+        # Auch eine ungültige Angabe zählt als erste
+        self.assertEqual(rules.getMinStock(), 0)
+        self.assertEqual(rules.getMaxStock('Salat'), 0)
+        self.assertIn('Error: "minStock:" must be an int', output.getvalue())
+        self.assertIn('Error: "maxStock(Salat):" must be an int', output.getvalue())
+
+    def test_invalid_preferred_crops_garden(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            rules = NoteRules('preferredCrops(Garten): Salat\npreferredCrops: Tomate')
+        self.assertEqual(rules.getPreferredCropsByGarden(), {})
+        self.assertIn('Error: "preferredCrops(Garten):" must name a garden number', output.getvalue())
+
+    def test_text_without_rules(self):
+        rules = NoteRules('Einkaufsliste\n- Salat\nminStock 100')
+        self.assertEqual(rules.getMinStock(), 0)
+        self.assertEqual(rules.getPreferredCropsByGarden(), {})
+
+
+class _NoteConnection(object):
+    def __init__(self, text):
+        self.text = text
+        self.requests = 0
+
+    def getNote(self):
+        self.requests += 1
+        return self.text
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class NoteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = _NoteConnection('minStock: 10')
+        self.clock = _Clock()
+        self.note = Note(self.connection, ttl=60, clock=self.clock)
+
+    def test_note_is_cached_until_ttl(self):
+        self.assertEqual(self.note.getMinStock(), 10)
+        self.assertEqual(self.note.getNote(), 'minStock: 10')
+        self.clock.now = 59.0
+        self.note.getRules()
+        self.assertEqual(self.connection.requests, 1)
+
+        self.clock.now = 60.0
+        self.connection.text = 'minStock: 20'
+        self.assertEqual(self.note.getMinStock(), 20)
+        self.assertEqual(self.connection.requests, 2)
+
+    def test_invalidate(self):
+        self.note.getRules()
+        self.note.invalidate()
+        self.connection.text = 'minStock: 30'
+        self.assertEqual(self.note.getMinStock(), 30)
+        self.assertEqual(self.connection.requests, 2)
+
+    def test_rules_are_rebuilt_only_when_text_changes(self):
+        rules = self.note.getRules()
+        self.note.invalidate()
+        self.assertIs(self.note.getRules(), rules)
+        self.assertEqual(self.connection.requests, 2)
+
+        self.connection.text = 'minStock: 10\n'
+        self.note.refresh()
+        self.assertIsNot(self.note.getRules(), rules)
+
+
+if __name__ == '__main__':
+    unittest.main()
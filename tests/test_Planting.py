@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+from src.HTTPCommunication import HTTPConnection
+from src.ReplayServer import ReplayGame
+from tests.replay import startReplay, failingRequest, SEND_REQUEST
+
+
+class GrowPlantsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server, self.httpConn, self.counter = startReplay(gardens=1, aquaGarden=True)
+        products = self.server.game._ReplayGame__products
+        inventory = self.server.game.getInventory()
+        # Eine 1x1 Pflanze mit ausreichend Bestand
+        self.plant = next(productID for productID, product in sorted(products.items())
+                          if product['plantable'] == 1 and product['sx'] == product['sy'] == 1
+                          and inventory.get(productID, 0) >= 20)
+        self.empty = self.httpConn.getEmptyFieldsOfGarden(1)
+        self.occupied = self.httpConn.getPlantsToWaterInGarden(1)['fieldID'][0]
+        self.counter.requests.clear()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def __placements(self, fieldIDs):
+        return [(fieldID, str(fieldID)) for fieldID in fieldIDs]
+
+    def __plantedFields(self):
+        return {anchor for anchor, plant in self.server.game.getGarden(1).plants.items() if plant[0] == self.plant}
+
+    def test_whole_chunk_in_one_request(self):
+        results = self.httpConn.growPlants(1, self.plant, self.__placements(self.empty[:8]))
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(self.counter.requests['save/pflanz.php'], 1)
+
+    def test_occupied_field_fails_without_resend(self):
+        fieldIDs = self.empty[:3] + [self.occupied] + self.empty[3:6]
+        results = self.httpConn.growPlants(1, self.plant, self.__placements(fieldIDs))
+
+        self.assertEqual(results, [True, True, True, False, True, True, True])
+        self.assertTrue(set(self.empty[:6]) <= self.__plantedFields())
+        # Block, Hälften der 6 noch freien Platzierungen; das belegte Feld wird nicht erneut gesendet
+        self.assertEqual(self.counter.requests['save/pflanz.php'], 3)
+
+    def test_partly_applied_chunk_is_not_resent(self):
+        original = ReplayGame._ReplayGame__plant
+        calls = []
+
+        def partlyPlant(game, garden, placements):
+            # Beim ersten Block übernimmt der Server nur die ersten beiden Platzierungen
+            calls.append(len(placements))
+            if len(calls) == 1:
+                original(game, garden, placements[:2])
+                return False
+            return original(game, garden, placements)
+
+        with mock.patch.object(ReplayGame, '_ReplayGame__plant', partlyPlant):
+            results = self.httpConn.growPlants(1, self.plant, self.__placements(self.empty[:6]))
+
+        self.assertEqual(results, [True] * 6)
+        self.assertEqual(calls, [6, 2, 2])
+        self.assertTrue(set(self.empty[:6]) <= self.__plantedFields())
+
+    def test_transport_errors_are_not_split(self):
+        with mock.patch.object(HTTPConnection, SEND_REQUEST, failingRequest(TimeoutError())):
+            self.assertRaises(TimeoutError, self.httpConn.growPlants, 1, self.plant, self.__placements(self.empty[:8]))
+
+    def test_aqua_chunk_fails_only_on_reported_error(self):
+        response = {'status': '200'}
+        with mock.patch.object(HTTPConnection, SEND_REQUEST, lambda self, *args, **kwargs: (response, b'{"status": "error"}')):
+            self.assertEqual(self.httpConn.growAquaPlants(self.plant, [1, 2]), [False, False])
+        with mock.patch.object(HTTPConnection, SEND_REQUEST, failingRequest(TimeoutError())):
+            self.assertRaises(TimeoutError, self.httpConn.growAquaPlants, self.plant, [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
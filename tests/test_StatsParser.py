@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json, unittest
+from src.ReplayServer import FIXTURE_DIR
+from src.StatsParser import parseStats, STATS_FIELDS, STATS_INFO
+
+FIXTURES = {'de': 'statsGetStats.json', 'en': 'statsGetStats_en.json', 'ru': 'statsGetStats_ru.json'}
+
+def _loadTable(fileName):
+    with open(f'{FIXTURE_DIR}/{fileName}', encoding='utf-8') as file:
+        table = json.load(file)['table']
+    return [row.replace('{userName}', 'Tester').replace('{gardens}', '3') for row in table]
+
+def _row(label, value):
+    return f'<tr><td>{label}</td><td>{value}</td></tr>'
+
+
+class StatsParserTest(unittest.TestCase):
+
+    def test_fixtures_in_all_languages(self):
+        records = {lang: parseStats(_loadTable(fileName)) for lang, fileName in FIXTURES.items()}
+        for lang, record in records.items():
+            self.assertEqual(record.userName, 'Tester', lang)
+            self.assertEqual(record.points, 98765, lang)
+            self.assertEqual(record.rank, 1234, lang)
+            self.assertEqual(record.gardens, 3, lang)
+            self.assertNotIn(None, record, lang)
+        # Bis auf das Datumsformat unterscheiden sich die Sprachen nur in den Bezeichnungen
+        expected = records['de']._replace(memberSince=None)
+        self.assertEqual(records['en']._replace(memberSince=None), expected)
+        self.assertEqual(records['ru']._replace(memberSince=None), expected)
+
+    def test_rows_are_found_by_label_in_any_order(self):
+        record = parseStats([_row('Gärten', '4'), _row('Spielername', 'Tester'), _row('Punkte', '12')])
+        self.assertEqual((record.userName, record.points, record.gardens), ('Tester', 12, 4))
+
+    def test_label_normalization(self):
+        record = parseStats([_row('  player   NAME: ', 'Tester'), _row('Bishop’s cap quest', '7')])
+        self.assertEqual(record.userName, 'Tester')
+        self.assertEqual(record.bigheadQuest, 7)
+
+    def test_unknown_label_falls_back_to_position(self):
+        table = _loadTable(FIXTURES['de'])
+        table[16] = _row('Meine Gärten', '5')
+        table[5] = _row('Aufträge erfüllt', '42')
+        with self.assertLogs('bot.StatsParser', 'DEBUG') as logs:
+            record = parseStats(table)
+        self.assertEqual(record.gardens, 5)
+        self.assertEqual(record.completedQuests, 42)
+        self.assertEqual(len(logs.output), 2)
+
+    def test_known_label_wins_over_position(self):
+        # Eine bekannte Zeile an anderer Position wird nicht durch die unbekannte an ihrer alten Position ersetzt
+        table = [_row(f'Zeile {position}', str(position)) for position in range(18)]
+        table.append(_row('Gärten', '3'))
+        record = parseStats(table)
+        self.assertEqual(record.gardens, 3)
+        self.assertEqual(record.beehives, 17)
+        self.assertEqual(record.userName, '0')
+
+    def test_duplicate_label_falls_back_to_position(self):
+        # Die erste Zeile gewinnt, die zweite wird wie eine unbekannte Zeile behandelt
+        table = [_row('Punkte', '1'), _row('Punkte', '2'), _row('Punkte', '3')]
+        record = parseStats(table)
+        self.assertEqual(record.points, 1)
+        self.assertEqual(record.rank, 3)
+        self.assertIsNone(record.userName)
+
+    def test_number_separators(self):
+        for text in ('1.234', '1,234', '1 234', '1\xa0234', '1&nbsp;234', '1 234', "1'234", '<b>1.234</b>'):
+            self.assertEqual(parseStats([_row('Punkte', text)]).points, 1234, text)
+        self.assertIsNone(parseStats([_row('Punkte', '-')]).points)
+
+    def test_tags_and_entities(self):
+        record = parseStats([_row('<b>Gilde</b>', '<a href="#">Gr&uuml;ne &amp; Co</a>'),
+                             '<tr><td class="label">Spielername</td><td class="value">\n Tester \n</td></tr>'])
+        self.assertEqual(record.guild, 'Grüne & Co')
+        self.assertEqual(record.userName, 'Tester')
+
+    def test_missing_fields_are_none(self):
+        record = parseStats(['<tr><td>Spielername</td></tr>', '', _row('Punkte', '5')])
+        self.assertEqual(record.points, 5)
+        self.assertIsNone(record.userName)
+        self.assertEqual(parseStats([]), tuple(None for _ in STATS_FIELDS))
+        self.assertIsNone(parseStats([_row('Gilde', ' ')]).guild)
+
+    def test_info_keys(self):
+        self.assertEqual(STATS_INFO['Gardens'], 'gardens')
+        self.assertEqual(len(STATS_INFO), len(STATS_FIELDS))
+
+
+if __name__ == '__main__':
+    unittest.main()
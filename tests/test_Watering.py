@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+from src.HTTPCommunication import HTTPConnection
+from tests.replay import startReplay, failingRequest, SEND_REQUEST
+
+
+class WaterPlantsInGardenTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server, self.httpConn, self.counter = startReplay(gardens=1, aquaGarden=True)
+        dry = self.httpConn.getPlantsToWaterInGarden(1)['fieldID']
+        self.plants = [(fieldID, str(fieldID)) for fieldID in dry]
+        self.emptyField = self.httpConn.getEmptyFieldsOfGarden(1)[0]
+        self.counter.requests.clear()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_whole_chunk_in_one_request(self):
+        chunk = self.plants[:10]
+        self.assertEqual(self.httpConn.waterPlantsInGarden(1, chunk), [fieldID for fieldID, _ in chunk])
+        self.assertEqual(self.counter.requests['save/wasser.php'], 1)
+        self.assertEqual(self.counter.requests['ajax/ajax.php?do=changeGarden'], 0)
+
+    def test_failed_chunk_is_reread_and_only_dry_plants_resent(self):
+        # Der ReplayServer gießt bis zum leeren Feld und meldet dann success: 0
+        chunk = self.plants[:3] + [(self.emptyField, str(self.emptyField))] + self.plants[3:10]
+        watered = self.httpConn.waterPlantsInGarden(1, chunk)
+
+        self.assertEqual(sorted(watered), sorted(fieldID for fieldID, _ in self.plants[:10]))
+        self.assertEqual(self.httpConn.getPlantsToWaterInGarden(1)['fieldID'],
+                         [fieldID for fieldID, _ in self.plants[10:]])
+        # Ein Block, dazu die beiden Hälften der 7 ungegossenen Pflanzen
+        self.assertEqual(self.counter.requests['save/wasser.php'], 3)
+
+    def test_transport_errors_are_not_split(self):
+        with mock.patch.object(HTTPConnection, SEND_REQUEST, failingRequest(TimeoutError())):
+            self.assertRaises(TimeoutError, self.httpConn.waterPlantsInGarden, 1, self.plants[:20])
+
+    def test_aqua_chunk_counts_only_when_status_is_ok(self):
+        response = {'status': '200'}
+        with mock.patch.object(HTTPConnection, SEND_REQUEST, lambda self, *args, **kwargs: (response, b'{"status": "error"}')):
+            self.assertEqual(self.httpConn.waterPlantsInAquaGarden(['1', '2,3']), 0)
+        with mock.patch.object(HTTPConnection, SEND_REQUEST, lambda self, *args, **kwargs: (response, b'{"status": "ok"}')):
+            self.assertEqual(self.httpConn.waterPlantsInAquaGarden(['1', '2,3']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
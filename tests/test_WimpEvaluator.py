@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+from src.WimpEvaluator import WimpEvaluator, WimpOffer
+
+# NPC Preise der Testprodukte
+NPC_PRICES = {'1': 1.0, '2': 2.0, '3': 0.5}
+
+class _Product(object):
+    def __init__(self, price):
+        self.__price = price
+
+    def getPriceNPC(self):
+        return self.__price
+
+class _ProductData(object):
+    def getProductByID(self, id):
+        return _Product(NPC_PRICES[str(id)])
+
+def _ids(offers):
+    return sorted(offer.wimpID for offer in offers)
+
+
+class WimpEvaluatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.evaluator = WimpEvaluator(_ProductData())
+
+    def test_capacity_conflict_prefers_higher_total_revenue(self):
+        # a kommt zuerst, verdrängt aber b und c, die zusammen mehr bringen
+        offers = [WimpOffer(1, 'a', 12.0, {'1': 10}),
+                  WimpOffer(1, 'b', 8.0, {'1': 5}),
+                  WimpOffer(2, 'c', 8.0, {'1': 5})]
+        plan = self.evaluator.evaluate(offers, {'1': 11}, 0)
+        self.assertEqual(_ids(plan.accept), ['b', 'c'])
+        self.assertEqual(_ids(plan.skip), ['a'])
+        self.assertEqual(plan.decline, [])
+
+    def test_unprofitable_offers_are_declined(self):
+        offers = [WimpOffer(1, 'a', 8.0, {'1': 10}), WimpOffer(1, 'b', 9.0, {'1': 10})]
+        plan = self.evaluator.evaluate(offers, {'1': 100}, 90)
+        self.assertEqual(_ids(plan.decline), ['a'])
+        self.assertEqual(_ids(plan.accept), ['b'])
+
+    def test_required_stock_keeps_margin(self):
+        # Nach dem Verkauf müssen mehr als 5 Karotten übrig bleiben: 20 - 5 - 1 = 14 verkaufbar
+        offers = [WimpOffer(1, 'a', 20.0, {'1': 14}), WimpOffer(1, 'b', 30.0, {'1': 15})]
+        plan = self.evaluator.evaluate(offers, {'1': 20}, 0, requiredStock={'1': 5})
+        self.assertEqual(_ids(plan.accept), ['a'])
+        self.assertEqual(_ids(plan.skip), ['b'])
+
+    def test_missing_stock_does_not_block_other_products(self):
+        offers = [WimpOffer(1, 'a', 5.0, {'1': 2}), WimpOffer(1, 'b', 5.0, {'2': 1})]
+        plan = self.evaluator.evaluate(offers, {'2': 10}, 0)
+        self.assertEqual(_ids(plan.accept), ['b'])
+        self.assertEqual(_ids(plan.skip), ['a'])
+
+    def test_never_sell_products_are_skipped(self):
+        offers = [WimpOffer(1, 'a', 50.0, {'1': 1, '3': 1}), WimpOffer(1, 'b', 5.0, {'1': 1})]
+        plan = self.evaluator.evaluate(offers, {'1': 10, '3': 10}, 0, neverSell={3})
+        self.assertEqual(_ids(plan.skip), ['a'])
+        self.assertEqual(_ids(plan.accept), ['b'])
+
+    def test_node_limit_keeps_best_selection_found_so_far(self):
+        # a hat den höchsten Gewinn je NPC Wert und wird zuerst untersucht; optimal sind b und c
+        offers = [WimpOffer(1, 'a', 40.0, {'1': 10}),
+                  WimpOffer(1, 'b', 21.0, {'1': 6}),
+                  WimpOffer(1, 'c', 21.0, {'1': 6})]
+        stock = {'1': 13}
+        self.assertEqual(_ids(self.evaluator.evaluate(offers, stock, 0).accept), ['b', 'c'])
+
+        plan = WimpEvaluator(_ProductData(), maxNodes=1).evaluate(offers, stock, 0)
+        self.assertEqual(_ids(plan.accept), ['a'])
+        self.assertEqual(_ids(plan.skip), ['b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()